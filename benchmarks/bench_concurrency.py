@@ -0,0 +1,60 @@
+"""Throughput of a MemoryRepository shared by concurrent reader and writer threads.
+
+Readers fetch a page of movies and the reviews of a movie, as the movie pages do; writers add reviews. Reads
+take no lock, so adding readers should not slow writers down, and the reverse. Run from the CS235Flix directory:
+
+    python -m benchmarks.bench_concurrency [seconds]
+"""
+import random
+import sys
+import threading
+import time
+from movie_app.adapters.memory_repository import MemoryRepository, populate
+from movie_app.domain.model import Review
+
+DATA_PATH = 'movie_app/adapters/data'
+
+
+def run(readers: int, writers: int, seconds: float):
+    repo = MemoryRepository()
+    populate(DATA_PATH, repo)
+    stop = threading.Event()
+    counts = [0] * (readers + writers)
+
+    def read(index):
+        rng = random.Random(index)
+        while not stop.is_set():
+            rank = rng.randint(1, 998)
+            repo.get_movies_by_rank([rank, rank + 1, rank + 2])
+            repo.get_reviews_for_movie(rank)
+            repo.get_user('nton939')
+            counts[index] += 1
+
+    def write(index):
+        rng = random.Random(index)
+        while not stop.is_set():
+            repo.add_review(Review(repo.get_movie(rng.randint(1, 1000)), 'Benchmark review.', 5))
+            counts[index] += 1
+
+    threads = [threading.Thread(target=read, args=(i,)) for i in range(readers)]
+    threads += [threading.Thread(target=write, args=(readers + i,)) for i in range(writers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    reads = sum(counts[:readers]) / seconds
+    writes = sum(counts[readers:]) / seconds
+    print(f'{readers} readers, {writers} writers: {reads:>9.0f} reads/s  {writes:>8.0f} writes/s  '
+          f'({len(repo.get_reviews())} reviews)')
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 2.0
+    for readers, writers in ((4, 0), (0, 4), (4, 1), (4, 4), (8, 2)):
+        run(readers, writers, seconds)
+
+
+if __name__ == '__main__':
+    main()
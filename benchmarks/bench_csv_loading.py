@@ -0,0 +1,59 @@
+"""Peak memory and time of loading the movie data file into a MemoryRepository.
+
+Compares reading the whole file into the MovieFileCSVReader datasets and then copying them into the repository
+(read_csv_file) against streaming movies straight into the repository (iter_movies, as used by load_data).
+Run from the CS235Flix directory:
+
+    python -m benchmarks.bench_csv_loading [rows]
+"""
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from movie_app.adapters.memory_repository import MemoryRepository, load_data
+from movie_app.domain.model import MovieFileCSVReader
+from benchmarks.synthetic_data import write_synthetic_csv
+
+
+def load_materialized(data_path, repo):
+    reader = MovieFileCSVReader(os.path.join(data_path, 'Data1000Movies.csv'))
+    reader.read_csv_file()
+    for director in reader.dataset_of_directors:
+        repo.add_director(director)
+    for genre in reader.dataset_of_genres:
+        repo.add_genre(genre)
+    for actor in reader.dataset_of_actors:
+        repo.add_actor(actor)
+    for movie in reader.dataset_of_movies:
+        repo.add_movie(movie)
+
+
+def measure(name, load, data_path):
+    # Time a load without tracing, as tracemalloc slows allocation down, then trace a second load for memory.
+    gc.collect()
+    start = time.perf_counter()
+    load(data_path, MemoryRepository())
+    elapsed = time.perf_counter() - start
+
+    gc.collect()
+    tracemalloc.start()
+    repo = MemoryRepository()
+    load(data_path, repo)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f'{name:<14} peak {peak / 2 ** 20:>8.1f} MiB  retained {retained / 2 ** 20:>8.1f} MiB  {elapsed:>6.2f} s')
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    with tempfile.TemporaryDirectory() as data_path:
+        write_synthetic_csv(os.path.join(data_path, 'Data1000Movies.csv'), rows)
+        print(f'{rows} movies')
+        measure('read_csv_file', load_materialized, data_path)
+        measure('iter_movies', load_data, data_path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""Write throughput of a journaled MemoryRepository, and the time to recover it after a restart.
+
+Threads add reviews concurrently, with and without a commit delay, so group commit can share each fsync
+between writers. Recovery is then timed with and without a snapshot. Run from the CS235Flix directory:
+
+    python -m benchmarks.bench_journal [reviews]
+"""
+import sys
+import tempfile
+import threading
+import time
+from movie_app.adapters.journal import Journal
+from movie_app.adapters.memory_repository import MemoryRepository, load_data, populate
+from movie_app.domain.model import Review
+
+DATA_PATH = 'movie_app/adapters/data'
+
+
+def journaled_repo(directory, commit_delay=0.0, snapshot_every=10 ** 9):
+    repo = MemoryRepository()
+    journal = Journal(directory, commit_delay=commit_delay, snapshot_every=snapshot_every)
+    populate(DATA_PATH, repo, journal=journal)
+    return repo, journal
+
+
+def write_reviews(repo, reviews, threads):
+    def add_reviews(offset):
+        for i in range(offset, reviews, threads):
+            repo.add_review(Review(repo.get_movie(i % 1000 + 1), 'Benchmark review.', 5))
+
+    workers = [threading.Thread(target=add_reviews, args=(offset,)) for offset in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return reviews / (time.perf_counter() - start)
+
+
+def time_recovery(directory):
+    repo = MemoryRepository()
+    load_data(DATA_PATH, repo)
+    journal = Journal(directory)
+    start = time.perf_counter()
+    replayed = repo.attach_journal(journal)
+    elapsed = time.perf_counter() - start
+    journal.close()
+    return replayed, elapsed
+
+
+def main():
+    reviews = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    for threads in (1, 8):
+        for commit_delay in (0.0, 0.001):
+            with tempfile.TemporaryDirectory() as directory:
+                repo, journal = journaled_repo(directory, commit_delay)
+                throughput = write_reviews(repo, reviews, threads)
+                journal.close()
+            print(f'{threads} threads, commit delay {commit_delay * 1000:.0f} ms: {throughput:>8.0f} reviews/s')
+
+    with tempfile.TemporaryDirectory() as directory:
+        repo, journal = journaled_repo(directory)
+        write_reviews(repo, reviews, 8)
+        journal.close()
+        replayed, elapsed = time_recovery(directory)
+        print(f'recovery from journal: {replayed} mutations in {elapsed:.2f} s')
+
+    with tempfile.TemporaryDirectory() as directory:
+        repo, journal = journaled_repo(directory, snapshot_every=1000)
+        write_reviews(repo, reviews, 8)
+        journal.close()
+        replayed, elapsed = time_recovery(directory)
+        print(f'recovery from snapshot and journal: {replayed} mutations in {elapsed:.2f} s')
+
+
+if __name__ == '__main__':
+    main()
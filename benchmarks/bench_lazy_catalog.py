@@ -0,0 +1,57 @@
+"""Start-up time and retained memory of loading the movie data file eagerly and as a lazy, memory-mapped catalog.
+
+Also times rendering the view model of one page of movies, first from a cold details cache and then warm.
+Run from the CS235Flix directory:
+
+    python -m benchmarks.bench_lazy_catalog [rows]
+"""
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from movie_app.adapters.memory_repository import MemoryRepository, load_data
+from movie_app.movies.services import movie_to_dict
+from benchmarks.synthetic_data import write_synthetic_csv
+
+
+def measure(catalog_mode, data_path):
+    # Time a load without tracing, as tracemalloc slows allocation down, then trace a second load for memory.
+    gc.collect()
+    start = time.perf_counter()
+    repo = MemoryRepository()
+    load_data(data_path, repo, catalog_mode=catalog_mode)
+    elapsed = time.perf_counter() - start
+
+    page = repo.get_movies_by_rank(list(range(5000, 5003)))
+    gc.collect()    # So a collection of the freshly loaded movies does not land in the timings.
+    timings = []
+    for _ in range(2):
+        start = time.perf_counter()
+        for movie in page:
+            movie_to_dict(movie)
+        timings.append((time.perf_counter() - start) * 1e6)
+    del repo, page
+
+    gc.collect()
+    tracemalloc.start()
+    repo = MemoryRepository()
+    load_data(data_path, repo, catalog_mode=catalog_mode)
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f'{catalog_mode:<6} start-up {elapsed:>6.2f} s  retained {retained / 2 ** 20:>7.1f} MiB  '
+          f'page {timings[0]:>6.1f} µs cold, {timings[1]:>6.1f} µs warm')
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    with tempfile.TemporaryDirectory() as data_path:
+        write_synthetic_csv(os.path.join(data_path, 'Data1000Movies.csv'), rows)
+        print(f'{rows} movies')
+        measure('eager', data_path)
+        measure('lazy', data_path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,35 @@
+"""Time of loading a large movie data file into a MemoryRepository with 1, 2, 4 and 8 parsing processes.
+
+With one worker the file is read by MovieFileCSVReader.iter_movies; with more it is split into chunks on record
+boundaries and parsed by a process pool. Run from the CS235Flix directory:
+
+    python -m benchmarks.bench_parallel_loader [rows]
+"""
+import gc
+import os
+import sys
+import tempfile
+import time
+from movie_app.adapters.memory_repository import MemoryRepository, load_data
+from benchmarks.synthetic_data import write_synthetic_csv
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    print(f'{rows} movies, {os.cpu_count()} CPUs')
+    with tempfile.TemporaryDirectory() as data_path:
+        write_synthetic_csv(os.path.join(data_path, 'Data1000Movies.csv'), rows)
+        baseline = None
+        for workers in (1, 2, 4, 8):
+            gc.collect()
+            repo = MemoryRepository()
+            start = time.perf_counter()
+            load_data(data_path, repo, workers)
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            print(f'{workers} workers  {elapsed:>6.2f} s  speed-up {baseline / elapsed:>4.2f}x  '
+                  f'({repo.get_number_of_movies()} movies)')
+
+
+if __name__ == '__main__':
+    main()
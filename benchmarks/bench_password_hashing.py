@@ -0,0 +1,67 @@
+"""Login throughput and catalog browsing latency during a login storm, with passwords hashed on the request threads
+and in a pool of worker processes (see PASSWORD_HASH_WORKERS).
+
+Login threads post the login form as fast as they can while browsing threads request random pages of movies, all
+through one app, as the request threads of one server process would. Run from the CS235Flix directory:
+
+    python -m benchmarks.bench_password_hashing [seconds] [login threads] [browsing threads] [hash workers]
+"""
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+from movie_app import create_app
+
+
+def log_in(app, stop: threading.Event, outcomes: list):
+    client = app.test_client()
+    while not stop.is_set():
+        response = client.post('/authentication/login', data={'username': 'nton939', 'password': 'nton939Password'})
+        outcomes.append(response.status_code)
+
+
+def browse(app, stop: threading.Event, seed: int, latencies: list):
+    client = app.test_client()
+    rng = random.Random(seed)
+    while not stop.is_set():
+        start = time.perf_counter()
+        client.get(f'/api/movies?cursor={rng.randrange(0, 990)}&limit=10')
+        latencies.append(time.perf_counter() - start)
+
+
+def measure(workers: int, seconds: float, login_threads: int, browsing_threads: int):
+    app = create_app({'TESTING': True, 'TEST_DATA_PATH': os.path.join('movie_app', 'adapters', 'data'),
+                      'WTF_CSRF_ENABLED': False, 'PASSWORD_HASH_WORKERS': workers,
+                      'PASSWORD_HASH_QUEUE_DEPTH': login_threads})
+    stop = threading.Event()
+    outcomes = []
+    latencies = []
+    threads = [threading.Thread(target=log_in, args=(app, stop, outcomes)) for _ in range(login_threads)]
+    threads += [threading.Thread(target=browse, args=(app, stop, seed, latencies)) for seed in range(browsing_threads)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    latencies.sort()
+    logins = outcomes.count(302)
+    print(f'hash workers {workers}:  logins {logins / seconds:>6.1f}/s  rejected {outcomes.count(503):>4}  '
+          f'browsing {len(latencies) / seconds:>7.1f} req/s  median {statistics.median(latencies) * 1000:>6.2f} ms  '
+          f'p99 {latencies[int(len(latencies) * 0.99)] * 1000:>7.2f} ms')
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 5
+    login_threads = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    browsing_threads = int(sys.argv[3]) if len(sys.argv) > 3 else 4
+    workers = int(sys.argv[4]) if len(sys.argv) > 4 else 2
+    print(f'{login_threads} login threads, {browsing_threads} browsing threads, {seconds} s each')
+    measure(0, seconds, login_threads, browsing_threads)
+    measure(workers, seconds, login_threads, browsing_threads)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""Memory of prefork worker processes, with and without freezing the loaded heap before forking (see wsgi.py).
+
+The master creates the app, loading the movies eagerly, and forks the workers, as gunicorn's preload_app does.
+Each worker serves a mix of movie pages and API requests and makes a full collection, then reports its resident set size (RSS), the part of it
+that no other process shares (USS), and its proportional set size (PSS). Linux only. Run from the CS235Flix
+directory:
+
+    python -m benchmarks.bench_prefork [rows] [workers] [requests]
+"""
+import gc
+import os
+import random
+import sys
+import tempfile
+from movie_app import create_app
+from movie_app.web import prefork
+from benchmarks.synthetic_data import write_synthetic_csv
+
+
+def memory() -> tuple:
+    sizes = dict()
+    with open('/proc/self/smaps_rollup') as smaps:
+        for line in smaps:
+            fields = line.split()
+            if len(fields) == 3 and fields[2] == 'kB':
+                sizes[fields[0].rstrip(':')] = int(fields[1]) * 1024
+    return sizes['Rss'], sizes['Private_Clean'] + sizes['Private_Dirty'], sizes['Pss']
+
+
+def serve(app, seed: int, requests: int, rows: int):
+    client = app.test_client()
+    rng = random.Random(seed)
+    for _ in range(requests):
+        rank = rng.randint(1, rows)
+        client.get(f'/movies_by_rank?movie_rank={rank}')
+        client.get(f'/api/movies/{rank}')
+    # A long-running worker sooner or later makes a full collection, which visits every object it can track.
+    gc.collect()
+
+
+def measure(freeze: bool, data_path: str, rows: int, workers: int, requests: int):
+    app = create_app({'TESTING': True, 'TEST_DATA_PATH': data_path})
+    if freeze:
+        prefork.prepare_for_fork(app)
+    pipes = []
+    for worker in range(workers):
+        read_end, write_end = os.pipe()
+        if os.fork() == 0:
+            os.close(read_end)
+            prefork.after_fork()
+            serve(app, worker, requests, rows)
+            os.write(write_end, ' '.join(str(size) for size in memory()).encode())
+            os._exit(0)
+        os.close(write_end)
+        pipes.append(read_end)
+    sizes = []
+    for read_end in pipes:
+        sizes.append([int(size) for size in os.read(read_end, 128).split()])
+        os.close(read_end)
+    for _ in pipes:
+        os.wait()
+    rss, uss, pss = (sum(column) / workers / 2 ** 20 for column in zip(*sizes))
+    print(f'{"frozen" if freeze else "plain":<6} {workers} workers  per worker: RSS {rss:>6.1f} MiB  '
+          f'USS {uss:>6.1f} MiB  PSS {pss:>6.1f} MiB')
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    requests = int(sys.argv[3]) if len(sys.argv) > 3 else 500
+    with tempfile.TemporaryDirectory() as data_path:
+        write_synthetic_csv(os.path.join(data_path, 'Data1000Movies.csv'), rows)
+        print(f'{rows} movies, {requests} requests per worker')
+        for freeze in (False, True):
+            # Each master starts from a fresh process, so no measurement inherits another's garbage.
+            if os.fork() == 0:
+                measure(freeze, data_path, rows, workers, requests)
+                os._exit(0)
+            os.wait()
+
+
+if __name__ == '__main__':
+    main()
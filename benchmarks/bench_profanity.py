@@ -0,0 +1,57 @@
+"""Time to check reviews for profanity, with better_profanity and with the compiled filter (see
+movie_app/movies/profanity_filter.py), for short reviews and 10 KB reviews, clean and with a disguised swear word
+at the end. Also times building each; the compiled filter is timed after importing the app package, which it
+lives in. Run from the CS235Flix directory:
+
+    python -m benchmarks.bench_profanity [repeats]
+"""
+import importlib
+import random
+import sys
+import time
+
+
+def review(length: int, seed: int) -> str:
+    words = ('the', 'movie', 'was', 'a', 'classic', 'with', 'great', 'acting', 'but', 'slow', 'plot', 'assassin',
+             'scene', 'and', 'music', 'I', "didn't", 'expect', 'that', 'ending!')
+    rng = random.Random(seed)
+    text = []
+    while sum(len(word) + 1 for word in text) < length:
+        text.append(rng.choice(words))
+    return ' '.join(text)
+
+
+def time_per_call(check, text: str, repeats: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeats):
+        check(text)
+    return (time.perf_counter() - start) / repeats
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+    start = time.perf_counter()
+    better_profanity = importlib.import_module('better_profanity')
+    better_profanity.profanity.contains_profanity('warm up')
+    print(f'better_profanity  import and word set  {(time.perf_counter() - start) * 1000:>7.1f} ms')
+    profanity_filter = importlib.import_module('movie_app.movies.profanity_filter')
+    start = time.perf_counter()
+    compiled = profanity_filter.ProfanityFilter(profanity_filter.load_default_words())
+    print(f'compiled filter   word list and automaton {(time.perf_counter() - start) * 1000:>4.1f} ms  '
+          f'({compiled.state_count} states)')
+
+    checks = (('better_profanity', better_profanity.profanity.contains_profanity),
+              ('compiled filter', compiled.contains_profanity))
+    for length in (100, 10240):
+        for ending in ('', ' what a pile of sh1t'):
+            text = review(length, length) + ending
+            assert checks[0][1](text) == checks[1][1](text)
+            times = [time_per_call(check, text, max(5, repeats * 100 // length)) for _, check in checks]
+            print(f'{len(text):>6} chars, {"profane" if ending else "clean  "}: '
+                  + '  '.join(f'{name} {seconds * 1e6:>9.1f} us' for (name, _), seconds in zip(checks, times))
+                  + f'  ({times[0] / times[1]:.0f}x)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""Latency of repository reads while the catalog is reloaded and swapped in.
+
+Reader threads fetch pages of movies through the current repository, as requests do, and record how long each
+fetch takes, first with nothing else running and then while the catalog is reloaded. Run from the CS235Flix
+directory:
+
+    python -m benchmarks.bench_reload [rows] [readers]
+"""
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import movie_app.adapters.repository as repo
+from movie_app.adapters.memory_repository import MemoryRepository, populate
+from movie_app.adapters.reloader import Reloader
+from movie_app.movies.services import movie_to_dict
+from benchmarks.synthetic_data import write_synthetic_csv
+
+
+def read_while(condition, seed: int, rows: int, latencies: list):
+    rng = random.Random(seed)
+    while condition():
+        start = time.perf_counter()
+        repository = repo.repo_instance
+        rank = rng.randint(1, rows - 10)
+        for movie in repository.get_movies_by_rank(range(rank, rank + 10)):
+            movie_to_dict(movie)
+        latencies.append(time.perf_counter() - start)
+        time.sleep(0.001)    # Requests arrive now and then, rather than back to back.
+
+
+def measure(label: str, readers: int, rows: int, run):
+    latencies = []
+    running = threading.Event()
+    running.set()
+    threads = [threading.Thread(target=read_while, args=(running.is_set, seed, rows, latencies))
+               for seed in range(readers)]
+    for thread in threads:
+        thread.start()
+    run()
+    running.clear()
+    for thread in threads:
+        thread.join()
+    latencies.sort()
+    print(f'{label:<16} {len(latencies):>7} reads  p50 {latencies[len(latencies) // 2] * 1e3:>6.2f} ms  '
+          f'p99 {latencies[len(latencies) * 99 // 100] * 1e3:>6.2f} ms  max {latencies[-1] * 1e3:>7.2f} ms')
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    readers = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    data_path = tempfile.mkdtemp()
+    try:
+        write_synthetic_csv(os.path.join(data_path, 'Data1000Movies.csv'), rows)
+        repo.repo_instance = MemoryRepository()
+        populate(data_path, repo.repo_instance)
+        reloader = Reloader(data_path)
+        print(f'{rows} movies, {readers} reader threads')
+        measure('steady', readers, rows, lambda: time.sleep(5))
+        reload_times = []
+        measure('during reload', readers, rows, lambda: reload_times.append(reloader.reload()['last_duration']))
+        print(f'reload took {reload_times[0]:.2f} s')
+    finally:
+        shutil.rmtree(data_path)
+
+
+if __name__ == '__main__':
+    main()
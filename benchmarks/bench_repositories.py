@@ -0,0 +1,61 @@
+"""Populate time and per-call time of common repository operations, for MemoryRepository and SqliteRepository.
+
+The SQLite database is a file in a temporary directory, using write-ahead logging as it would in production.
+Run from the CS235Flix directory:
+
+    python -m benchmarks.bench_repositories [rows]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from movie_app.adapters import memory_repository, sqlite_repository
+from movie_app.adapters.memory_repository import MemoryRepository
+from movie_app.adapters.sqlite_repository import SqliteRepository
+from movie_app.domain.model import Review
+from benchmarks.synthetic_data import write_synthetic_csv
+
+CALLS = 2000
+
+
+def time_calls(operation, arguments) -> float:
+    start = time.perf_counter()
+    for argument in arguments:
+        operation(argument)
+    return (time.perf_counter() - start) / len(arguments) * 1e6
+
+
+def measure(name, repo, populate, data_path, rows):
+    start = time.perf_counter()
+    populate(data_path, repo)
+    print(f'{name}: populate {time.perf_counter() - start:.2f} s')
+
+    ranks = [random.randint(1, rows) for _ in range(CALLS)]
+    pages = [list(range(rank, rank + 3)) for rank in ranks]
+    operations = [
+        ('get_movie', repo.get_movie, ranks),
+        ('get_movies_by_rank (3)', repo.get_movies_by_rank, pages),
+        ('get_movie_ranks_for_genre', repo.get_movie_ranks_for_genre, ['Sci-Fi'] * (CALLS // 10)),
+        ('get_reviews_for_movie', repo.get_reviews_for_movie, ranks),
+        ('get_user', repo.get_user, ['nton939'] * CALLS),
+        ('add_review', repo.add_review, [Review(repo.get_movie(rank), 'Benchmark.', 5) for rank in ranks]),
+    ]
+    for operation_name, operation, arguments in operations:
+        print(f'  {operation_name:<28} {time_calls(operation, arguments):>9.1f} µs')
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    random.seed(235)
+    with tempfile.TemporaryDirectory() as data_path:
+        write_synthetic_csv(os.path.join(data_path, 'Data1000Movies.csv'), rows)
+        print(f'{rows} movies')
+        measure('MemoryRepository', MemoryRepository(), memory_repository.populate, data_path, rows)
+        repo = SqliteRepository(os.path.join(data_path, 'cs235flix.db'))
+        measure('SqliteRepository', repo, sqlite_repository.populate, data_path, rows)
+        repo.close()
+
+
+if __name__ == '__main__':
+    main()
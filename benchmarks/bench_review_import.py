@@ -0,0 +1,62 @@
+"""Throughput of importing reviews in bulk, against adding them one at a time through the review service.
+
+Both run on a MemoryRepository, without and with a journal, so the bulk import's single journal commit can be
+compared with a commit per review. Run from the CS235Flix directory:
+
+    python -m benchmarks.bench_review_import [reviews]
+"""
+import json
+import sys
+import tempfile
+import time
+import movie_app.admin.services as admin_services
+import movie_app.movies.services as movies_services
+from movie_app.adapters.journal import Journal
+from movie_app.adapters.memory_repository import MemoryRepository, populate
+from movie_app.domain.model import User
+
+DATA_PATH = 'movie_app/adapters/data'
+
+
+def make_repo(directory=None):
+    repo = MemoryRepository()
+    journal = Journal(directory) if directory is not None else None
+    populate(DATA_PATH, repo, journal=journal)
+    repo.add_user(User('benchmark', 'Benchmark1'))
+    return repo, journal
+
+
+def review_lines(reviews):
+    return [json.dumps({'movie_rank': i % 1000 + 1, 'username': 'benchmark',
+                        'review_text': 'Benchmark review.', 'rating': i % 10 + 1}) for i in range(reviews)]
+
+
+def add_one_at_a_time(lines, repo):
+    start = time.perf_counter()
+    for line in lines:
+        entry = json.loads(line)
+        movies_services.add_review(entry['movie_rank'], entry['review_text'], entry['rating'], entry['username'], repo)
+    return len(lines) / (time.perf_counter() - start)
+
+
+def import_in_bulk(lines, repo):
+    start = time.perf_counter()
+    admin_services.import_reviews(lines, repo)
+    return len(lines) / (time.perf_counter() - start)
+
+
+def main():
+    reviews = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    lines = review_lines(reviews)
+    for journaled in (False, True):
+        for name, add in (('one at a time', add_one_at_a_time), ('bulk import', import_in_bulk)):
+            with tempfile.TemporaryDirectory() as directory:
+                repo, journal = make_repo(directory if journaled else None)
+                throughput = add(lines, repo)
+                if journal is not None:
+                    journal.close()
+            print(f'{"journaled" if journaled else "in memory"}, {name}: {throughput:>9.0f} reviews/s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""Time to show the reviews of a movie with many reviews: every review, as the movie page used to, against the first
+and a later page of its review timelines, for both repositories. Run from the CS235Flix directory:
+
+    python -m benchmarks.bench_review_timelines [reviews]
+"""
+import sys
+import tempfile
+import timeit
+from datetime import datetime, timedelta
+import movie_app.movies.services as services
+from movie_app.adapters.memory_repository import MemoryRepository, populate
+from movie_app.adapters.sqlite_repository import SqliteRepository
+from movie_app.adapters import sqlite_repository
+from movie_app.domain.model import Review
+
+DATA_PATH = 'movie_app/adapters/data'
+PAGE_SIZE = 10
+
+
+def add_reviews(repo, reviews):
+    movie = repo.get_movie(2)
+    start = datetime(2020, 1, 1)
+    repo.add_reviews([Review(movie, f'Review {i}', i % 10 + 1, start + timedelta(seconds=i * 7919 % reviews))
+                      for i in range(reviews)])
+
+
+def time_call(function, number=20):
+    return min(timeit.repeat(function, number=number, repeat=3)) / number * 1000
+
+
+def report(name, repo):
+    # The repository is read directly, as a new review of the movie makes the service cache miss.
+    def page(order, cursor):
+        return services.reviews_to_dict(review for _, review in repo.get_review_timeline(2, order, cursor, PAGE_SIZE))
+
+    all_reviews = time_call(lambda: services.reviews_to_dict(repo.get_reviews_for_movie(2)))
+    first_page = time_call(lambda: page('newest', None))
+    cursor = repo.get_review_timeline(2, 'top_rated', None, 1000)[-1][0]
+    later_page = time_call(lambda: page('top_rated', cursor))
+    print(f'{name}: all reviews {all_reviews:8.2f} ms, first page {first_page:6.3f} ms, '
+          f'page after 1000 {later_page:6.3f} ms')
+
+
+def main():
+    reviews = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    repo = MemoryRepository()
+    populate(DATA_PATH, repo)
+    add_reviews(repo, reviews)
+    report('memory', repo)
+
+    with tempfile.TemporaryDirectory() as directory:
+        repo = SqliteRepository(f'{directory}/movies.db')
+        sqlite_repository.populate(DATA_PATH, repo)
+        add_reviews(repo, reviews)
+        report('sqlite', repo)
+        repo.close()
+
+
+if __name__ == '__main__':
+    main()
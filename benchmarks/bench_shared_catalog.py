@@ -0,0 +1,80 @@
+"""Total memory of prefork worker processes serving the catalog loaded eagerly and from a shared catalog image.
+
+The master loads the catalog and forks the workers, as gunicorn's preload_app does. Each worker then serves random
+pages of movies for a while, and reports its proportional set size (PSS), which divides each shared page between the
+processes that map it, so the workers' PSS add up to the memory they really use. Linux only; a worker that only
+imports the application already takes about 15 MiB.
+Run from the CS235Flix directory:
+
+    python -m benchmarks.bench_shared_catalog [rows] [workers]
+"""
+import gc
+import os
+import random
+import sys
+import tempfile
+from movie_app.adapters.memory_repository import MemoryRepository, load_data
+from movie_app.movies.services import movie_to_dict
+from benchmarks.synthetic_data import write_synthetic_csv
+
+
+def proportional_set_size() -> int:
+    with open('/proc/self/smaps_rollup') as smaps:
+        for line in smaps:
+            if line.startswith('Pss:'):
+                return int(line.split()[1]) * 1024
+    return 0
+
+
+def serve(repo, seed: int):
+    # Reference counting on every object a worker touches writes to its page, copying inherited pages.
+    rng = random.Random(seed)
+    movie_count = repo.get_number_of_movies()
+    for _ in range(2000):
+        rank = rng.randint(1, movie_count - 2)
+        for movie in repo.get_movies_by_rank([rank, rank + 1, rank + 2]):
+            movie_to_dict(movie)
+    gc.collect()
+
+
+def measure(catalog_mode: str, data_path: str, workers: int):
+    repo = MemoryRepository()
+    load_data(data_path, repo, catalog_mode=catalog_mode,
+              catalog_image=os.path.join(data_path, 'Data1000Movies.catalog'))
+    pipes = []
+    for worker in range(workers):
+        read_end, write_end = os.pipe()
+        if os.fork() == 0:
+            os.close(read_end)
+            serve(repo, worker)
+            os.write(write_end, str(proportional_set_size()).encode())
+            os._exit(0)
+        os.close(write_end)
+        pipes.append(read_end)
+    sizes = []
+    for read_end in pipes:
+        sizes.append(int(os.read(read_end, 64)))
+        os.close(read_end)
+    for _ in pipes:
+        os.wait()
+    print(f'{catalog_mode:<6} {workers} workers  total PSS {sum(sizes) / 2 ** 20:>7.1f} MiB  '
+          f'per worker {sum(sizes) / workers / 2 ** 20:>6.1f} MiB')
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    with tempfile.TemporaryDirectory() as data_path:
+        write_synthetic_csv(os.path.join(data_path, 'Data1000Movies.csv'), rows)
+        print(f'{rows} movies')
+        for worker_count in (1, workers):
+            for catalog_mode in ('eager', 'shared'):
+                # Each master starts from a fresh process, so no measurement inherits another's garbage.
+                if os.fork() == 0:
+                    measure(catalog_mode, data_path, worker_count)
+                    os._exit(0)
+                os.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""Allocation benchmark for the movie dicts of one listing page (3 movies).
+
+Compares building fresh dicts with movies_to_dict on every request (the previous behaviour) against the cached,
+read-only view models with a per-request overlay. Run from the CS235Flix directory:
+
+    python -m benchmarks.bench_view_models
+"""
+import os
+import time
+import tracemalloc
+from movie_app.adapters.memory_repository import MemoryRepository, populate
+from movie_app.caching.view_models import overlay
+import movie_app.movies.services as services
+
+DATA_PATH = os.path.join('movie_app', 'adapters', 'data')
+PAGE_RANKS = [1, 2, 3]
+REQUESTS = 10000
+
+
+def fresh_dicts(repo):
+    movies = services.movies_to_dict(repo.get_movies_by_rank(PAGE_RANKS))
+    for movie in movies:
+        movie['view_review_url'] = '/movies_by_rank?cursor=0&view_reviews_for=%d' % movie['rank']
+        movie['add_review_url'] = '/review?movie=%d' % movie['rank']
+    return movies
+
+
+def view_models(repo):
+    return [
+        overlay(
+            movie,
+            view_review_url='/movies_by_rank?cursor=0&view_reviews_for=%d' % movie['rank'],
+            add_review_url='/review?movie=%d' % movie['rank']
+        )
+        for movie in services.get_movies_by_rank(PAGE_RANKS, repo)
+    ]
+
+
+def measure(name, build_page, repo):
+    build_page(repo)    # Warm up, so the view model cache is filled.
+
+    # Keep every page alive, as concurrent requests would, and count the memory they hold.
+    tracemalloc.start()
+    pages = [build_page(repo) for _ in range(REQUESTS)]
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del pages
+
+    start = time.perf_counter()
+    for _ in range(REQUESTS):
+        build_page(repo)
+    elapsed = time.perf_counter() - start
+
+    print(f'{name:<14} {allocated / REQUESTS:>10.0f} bytes/page {elapsed / REQUESTS * 1e6:>10.1f} us/page')
+
+
+def main():
+    repo = MemoryRepository()
+    populate(DATA_PATH, repo)
+    measure('movies_to_dict', fresh_dicts, repo)
+    measure('view models', view_models, repo)
+
+
+if __name__ == '__main__':
+    main()
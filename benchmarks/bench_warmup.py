@@ -0,0 +1,47 @@
+"""Latency of the first requests to the home page and the genre pages, with and without the start-up warm-up.
+
+Each run creates the app from a synthetic data file, optionally warming its caches (see WARMUP), then requests
+the home page and the first page of every genre once, as the first visitors after a deploy would. Run from the
+CS235Flix directory:
+
+    python -m benchmarks.bench_warmup [rows] [threads]
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+import movie_app.adapters.repository as repo
+from movie_app import create_app
+from benchmarks.synthetic_data import write_synthetic_csv
+
+
+def measure(warm: bool, data_path: str, threads: int):
+    start = time.perf_counter()
+    app = create_app({'TESTING': True, 'TEST_DATA_PATH': data_path, 'WARMUP': warm, 'WARMUP_THREADS': threads,
+                      'WARMUP_BUDGET': 60})
+    start_up = time.perf_counter() - start
+    client = app.test_client()
+    paths = ['/'] + [f'/movies_by_genre?genre={genre.genre_name}' for genre in repo.repo_instance.get_genres()]
+    latencies = []
+    for path in paths:
+        request_start = time.perf_counter()
+        client.get(path)
+        latencies.append(time.perf_counter() - request_start)
+    print(f'{"warm" if warm else "cold":<4}  start-up {start_up:>6.2f} s  first requests: '
+          f'median {statistics.median(latencies) * 1000:>7.2f} ms  max {max(latencies) * 1000:>7.2f} ms  '
+          f'total {sum(latencies) * 1000:>8.1f} ms')
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    with tempfile.TemporaryDirectory() as data_path:
+        write_synthetic_csv(os.path.join(data_path, 'Data1000Movies.csv'), rows)
+        print(f'{rows} movies, {threads} warm-up threads')
+        for warm in (False, True):
+            measure(warm, data_path, threads)
+
+
+if __name__ == '__main__':
+    main()
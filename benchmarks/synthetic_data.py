@@ -0,0 +1,21 @@
+import csv
+import os
+
+DATA_FILE = os.path.join('movie_app', 'adapters', 'data', 'Data1000Movies.csv')
+
+
+def write_synthetic_csv(path: str, rows: int):
+    # Repeats the movies of the data file, with new ranks and numbered titles, until the file has rows movies.
+    with open(DATA_FILE, mode='r', encoding='utf-8-sig', newline='') as data_file:
+        reader = csv.reader(data_file)
+        header = next(reader)
+        movies = list(reader)
+    with open(path, mode='w', encoding='utf-8', newline='') as synthetic_file:
+        writer = csv.writer(synthetic_file)
+        writer.writerow(header)
+        for rank in range(1, rows + 1):
+            row = list(movies[(rank - 1) % len(movies)])
+            row[0] = str(rank)
+            if rank > len(movies):
+                row[1] = f'{row[1]} ({(rank - 1) // len(movies) + 1})'
+            writer.writerow(row)
@@ -1,5 +1,5 @@
 """Flask configuration variables."""
-from os import environ, path, getenv
+from os import cpu_count, environ, path, getenv
 from dotenv import load_dotenv
 
 # Load environment variables from file .env, stored in this directory.
@@ -12,3 +12,100 @@ class Config:
     FLASK_APP = environ.get('FLASK_APP')
     FLASK_ENV = environ.get('FLASK_ENV')
     SECRET_KEY = environ.get('SECRET_KEY')
+
+    # Production server (gunicorn.conf.py): address to listen on, number of worker processes, and the number of
+    # requests after which a worker is replaced by a fresh one (0 never replaces workers), plus a random extra of up
+    # to SERVER_MAX_REQUESTS_JITTER so workers are not all replaced at once. Several workers need a repository they
+    # all share, REPOSITORY=sqlite or REPLICATION_DATABASE, and the memory repository's JOURNAL_DIR is written by a
+    # single process, so without a shared repository, or with a journal, the default is a single worker.
+    SERVER_BIND = environ.get('SERVER_BIND', '127.0.0.1:8000')
+    SERVER_WORKERS = int(environ.get('SERVER_WORKERS', 2 * (cpu_count() or 1) + 1
+                                     if environ.get('REPOSITORY') == 'sqlite'
+                                     or environ.get('REPLICATION_DATABASE') and not environ.get('JOURNAL_DIR')
+                                     else 1))
+    SERVER_MAX_REQUESTS = int(environ.get('SERVER_MAX_REQUESTS', 0))
+    SERVER_MAX_REQUESTS_JITTER = int(environ.get('SERVER_MAX_REQUESTS_JITTER', 0))
+
+    # Allocations between collections of the garbage collector's youngest generation once the app is loaded
+    # (0 keeps Python's default of 700). The loaded data is frozen out of collections, so collecting less often only
+    # delays freeing short-lived cycles.
+    GC_GEN0_THRESHOLD = int(environ.get('GC_GEN0_THRESHOLD', 10000))
+
+    # Unique-viewer counters: directory shared by all workers for snapshots (unset to keep counts in memory only),
+    # and the number of seconds between snapshots.
+    VIEW_COUNTER_SNAPSHOT_DIR = environ.get('VIEW_COUNTER_SNAPSHOT_DIR')
+    VIEW_COUNTER_SNAPSHOT_INTERVAL = int(environ.get('VIEW_COUNTER_SNAPSHOT_INTERVAL', 60))
+
+    # Rendered page and movie fragment cache: maximum number of entries, and seconds before an entry expires.
+    FRAGMENT_CACHE_MAX_ENTRIES = int(environ.get('FRAGMENT_CACHE_MAX_ENTRIES', 2048))
+    FRAGMENT_CACHE_TTL = float(environ.get('FRAGMENT_CACHE_TTL', 300))
+
+    # Response compression: smallest body (in bytes) worth compressing, and the gzip compression level.
+    COMPRESSION_MIN_SIZE = int(environ.get('COMPRESSION_MIN_SIZE', 500))
+    COMPRESSION_LEVEL = int(environ.get('COMPRESSION_LEVEL', 6))
+
+    # Maximum number of read-only movie dicts (view models) shared by views.
+    VIEW_MODEL_CACHE_MAX_ENTRIES = int(environ.get('VIEW_MODEL_CACHE_MAX_ENTRIES', 4096))
+
+    # Results of service functions: 'memory' caches them in each process, 'sqlite' in the SERVICE_CACHE_DATABASE file
+    # that all worker processes share, and 'none' turns caching off. Each cached function keeps up to
+    # SERVICE_CACHE_MAX_ENTRIES results. A result is fresh for SERVICE_CACHE_TTL seconds, then returned for up to
+    # SERVICE_CACHE_STALE_TTL more seconds while it is computed again in the background.
+    SERVICE_CACHE = environ.get('SERVICE_CACHE', 'memory')
+    SERVICE_CACHE_DATABASE = environ.get('SERVICE_CACHE_DATABASE', 'service_cache.db')
+    SERVICE_CACHE_MAX_ENTRIES = int(environ.get('SERVICE_CACHE_MAX_ENTRIES', 1024))
+    SERVICE_CACHE_TTL = float(environ.get('SERVICE_CACHE_TTL', 300))
+    SERVICE_CACHE_STALE_TTL = float(environ.get('SERVICE_CACHE_STALE_TTL', 60))
+
+    # Maximum number of serialized movies kept by the JSON API.
+    API_JSON_CACHE_MAX_ENTRIES = int(environ.get('API_JSON_CACHE_MAX_ENTRIES', 4096))
+
+    # Number of processes that parse the movie data file at start-up. 1 parses it in the server process, which is
+    # fastest for small files.
+    CSV_LOADER_WORKERS = int(environ.get('CSV_LOADER_WORKERS', 1))
+
+    # 'eager' loads every movie field into memory at start-up. 'lazy' keeps the data file memory-mapped and reads
+    # descriptions and actors only when they are used, keeping up to CATALOG_DETAILS_CACHE_SIZE of them parsed.
+    # 'shared' maps a binary image of the catalog, built once at CATALOG_IMAGE, that all worker processes share, and
+    # keeps up to CATALOG_DETAILS_CACHE_SIZE movies built from it in each process.
+    CATALOG_MODE = environ.get('CATALOG_MODE', 'eager')
+    CATALOG_DETAILS_CACHE_SIZE = int(environ.get('CATALOG_DETAILS_CACHE_SIZE', 256))
+    CATALOG_IMAGE = environ.get('CATALOG_IMAGE')
+
+    # Repository implementation: 'memory' (default) keeps everything in memory; 'sqlite' stores users, reviews and
+    # watchlists in the SQLITE_DATABASE file, so they survive a restart.
+    REPOSITORY = environ.get('REPOSITORY', 'memory')
+    SQLITE_DATABASE = environ.get('SQLITE_DATABASE', 'cs235flix.db')
+
+    # Memory repository journal: directory for the journal and snapshots of users, reviews and watchlists (unset to
+    # keep them in memory only), seconds a commit waits to share its fsync with concurrent writes, and the number of
+    # journaled mutations after which a snapshot is written.
+    JOURNAL_DIR = environ.get('JOURNAL_DIR')
+    JOURNAL_COMMIT_DELAY = float(environ.get('JOURNAL_COMMIT_DELAY', 0.0))
+    JOURNAL_SNAPSHOT_EVERY = int(environ.get('JOURNAL_SNAPSHOT_EVERY', 1000))
+
+    # Seconds between checks of the movie data file, which reload the memory repository's catalog when it has changed
+    # (0: never check).
+    DATA_RELOAD_POLL_INTERVAL = float(environ.get('DATA_RELOAD_POLL_INTERVAL', 0))
+
+    # Cache warm-up at start-up: whether to request the most visited pages before serving (GET /ready answers 503
+    # until done), whether to do it in a background thread instead of delaying start-up, the number of threads
+    # making the requests, and the number of seconds after which the pages not yet requested are skipped.
+    WARMUP = environ.get('WARMUP', 'false').lower() == 'true'
+    WARMUP_IN_BACKGROUND = environ.get('WARMUP_IN_BACKGROUND', 'false').lower() == 'true'
+    WARMUP_THREADS = int(environ.get('WARMUP_THREADS', 4))
+    WARMUP_BUDGET = float(environ.get('WARMUP_BUDGET', 10))
+
+    # Password hashing: number of worker processes that hash passwords in each server process (0 hashes on the
+    # request thread), number of hashes that may wait for a worker before logins and registrations are turned away
+    # with a 503, and the PBKDF2 rounds of new hashes.
+    PASSWORD_HASH_WORKERS = int(environ.get('PASSWORD_HASH_WORKERS', 0))
+    PASSWORD_HASH_QUEUE_DEPTH = int(environ.get('PASSWORD_HASH_QUEUE_DEPTH', 16))
+    PASSWORD_HASH_ITERATIONS = int(environ.get('PASSWORD_HASH_ITERATIONS', 150000))
+
+    # Bearer token required by the /admin endpoints (unset: they are disabled).
+    ADMIN_TOKEN = environ.get('ADMIN_TOKEN')
+
+    # SQLite database file through which the worker processes of one server share users, reviews and watchlists made
+    # in the memory repository (unset: each process keeps its own).
+    REPLICATION_DATABASE = environ.get('REPLICATION_DATABASE')
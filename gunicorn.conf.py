@@ -0,0 +1,24 @@
+"""gunicorn settings for serving CS235Flix in production. Run from the CS235Flix directory:
+
+    gunicorn wsgi:app
+"""
+from config import Config
+from movie_app.web import prefork
+
+bind = Config.SERVER_BIND
+workers = Config.SERVER_WORKERS
+max_requests = Config.SERVER_MAX_REQUESTS
+max_requests_jitter = Config.SERVER_MAX_REQUESTS_JITTER
+
+# Load the app and its repository once, in the master process, so forked workers share its pages instead of each
+# parsing the data files.
+preload_app = True
+
+
+def on_starting(server):
+    # Refuse to fork workers that would split the users, reviews and watchlists between them.
+    prefork.check_workers(server.app.wsgi().config, server.cfg.workers)
+
+
+def post_fork(server, worker):
+    prefork.after_fork()
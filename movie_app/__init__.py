@@ -1,8 +1,56 @@
 """Initialize Flask app."""
+import atexit
 import os
 from flask import Flask
+import movie_app.adapters.reloader as reloader
+import movie_app.adapters.replication as replication
 import movie_app.adapters.repository as repo
+import movie_app.adapters.sqlite_repository as sqlite_repository
+import movie_app.api.services as api_services
+import movie_app.authentication.password_hashing as password_hashing
+import movie_app.caching.fragment_cache as fragment_cache
+import movie_app.caching.service_cache as service_cache
+import movie_app.caching.sqlite_cache as sqlite_cache
+import movie_app.caching.view_models as view_models
+import movie_app.statistics.view_counters as view_counters
+from movie_app.adapters.journal import Journal
 from movie_app.adapters.memory_repository import MemoryRepository, populate
+from movie_app.adapters.reloader import Reloader
+from movie_app.adapters.replication import Replicator
+from movie_app.adapters.sqlite_repository import SqliteRepository
+from movie_app.authentication.password_hashing import PasswordHasher
+from movie_app.caching.fragment_cache import FragmentCache
+from movie_app.caching.lru_cache import LRUCache
+from movie_app.caching.service_cache import ServiceCaches
+from movie_app.caching.sqlite_cache import SqliteCache
+from movie_app.caching.view_models import ViewModelCache
+from movie_app.statistics.view_counters import ViewCounters
+
+
+def forget_fragments_showing(rank: int, genre_names):
+    # Drops the cached fragments that show a movie added or reviewed, and the pages of the genres that list a new one.
+    fragment_cache.cache_instance.invalidate_movie(rank)
+    for genre_name in genre_names:
+        fragment_cache.cache_instance.invalidate_genre(genre_name)
+
+
+def make_service_caches(config) -> ServiceCaches:
+    backend = config.get('SERVICE_CACHE', 'memory')
+    max_entries = config.get('SERVICE_CACHE_MAX_ENTRIES', 1024)
+    fresh_for = config.get('SERVICE_CACHE_TTL', 300)
+    # Results are kept for SERVICE_CACHE_STALE_TTL seconds after they stop being fresh, to be returned while they
+    # are computed again.
+    ttl = fresh_for + config.get('SERVICE_CACHE_STALE_TTL', 60)
+    if backend == 'memory':
+        return ServiceCaches(lambda name: LRUCache(max_entries, ttl), fresh_for)
+    if backend == 'sqlite':
+        database = config['SERVICE_CACHE_DATABASE']
+        # Entries left by an earlier server are keyed on versions that this one may give to other data.
+        sqlite_cache.clear_database(database)
+        return ServiceCaches(lambda name: SqliteCache(database, name, max_entries, ttl), fresh_for)
+    if backend == 'none':
+        return None
+    raise ValueError(f"Unknown SERVICE_CACHE '{backend}'")
 
 
 def create_app(test_config=None):
@@ -19,9 +67,99 @@ def create_app(test_config=None):
         app.config.from_mapping(test_config)
         data_path = app.config['TEST_DATA_PATH']
 
-    # Create the MemoryRepository implementation for a memory-based repository.
-    repo.repo_instance = MemoryRepository()
-    populate(data_path, repo.repo_instance)
+    # Create the cache for rendered pages and movie fragments.
+    fragment_cache.cache_instance = FragmentCache(
+        max_entries=app.config.get('FRAGMENT_CACHE_MAX_ENTRIES', 2048),
+        ttl=app.config.get('FRAGMENT_CACHE_TTL', 300)
+    )
+
+    # Every repository write drops the cached fragments that show the movie it changes.
+    repo.movie_listener = forget_fragments_showing
+
+    if app.config.get('REPOSITORY', 'memory') == 'sqlite':
+        # Create the SqliteRepository implementation for a database-backed repository.
+        repo.repo_instance = SqliteRepository(app.config.get('SQLITE_DATABASE', ':memory:'))
+        sqlite_repository.populate(data_path, repo.repo_instance, workers=app.config.get('CSV_LOADER_WORKERS', 1))
+    else:
+        # Create the MemoryRepository implementation for a memory-based repository. With a journal, user data is
+        # recorded to disk and replayed on the next start.
+        journal = None
+        if app.config.get('JOURNAL_DIR') and app.config.get('REPLICATION_DATABASE'):
+            # Both would replay the same changes on every start, and the journal would record them again each time.
+            raise ValueError('JOURNAL_DIR cannot be used with REPLICATION_DATABASE, which keeps user data as well')
+        if app.config.get('JOURNAL_DIR'):
+            journal = Journal(
+                app.config['JOURNAL_DIR'],
+                commit_delay=app.config.get('JOURNAL_COMMIT_DELAY', 0.0),
+                snapshot_every=app.config.get('JOURNAL_SNAPSHOT_EVERY', 1000)
+            )
+            atexit.register(journal.close)
+        repo.repo_instance = MemoryRepository()
+        populate(
+            data_path, repo.repo_instance,
+            workers=app.config.get('CSV_LOADER_WORKERS', 1),
+            catalog_mode=app.config.get('CATALOG_MODE', 'eager'),
+            details_cache_size=app.config.get('CATALOG_DETAILS_CACHE_SIZE', 256),
+            journal=journal,
+            catalog_image=app.config.get('CATALOG_IMAGE')
+        )
+
+    if app.config.get('REPOSITORY', 'memory') != 'sqlite' and app.config.get('REPLICATION_DATABASE'):
+        # Share user data with the other worker processes, after catching up with what they already added.
+        replication.replicator_instance = Replicator(app.config['REPLICATION_DATABASE'])
+        repo.repo_instance.attach_replicator(replication.replicator_instance)
+        replication.init_app(
+            app, replication.replicator_instance, lambda: repo.repo_instance,
+            reload=lambda: reloader.reloader_instance.reload_in_background()
+        )
+        atexit.register(replication.replicator_instance.close)
+    else:
+        replication.replicator_instance = None
+
+    if app.config.get('REPOSITORY', 'memory') != 'sqlite':
+        # Reload the catalog on request, or when the data file changes. Fragments rendered from the old catalog are
+        # dropped; the other caches are keyed by movie versions, which a new repository never reuses.
+        reloader.reloader_instance = Reloader(
+            data_path,
+            load_options={
+                'workers': app.config.get('CSV_LOADER_WORKERS', 1),
+                'catalog_mode': app.config.get('CATALOG_MODE', 'eager'),
+                'details_cache_size': app.config.get('CATALOG_DETAILS_CACHE_SIZE', 256),
+                'catalog_image': app.config.get('CATALOG_IMAGE')
+            },
+            on_reload=lambda: fragment_cache.cache_instance.invalidate_all(),
+            poll_interval=app.config.get('DATA_RELOAD_POLL_INTERVAL', 0)
+        )
+        reloader.reloader_instance.start_watching()
+    else:
+        reloader.reloader_instance = None
+
+    # Create the cache for the read-only movie dicts shared by views.
+    view_models.cache_instance = ViewModelCache(max_entries=app.config.get('VIEW_MODEL_CACHE_MAX_ENTRIES', 4096))
+
+    # Create the cache for movies serialized by the JSON API.
+    api_services.json_cache_instance = LRUCache(max_entries=app.config.get('API_JSON_CACHE_MAX_ENTRIES', 4096))
+
+    # Create the caches for service function results.
+    service_cache.caches_instance = make_service_caches(app.config)
+
+    # Create the password hasher, which hashes in worker processes when PASSWORD_HASH_WORKERS is set.
+    password_hashing.hasher_instance = PasswordHasher(
+        workers=app.config.get('PASSWORD_HASH_WORKERS', 0),
+        queue_depth=app.config.get('PASSWORD_HASH_QUEUE_DEPTH', 16),
+        iterations=app.config.get('PASSWORD_HASH_ITERATIONS', 150000)
+    )
+    atexit.register(password_hashing.hasher_instance.close)
+
+    # Create the unique-viewer counters, merging in any snapshots left by this and sibling worker processes.
+    view_counters.counters_instance = ViewCounters(
+        snapshot_dir=app.config.get('VIEW_COUNTER_SNAPSHOT_DIR'),
+        snapshot_interval=app.config.get('VIEW_COUNTER_SNAPSHOT_INTERVAL', 60)
+    )
+    if app.config.get('VIEW_COUNTER_SNAPSHOT_DIR'):
+        view_counters.counters_instance.merge_snapshots()
+        view_counters.counters_instance.start_snapshotting()
+        atexit.register(view_counters.counters_instance.save_snapshot)
 
     # Build the application - these steps require an application context.
     with app.app_context():
@@ -37,4 +175,23 @@ def create_app(test_config=None):
 
         from .utilities import utilities
         app.register_blueprint(utilities.utilities_blueprint)
+
+        from .api import api
+        app.register_blueprint(api.api_blueprint)
+
+        from .export import export
+        app.register_blueprint(export.export_blueprint)
+
+        from .admin import admin
+        app.register_blueprint(admin.admin_blueprint)
+
+        # Compress responses, and serve fingerprinted, precompressed static files.
+        from .web import compression, pinning, static_assets
+        compression.init_app(app)
+        static_assets.init_app(app)
+        pinning.init_app(app)
+
+        # Warm the caches, if configured, last, so that the warm-up requests go through the whole app.
+        from .web import warmup
+        warmup.init_app(app)
     return app
@@ -0,0 +1,192 @@
+import glob
+import os
+import re
+import threading
+import time
+from typing import Callable, Iterator, List
+from movie_app.adapters import mutations
+
+
+SNAPSHOT_FILE = 'snapshot.ndjson'
+JOURNAL_FILE = re.compile(r'journal-(\d+)\.ndjson$')
+
+
+class Journal:
+    """ An append-only log of repository mutations, with snapshots that bound how much of it is replayed.
+
+    Mutations are appended to journal-<generation>.ndjson. A snapshot rewrites the whole user state into
+    snapshot.ndjson and starts a new generation, after which older journals are deleted. Recovery reads the
+    snapshot and then every journal from the snapshot's generation on, so it takes time proportional to the
+    state plus the mutations since the last snapshot, not to the whole history.
+
+    Appends use group commit. A writer that needs its record on disk either fsyncs the file for everyone
+    waiting, or waits for the fsync already in progress to finish and, if that did not cover its record,
+    leads the next one. One fsync therefore makes many concurrent writes durable.
+    """
+
+    def __init__(self, directory: str, commit_delay: float = 0.0, snapshot_every: int = 1000):
+        os.makedirs(directory, exist_ok=True)
+        self.__directory = directory
+        self.__commit_delay = commit_delay
+        self.__snapshot_every = snapshot_every
+        self.__lock = threading.RLock()
+        self.__synced_condition = threading.Condition(threading.Lock())
+        self.__file = None
+        self.__generation = 0
+        self.__written = 0
+        self.__synced = 0
+        self.__syncing = False
+        self.__since_snapshot = 0
+        self.__snapshotting = False
+
+    @property
+    def lock(self):
+        """ Held while a mutation is applied to the repository and appended, so the journal order is the
+        order in which mutations were applied, and a snapshot never sees a mutation without its record.
+        """
+        return self.__lock
+
+    @property
+    def generation(self) -> int:
+        return self.__generation
+
+    def recover(self) -> Iterator[dict]:
+        """ Yields the records of the latest snapshot and of every journal written since, in order, then opens the
+        newest journal for appending. A record cut short by a crash ends the journal and is removed.
+        """
+        snapshot_generation = 0
+        snapshot_path = os.path.join(self.__directory, SNAPSHOT_FILE)
+        if os.path.exists(snapshot_path):
+            with open(snapshot_path, 'rb') as snapshot:
+                header = mutations.decode(snapshot.readline())
+                snapshot_generation = header['generation']
+                for line in snapshot:
+                    yield mutations.decode(line)
+
+        generations = sorted(g for g in self.__journal_generations() if g >= snapshot_generation)
+        for generation in generations:
+            path = self.__journal_path(generation)
+            with open(path, 'rb') as journal:
+                good_length = 0
+                for line in journal:
+                    try:
+                        record = mutations.decode(line) if line.endswith(b'\n') else None
+                    except ValueError:
+                        record = None
+                    if record is None:
+                        break
+                    good_length += len(line)
+                    self.__since_snapshot += 1
+                    yield record
+            if good_length < os.path.getsize(path):
+                os.truncate(path, good_length)
+
+        self.__generation = max(generations + [snapshot_generation])
+        self.__file = open(self.__journal_path(self.__generation), 'ab')
+
+    def append(self, record: dict) -> int:
+        """ Writes record to the journal and returns its sequence number, to pass to wait_durable.
+        The caller must hold lock.
+        """
+        self.__file.write(mutations.encode(record))
+        self.__written += 1
+        self.__since_snapshot += 1
+        return self.__written
+
+    def wait_durable(self, sequence: int):
+        """ Returns once the record with sequence number sequence has been fsynced. """
+        with self.__synced_condition:
+            while self.__synced < sequence:
+                if self.__syncing:
+                    self.__synced_condition.wait()
+                    continue
+                self.__syncing = True
+                self.__synced_condition.release()
+                try:
+                    if self.__commit_delay > 0:
+                        # Give other writers a moment to add their records to this fsync.
+                        time.sleep(self.__commit_delay)
+                    synced = self.__sync()
+                finally:
+                    self.__synced_condition.acquire()
+                    self.__syncing = False
+                    self.__synced_condition.notify_all()
+                self.__synced = max(self.__synced, synced)
+
+    def __sync(self) -> int:
+        with self.__lock:
+            # Everything written so far is flushed together, and only then fsynced outside the lock. The descriptor
+            # is duplicated because a snapshot may close the journal file meanwhile (after fsyncing it itself).
+            written = self.__written
+            self.__file.flush()
+            descriptor = os.dup(self.__file.fileno())
+        try:
+            os.fsync(descriptor)
+        finally:
+            os.close(descriptor)
+        return written
+
+    def needs_snapshot(self) -> bool:
+        return self.__since_snapshot >= self.__snapshot_every and not self.__snapshotting
+
+    def snapshot(self, capture_state: Callable[[], List[dict]]):
+        """ Writes the state returned by capture_state to a new snapshot and deletes the journals it replaces.
+        capture_state is called with lock held and must return the records themselves, not a generator that reads
+        the state later; they are encoded and written after the lock is released, while new mutations go to the next
+        journal.
+        """
+        with self.__lock:
+            if self.__snapshotting:
+                return
+            self.__snapshotting = True
+            records = capture_state()
+            self.__file.flush()
+            os.fsync(self.__file.fileno())
+            self.__file.close()
+            self.__generation += 1
+            self.__file = open(self.__journal_path(self.__generation), 'ab')
+            self.__since_snapshot = 0
+            generation = self.__generation
+        try:
+            temporary_path = os.path.join(self.__directory, f'{SNAPSHOT_FILE}.{os.getpid()}.tmp')
+            with open(temporary_path, 'wb') as snapshot:
+                snapshot.write(mutations.encode({'generation': generation}))
+                for record in records:
+                    snapshot.write(mutations.encode(record))
+                snapshot.flush()
+                os.fsync(snapshot.fileno())
+            os.replace(temporary_path, os.path.join(self.__directory, SNAPSHOT_FILE))
+            self.__sync_directory()
+            for old_generation in self.__journal_generations():
+                if old_generation < generation:
+                    os.remove(self.__journal_path(old_generation))
+        finally:
+            self.__snapshotting = False
+
+    def close(self):
+        with self.__lock:
+            if self.__file is not None:
+                self.__file.flush()
+                os.fsync(self.__file.fileno())
+                self.__file.close()
+                self.__file = None
+
+    def __journal_path(self, generation: int) -> str:
+        return os.path.join(self.__directory, f'journal-{generation}.ndjson')
+
+    def __journal_generations(self):
+        for path in glob.glob(os.path.join(self.__directory, 'journal-*.ndjson')):
+            match = JOURNAL_FILE.search(path)
+            if match is not None:
+                yield int(match.group(1))
+
+    def __sync_directory(self):
+        # Makes the snapshot's new name durable. Not every platform can open a directory.
+        try:
+            directory = os.open(self.__directory, os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.fsync(directory)
+        finally:
+            os.close(directory)
@@ -0,0 +1,195 @@
+import csv
+import glob
+import io
+import mmap
+import os
+import shutil
+from array import array
+from typing import Iterator, List
+from movie_app.adapters.parallel_loader import column_map, number_or_none
+from movie_app.caching.lru_cache import LRUCache
+from movie_app.domain.model import Director, Genre, Actor, Movie, shared_entity
+
+
+class LazyCatalog:
+    """ A movie data file that stays on disk, memory-mapped, instead of being copied into Python objects.
+
+    Opening the catalog reads the file once to build an index of record byte offsets and the light movie fields
+    that listings need. Descriptions and actor lists are parsed again from the mapped file when they are first
+    used, and the most recently used are kept in a bounded LRU cache.
+
+    The data file may be rewritten in place before a reload, which would change the bytes at the recorded offsets
+    under a mapping, so a private copy of it that is never changed is mapped instead.
+    """
+
+    def __init__(self, file_name: str, cache_size: int = 256):
+        self.__file = _open_private_copy(file_name)
+        # An empty file cannot be mapped.
+        self.__data = mmap.mmap(self.__file.fileno(), 0, access=mmap.ACCESS_READ) \
+            if os.fstat(self.__file.fileno()).st_size > 0 else b''
+        self.__offsets = array('q')
+        self.__details = LRUCache(cache_size)
+        self.__directors = dict()
+        self.__genres = dict()
+        self.__actors = dict()
+        self.__movies = list()
+        self.__columns = None
+        self.__build_index()
+
+    @property
+    def movies(self) -> List[Movie]:
+        return self.__movies
+
+    @property
+    def directors(self) -> List[Director]:
+        return list(self.__directors.values())
+
+    @property
+    def genres(self) -> List[Genre]:
+        return list(self.__genres.values())
+
+    @property
+    def actors(self) -> List[Actor]:
+        return list(self.__actors.values())
+
+    def stats(self) -> dict:
+        return self.__details.stats()
+
+    def close(self):
+        if isinstance(self.__data, mmap.mmap):
+            self.__data.close()
+        self.__file.close()
+
+    def __build_index(self):
+        data = self.__data
+        position = 3 if data[:3] == b'\xef\xbb\xbf' else 0    # Skip a UTF-8 byte order mark.
+        if isinstance(data, mmap.mmap):
+            data.seek(position)
+        reader = csv.reader(self.__lines())
+        self.__columns = column_map(next(reader, []))
+
+        rank, title, genre, director, year, runtime, rating, votes, revenue, metascore = (
+            self.__columns[column] for column in
+            ('Rank', 'Title', 'Genre', 'Director', 'Year', 'Runtime (Minutes)', 'Rating', 'Votes', 'Revenue (Millions)',
+             'Metascore'))
+        actors = self.__columns['Actors']
+        start = data.tell()
+        for row in reader:
+            # csv.reader pulls one physical line at a time, so the file position is now the end of this record.
+            end = data.tell()
+            if len(row) > 0:
+                movie = LazyMovie(row[title], int(row[year].strip()), self, len(self.__movies))
+                movie.rank = int(row[rank].strip())
+                movie.genres = [shared_entity(self.__genres, Genre, g.strip()) for g in row[genre].split(',')]
+                movie.director = shared_entity(self.__directors, Director, row[director].strip())
+                movie.runtime_minutes = int(row[runtime].strip())
+                movie.rating = number_or_none(row[rating], float)
+                movie.votes = number_or_none(row[votes], int)
+                movie.revenue = number_or_none(row[revenue], float)
+                movie.metascore = number_or_none(row[metascore], int)
+                # Only the distinct actor names are kept, so every movie's actor list shares the same objects.
+                for name in row[actors].split(','):
+                    shared_entity(self.__actors, Actor, name.strip())
+                self.__offsets.append(start)
+                self.__offsets.append(end)
+                self.__movies.append(movie)
+            start = end
+
+    def __lines(self) -> Iterator[str]:
+        if not isinstance(self.__data, mmap.mmap):
+            return
+        while True:
+            line = self.__data.readline()
+            if len(line) == 0:
+                return
+            yield line.decode('utf-8')
+
+    def details(self, record: int) -> tuple:
+        """ Returns (description, actors) for the record'th movie of the file. """
+        details = self.__details.get(record)
+        if details is None:
+            start, end = self.__offsets[2 * record], self.__offsets[2 * record + 1]
+            text = self.__data[start:end].decode('utf-8')
+            row = next(csv.reader(io.StringIO(text, newline=None)))
+            details = (
+                row[self.__columns['Description']].strip(),
+                [shared_entity(self.__actors, Actor, name.strip()) for name in row[self.__columns['Actors']].split(',')]
+            )
+            self.__details.put(record, details)
+        return details
+
+
+class LazyMovie(Movie):
+    """ A Movie whose description and actors are read from its LazyCatalog when they are used.
+    Setting them, or adding or removing an actor, gives the LazyMovie its own copy, which is used from then on.
+    """
+
+    # Class attributes until set, so an unchanged LazyMovie holds no flags of its own.
+    __own_description = False
+    __own_actors = False
+
+    def __init__(self, title: str, year: int, catalog: LazyCatalog, record: int):
+        super().__init__(title, year)
+        self.__catalog = catalog
+        self.__record = record
+
+    @property
+    def description(self) -> str:
+        if self.__own_description:
+            return Movie.description.fget(self)
+        return self.__catalog.details(self.__record)[0]
+
+    @description.setter
+    def description(self, d):
+        Movie.description.fset(self, d)
+        self.__own_description = True
+
+    @property
+    def actors(self) -> list:
+        if self.__own_actors:
+            return Movie.actors.fget(self)
+        # A copy, so callers cannot change the actor list shared through the details cache.
+        return list(self.__catalog.details(self.__record)[1])
+
+    @actors.setter
+    def actors(self, a):
+        Movie.actors.fset(self, a)
+        self.__own_actors = True
+
+    def add_actor(self, a):
+        if not self.__own_actors:
+            self.actors = self.actors
+        super().add_actor(a)
+
+    def remove_actor(self, a):
+        if not self.__own_actors:
+            self.actors = self.actors
+        super().remove_actor(a)
+
+
+def _open_private_copy(file_name: str):
+    """ Opens a copy of file_name's current contents, named after its size and modification time, making it first if
+    no process has yet. The copy is written to a temporary file and renamed into place, so it is never seen partly
+    written, and copies of earlier contents are deleted; processes that still map one keep it until they close it.
+    """
+    while True:
+        stat = os.stat(file_name)
+        copy_path = f'{file_name}.{stat.st_size}-{stat.st_mtime_ns}.copy'
+        if not os.path.exists(copy_path):
+            temporary_path = f'{copy_path}.{os.getpid()}.tmp'
+            shutil.copyfile(file_name, temporary_path)
+            changed = os.stat(file_name)
+            if (changed.st_size, changed.st_mtime_ns) != (stat.st_size, stat.st_mtime_ns):
+                os.remove(temporary_path)   # The file was being rewritten; copy it again.
+                continue
+            os.replace(temporary_path, copy_path)
+            for old_copy in glob.glob(f'{glob.escape(file_name)}.*.copy'):
+                if old_copy != copy_path:
+                    try:
+                        os.remove(old_copy)
+                    except OSError:
+                        pass
+        try:
+            return open(copy_path, mode='rb')
+        except FileNotFoundError:
+            continue    # Deleted by a process that copied newer contents.
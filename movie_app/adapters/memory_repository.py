@@ -1,130 +1,449 @@
+import bisect
+import heapq
+import itertools
 import os
-from typing import List
+import threading
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from typing import Iterator, List, Tuple
 from werkzeug.security import generate_password_hash
-from movie_app.adapters.repository import AbstractRepository, RepositoryException
+from movie_app.adapters import mutations, parallel_loader
+from movie_app.adapters.journal import Journal
+from movie_app.adapters.lazy_catalog import LazyCatalog
+from movie_app.adapters.replication import Replicator
+from movie_app.adapters.shared_catalog import SharedCatalog
+from movie_app.adapters.repository import AbstractRepository, RepositoryException, REVIEW_ORDERS, next_version, \
+    notify_movie_changed
 from movie_app.domain.model import Director, Genre, Actor, Movie, MovieFileCSVReader, Review, User, WatchList
 
 
 class MemoryRepository(AbstractRepository):
+    """ A repository that keeps everything in memory, and is safe to share between the threads of a server.
+
+    Writes are serialized by a lock. Reads take no lock: every collection a reader can see is either replaced
+    rather than changed (copy-on-write), or only ever appended to and read up to a published length. Each write
+    publishes its change with a single assignment once the change is complete, so a reader sees a write in full or
+    not at all, and a list a reader has been given never changes under it.
+    """
 
     def __init__(self):
-        self._directors = list()
+        self._write_lock = threading.RLock()
+        # Looked up by name only; dict item assignment is atomic, so these need no copying.
+        self._directors = dict()
+        self._actors = dict()
+        # Copy-on-write.
         self._genres = list()
-        self._actors = list()
+        self._users = dict()
+        self._watchlists = dict()
+        self._reviews_by_movie = dict()
+        # Rank -> order -> sort keys of the movie's reviews, ascending, so each timeline is read from the end.
+        self._review_timelines = dict()
+        # Append-only, read up to the published length.
         self._movies = list()
+        self._movie_count = 0
         self._movies_index = dict()
+        # Genre name -> ranks of its movies, in the order they were added. The lists are only appended to.
+        self._movie_ranks_by_genre = dict()
         self._reviews = list()
-        self._users = list()
-        self._all_watchlist = list()
+        self._review_count = 0
+        self._version = 0
+        self._movie_versions = dict()
+        self._last_modified = datetime.utcnow().replace(microsecond=0)
+        self._journal = None
+        self._catalog_ranks = frozenset()
+        self._replicator = None
+        self._replaying = False
+        # A SharedCatalog, whose movies precede those in _movies, and the version they all share.
+        self._catalog = None
+        self._catalog_version = 0
+        # The repository that took over from this one, to which later mutations are forwarded.
+        self._successor = None
+
+    def attach_catalog(self, catalog: SharedCatalog):
+        """ Serves the movies of catalog, which are read from it when used rather than added one by one. """
+        with self._write():
+            self._catalog = catalog
+            self._genres = self._genres + catalog.genres
+            self._bump_version()
+            self._catalog_version = self._version
+
+    def mark_catalog_loaded(self):
+        """ Records that the movies added so far are the catalog, which is loaded from the data file rather than
+        kept with user data in snapshots, or handed over to a repository with a reloaded catalog.
+        """
+        self._catalog_ranks = frozenset(self._movies_index)
+
+    def attach_journal(self, journal: Journal) -> int:
+        """ Replays the mutations recorded by journal, then records every later mutation to it.
+        Returns the number of mutations replayed.
+        """
+        replayed = 0
+        for record in journal.recover():
+            mutations.apply(record, self)
+            replayed += 1
+        self._journal = journal
+        return replayed
+
+    def attach_replicator(self, replicator: Replicator) -> int:
+        """ Applies the changes other workers have shared through replicator, then shares every later mutation
+        through it. Returns the number of changes applied.
+        """
+        with self._write_lock:
+            self._replicator = replicator
+            return self.apply_replicated(replicator)
+
+    def apply_replicated(self, replicator: Replicator) -> int:
+        with self._write_lock:
+            # Mutations made by other workers are applied here, and must not be shared again.
+            self._replaying = True
+            try:
+                return replicator.apply_pending(lambda record: mutations.apply(record, self))
+            finally:
+                self._replaying = False
+
+    def hand_over(self, successor: 'MemoryRepository') -> int:
+        """ Makes successor, a repository loaded with a new catalog, take over from this one. Users, reviews,
+        watchlists and added movies are copied to it, the journal and replicator move to it, and later mutations of
+        this repository are forwarded to it, so requests still using this repository lose nothing.
+        Returns the number of mutations that could not be copied, such as reviews of movies no longer in the catalog.
+        """
+        with self._write_lock:
+            journal = self._journal
+            with journal.lock if journal is not None else nullcontext():
+                records = self._snapshot_records()
+            dropped = 0
+            with successor._write_lock:
+                for record in records:
+                    if record['op'] == 'add_movie' and successor.get_movie(record['rank']) is not None:
+                        continue    # The new catalog has the movie.
+                    try:
+                        mutations.apply(record, successor)
+                    except RepositoryException:
+                        dropped += 1
+                successor._journal, successor._replicator = self._journal, self._replicator
+            self._journal, self._replicator = None, None
+            self._successor = successor
+        return dropped
+
+    @contextmanager
+    def _write(self, to_record=None, *entities):
+        # With a journal, the mutation is applied and appended under the journal lock as well, so the journal
+        # replays mutations in the order they were applied. Waiting for the fsync happens outside both locks, where
+        # concurrent writers share one. A write of several entities is one mutation per entity, all journaled,
+        # replicated and made durable together.
+        with self._write_lock:
+            if self._successor is not None and to_record is not None:
+                # Made on the successor first, so a mutation it rejects is not made here either.
+                for entity in entities:
+                    mutations.apply(to_record(entity), self._successor)
+            journal = self._journal if to_record is not None else None
+            replicator = self._replicator if to_record is not None and not self._replaying else None
+            if journal is None and replicator is None:
+                yield
+                return
+            if replicator is not None:
+                # Holding the shared database's write lock, catch up with other workers before this mutation.
+                replicator.begin()
+            try:
+                if replicator is not None:
+                    self.apply_replicated(replicator)
+                with journal.lock if journal is not None else nullcontext():
+                    yield
+                    records = [to_record(entity) for entity in entities]
+                    sequence = None
+                    for record in records if journal is not None else ():
+                        sequence = journal.append(record)
+                if replicator is not None:
+                    replicator.commit(records)
+            except BaseException:
+                if replicator is not None:
+                    replicator.rollback()
+                raise
+        if sequence is not None:
+            journal.wait_durable(sequence)
+            if journal.needs_snapshot():
+                journal.snapshot(self._snapshot_records)
+
+    def _snapshot_records(self) -> List[dict]:
+        # Called with the journal lock held. The records are built now, so a mutation made once the lock is released
+        # goes to the next journal only, not to the snapshot as well; encoding them is left for outside the lock.
+        movies = [movie for movie in self._movies[:self._movie_count] if movie.rank not in self._catalog_ranks]
+        users = list(self._users.values())
+        reviews = self._reviews[:self._review_count]
+        all_watchlist = [watchlist for user_watchlists in self._watchlists.values() for watchlist in user_watchlists]
+        return list(itertools.chain(
+            (mutations.movie_record(movie) for movie in movies),
+            (mutations.user_record(user) for user in users),
+            (mutations.review_record(review) for review in reviews),
+            (mutations.watchlist_record(watchlist) for watchlist in all_watchlist)
+        ))
 
     def add_director(self, director: Director):
-        self._directors.append(director)
+        with self._write():
+            self._directors.setdefault(director.director_full_name, director)
 
     def get_director(self, director_name) -> Director:
-        return next(
-            (director for director in self._directors if director.director_full_name == director_name), None)
+        director = self._directors.get(director_name)
+        if director is None and self._catalog is not None:
+            director = self._catalog.director(director_name)
+        return director
 
     def add_genre(self, genre: Genre):
-        self._genres.append(genre)
+        with self._write():
+            self._genres = self._genres + [genre]
+            self._bump_version()
 
     def get_genres(self) -> List[Genre]:
         return self._genres
 
     def add_actor(self, actor: Actor):
-        self._actors.append(actor)
+        with self._write():
+            self._actors.setdefault(actor.actor_full_name, actor)
 
     def get_actor(self, actor_name) -> Actor:
-        return next((actor for actor in self._actors if actor.actor_full_name == actor_name), None)
+        actor = self._actors.get(actor_name)
+        if actor is None and self._catalog is not None:
+            actor = self._catalog.actor(actor_name)
+        return actor
 
     def add_movie(self, movie: Movie):
-        self._movies.append(movie)
-        self._movies_index[movie.rank] = movie
+        with self._write(mutations.movie_record, movie):
+            # A movie can be fetched by rank before it is listed, so every listed movie can be fetched.
+            self._movies_index[movie.rank] = movie
+            for genre in movie.genres:
+                self._movie_ranks_by_genre.setdefault(genre.genre_name, []).append(movie.rank)
+            self._movies.append(movie)
+            self._movie_count = len(self._movies)
+            self._bump_version(movie.rank, [genre.genre_name for genre in movie.genres])
 
     def get_movie(self, rank: int) -> Movie:
         movie = None
         try:
             movie = self._movies_index[rank]
         except KeyError:
-            pass  # Ignore exception and return None.
+            if self._catalog is not None:
+                movie = self._catalog.movie_by_rank(rank)
         return movie
 
     def get_number_of_movies(self):
-        return len(self._movies)
+        return self._catalog_size() + self._movie_count
 
     def get_first_movie(self) -> Movie:
         movie = None
-        if len(self._movies) > 0:
+        if self._catalog_size() > 0:
+            movie = self._catalog.movie(0)
+        elif self._movie_count > 0:
             movie = self._movies[0]
         return movie
 
     def get_last_movie(self) -> Movie:
         movie = None
-        if len(self._movies) > 0:
-            movie = self._movies[-1]
+        movie_count = self._movie_count
+        if movie_count > 0:
+            movie = self._movies[movie_count - 1]
+        elif self._catalog_size() > 0:
+            movie = self._catalog.movie(self._catalog_size() - 1)
         return movie
 
     def get_movies_by_rank(self, rank_list):
         # Strip out any ranks in rank_list that don't represent Movie ranks in the repository.
-        existing_ranks = [rank for rank in rank_list if rank in self._movies_index]
+        movies = [self.get_movie(rank) for rank in rank_list]
+        return [movie for movie in movies if movie is not None]
 
-        # Fetch the Movies.
-        movies = [self._movies_index[rank] for rank in existing_ranks]
+    def iter_movies(self) -> Iterator[Movie]:
+        movies = itertools.islice(self._movies, self._movie_count)
+        if self._catalog is not None:
+            movies = itertools.chain(self._catalog.iter_movies(), movies)
         return movies
 
-    def get_movie_ranks_for_genre(self, genre_name: str):
-        # Linear search, to find the first occurrence of a Genre with the name genre_name.
-        genre = next((genre for genre in self._genres if genre.genre_name == genre_name), None)
+    def _catalog_size(self) -> int:
+        return len(self._catalog) if self._catalog is not None else 0
 
-        # Retrieve the ranks of movies associated with the Genre.
-        if genre is not None:
-            movie_ranks = [movie.rank for movie in self._movies if genre in movie.genres]
-        else:
-            # No Genre with name genre_name. Return an empty list.
-            movie_ranks = list()
+    def get_movie_ranks_for_genre(self, genre_name: str):
+        # Copied, as movies added later append to the list. A catalog lists its own without building its movies.
+        movie_ranks = list(self._movie_ranks_by_genre.get(genre_name, ()))
+        if self._catalog is not None:
+            movie_ranks = self._catalog.movie_ranks_for_genre(genre_name) + movie_ranks
         return movie_ranks
 
     def add_review(self, review: Review):
         super().add_review(review)
-        self._reviews.append(review)
+        with self._write(mutations.review_record, review):
+            # Likewise, a review is in its movie's reviews before it is in the list of all reviews.
+            rank = review.movie.rank
+            movie_reviews = self._reviews_by_movie.get(rank, ())
+            self._reviews_by_movie[rank] = movie_reviews + (review,)
+            self._index_reviews(rank, [review], len(movie_reviews))
+            self._reviews.append(review)
+            self._review_count = len(self._reviews)
+            self._bump_version(rank)
+
+    def add_reviews(self, reviews: List[Review]):
+        for review in reviews:
+            AbstractRepository.add_review(self, review)
+        with self._write(mutations.review_record, *reviews):
+            reviews_by_movie = dict()
+            for review in reviews:
+                reviews_by_movie.setdefault(review.movie.rank, []).append(review)
+            for rank, added_reviews in reviews_by_movie.items():
+                movie_reviews = self._reviews_by_movie.get(rank, ())
+                self._reviews_by_movie[rank] = movie_reviews + tuple(added_reviews)
+                self._index_reviews(rank, added_reviews, len(movie_reviews))
+            self._reviews.extend(reviews)
+            self._review_count = len(self._reviews)
+            for rank in reviews_by_movie:
+                self._bump_version(rank)
+
+    def get_reviews_for_movie(self, rank: int) -> List[Review]:
+        return list(self._reviews_by_movie.get(rank, ()))
+
+    def get_number_of_reviews_for_movie(self, rank: int) -> int:
+        return len(self._reviews_by_movie.get(rank, ()))
+
+    def get_review_timeline(self, rank: int, order: str = 'newest', after: int = None,
+                            limit: int = 10) -> List[Tuple[int, Review]]:
+        if order not in REVIEW_ORDERS:
+            raise RepositoryException(f'Unknown review order {order}')
+        # Keys before reviews: a movie's reviews are published before its timelines, so every id in keys is found.
+        keys = self._review_timelines.get(rank, EMPTY_TIMELINES)[order]
+        reviews = self._reviews_by_movie.get(rank, ())
+        if after is None:
+            end = len(keys)
+        elif 0 <= after < len(reviews):
+            # The page ends just before the key of the review it follows, found by binary search.
+            end = bisect.bisect_left(keys, review_sort_keys(reviews[after], after)[order])
+        else:
+            return list()
+        return [(key[-1], reviews[key[-1]]) for key in reversed(keys[max(end - limit, 0):end])]
 
     def get_reviews(self):
-        return self._reviews
+        return self._reviews[:self._review_count]
+
+    def iter_reviews(self) -> Iterator[Review]:
+        return itertools.islice(self._reviews, self._review_count)
 
     def add_user(self, user: User):
-        self._users.append(user)
+        with self._write(mutations.user_record, user):
+            if user.user_name in self._users:
+                raise RepositoryException(f'User {user.user_name} already exists')
+            users = dict(self._users)
+            users[user.user_name] = user
+            self._users = users
 
     def get_user(self, username: str) -> User:
-        return next((user for user in self._users if user.user_name == username), None)
+        return self._users.get(username)
 
     def add_watchlist(self, watchlist: WatchList):
-        self._all_watchlist.append(watchlist)
+        with self._write(mutations.watchlist_record, watchlist):
+            username = watchlist.watchlist_owner.user_name
+            watchlists = dict(self._watchlists)
+            watchlists[username] = watchlists.get(username, ()) + (watchlist,)
+            self._watchlists = watchlists
 
     def get_watchlist(self, user: User) -> List[WatchList]:
-        all_watchlist = []
-        for watchlist in self._all_watchlist:
-            if watchlist.watchlist_owner == user:
-                all_watchlist.append(watchlist)
-        return all_watchlist
-
+        if not isinstance(user, User):
+            return list()
+        return list(self._watchlists.get(user.user_name, ()))
+
+    def get_version(self) -> int:
+        return self._version
+
+    def get_movie_version(self, rank: int) -> int:
+        return self._movie_versions.get(rank, self._catalog_version)
+
+    def get_last_modified(self) -> datetime:
+        return self._last_modified
+
+    def _index_reviews(self, rank: int, reviews: List[Review], first_id: int):
+        # Merges the reviews, whose ids are their positions in the movie's reviews, into copies of its timelines.
+        timelines = self._review_timelines.get(rank, EMPTY_TIMELINES)
+        added = [review_sort_keys(review, review_id) for review_id, review in enumerate(reviews, start=first_id)]
+        self._review_timelines[rank] = {
+            order: tuple(heapq.merge(timelines[order], sorted(keys[order] for keys in added)))
+            for order in REVIEW_ORDERS
+        }
+
+    def _bump_version(self, rank: int = None, genre_names: List[str] = ()):
+        # Versions only change after the data they describe, so a cache keyed by a version never holds stale data.
+        version = next_version()
+        if rank is not None:
+            self._movie_versions[rank] = version
+        self._version = version
+        self._last_modified = datetime.utcnow().replace(microsecond=0)
+        if rank is not None:
+            notify_movie_changed(rank, genre_names)
+
+
+EMPTY_TIMELINES = {order: () for order in REVIEW_ORDERS}
+
+
+def review_sort_keys(review: Review, review_id: int) -> dict:
+    # The id breaks ties, so keys are unique and a review's key bounds the page that follows it.
+    return {
+        'newest': (review.timestamp, review_id),
+        'top_rated': (review.rating or 0, review.timestamp, review_id)
+    }
+
+
+def load_data(data_path: str, repo: MemoryRepository, workers: int = 1, catalog_mode: str = 'eager',
+              details_cache_size: int = 256, catalog_image: str = None):
+    file_name = os.path.join(data_path, 'Data1000Movies.csv')
+    if catalog_mode == 'lazy':
+        load_lazy_catalog(file_name, repo, details_cache_size)
+    elif catalog_mode == 'shared':
+        # Movies stay in an image file that every worker process maps, built next to the data file by default.
+        repo.attach_catalog(SharedCatalog(file_name, catalog_image or f'{file_name}.catalog', details_cache_size))
+    elif catalog_mode == 'eager':
+        load_eager_catalog(file_name, repo, workers)
+    else:
+        raise RepositoryException(f'Unknown catalog mode: {catalog_mode}')
+    repo.mark_catalog_loaded()
+
+
+def load_eager_catalog(file_name: str, repo: MemoryRepository, workers: int = 1):
+    if workers > 1:
+        # Large catalogs are parsed in parallel, in chunks that split the file on record boundaries.
+        movies = parallel_loader.iter_movies_parallel(file_name, workers)
+    else:
+        movies = MovieFileCSVReader(file_name).iter_movies()
+
+    # Stream movies straight into the repository, adding each director, genre and actor the first time a movie
+    # refers to it, rather than building the reader's datasets first and copying them.
+    directors = set()
+    genres = set()
+    actors = set()
+    for movie in movies:
+        # load directors into repository.
+        if movie.director not in directors:
+            directors.add(movie.director)
+            repo.add_director(movie.director)
+
+        # load genres into repository.
+        for genre in movie.genres:
+            if genre not in genres:
+                genres.add(genre)
+                repo.add_genre(genre)
+
+        # load actors into repository.
+        for actor in movie.actors:
+            if actor not in actors:
+                actors.add(actor)
+                repo.add_actor(actor)
+
+        # load movies into repository.
+        repo.add_movie(movie)
 
-def load_data(data_path: str, repo: MemoryRepository):
-    all_data = MovieFileCSVReader(os.path.join(data_path, 'Data1000Movies.csv'))
-    all_data.read_csv_file()
 
-    # load directors into repository.
-    for director in all_data.dataset_of_directors:
+def load_lazy_catalog(file_name: str, repo: MemoryRepository, details_cache_size: int = 256):
+    # Movies keep only an index into the memory-mapped data file; descriptions and actors are read when used.
+    catalog = LazyCatalog(file_name, details_cache_size)
+    for director in catalog.directors:
         repo.add_director(director)
-
-    # load genres into repository.
-    for genre in all_data.dataset_of_genres:
+    for genre in catalog.genres:
         repo.add_genre(genre)
-
-    # load actors into repository.
-    for actor in all_data.dataset_of_actors:
+    for actor in catalog.actors:
         repo.add_actor(actor)
-
-    # load movies into repository.
-    for movie in all_data.dataset_of_movies:
+    for movie in catalog.movies:
         repo.add_movie(movie)
 
 
@@ -150,9 +469,15 @@ def load_watchlist(repo: MemoryRepository):
     repo.add_watchlist(watchlist)
 
 
-def populate(data_path: str, repo: MemoryRepository):
+def populate(data_path: str, repo: MemoryRepository, workers: int = 1, catalog_mode: str = 'eager',
+             details_cache_size: int = 256, journal: Journal = None, catalog_image: str = None):
     # Load directors, genres, actors and movies into the repository.
-    load_data(data_path, repo)
+    load_data(data_path, repo, workers, catalog_mode, details_cache_size, catalog_image)
+
+    # Replay the users, reviews and watchlists recorded before a restart. The defaults below are only loaded
+    # (and recorded) the first time the journal is used.
+    if journal is not None and repo.attach_journal(journal) > 0:
+        return
 
     # Load default review and user into the repository.
     load_review_and_user(repo)
@@ -0,0 +1,120 @@
+import json
+from datetime import datetime
+from movie_app.adapters.repository import AbstractRepository, RepositoryException
+from movie_app.domain.model import Director, Genre, Actor, Movie, Review, User, WatchList
+
+
+# Repository mutations are stored as one JSON object per line, whose 'op' names the repository method that made it.
+# The same records are read back to replay the mutations on another repository.
+
+def user_record(user: User) -> dict:
+    return {'op': 'add_user', 'username': user.user_name, 'password': user.password}
+
+
+def review_record(review: Review) -> dict:
+    return {
+        'op': 'add_review',
+        'movie_rank': review.movie.rank,
+        'review_text': review.review_text,
+        'rating': review.rating,
+        'timestamp': review.timestamp.isoformat()
+    }
+
+
+def watchlist_record(watchlist: WatchList) -> dict:
+    return {
+        'op': 'add_watchlist',
+        'username': watchlist.watchlist_owner.user_name,
+        'name': watchlist.watchlist_name,
+        'movie_ranks': [movie.rank for movie in watchlist.watchlist]
+    }
+
+
+def movie_record(movie: Movie) -> dict:
+    return {
+        'op': 'add_movie',
+        'rank': movie.rank,
+        'title': movie.title,
+        'release_year': movie.release_year,
+        'description': movie.description,
+        'director': movie.director.director_full_name,
+        'actors': [actor.actor_full_name for actor in movie.actors],
+        'genres': [genre.genre_name for genre in movie.genres],
+        'runtime_minutes': movie.runtime_minutes,
+        'rating': movie.rating,
+        'votes': movie.votes,
+        'revenue': movie.revenue,
+        'metascore': movie.metascore
+    }
+
+
+def movie_rank(record: dict):
+    """ Returns the rank of the movie that the mutation described by record changes, or None. """
+    if record['op'] == 'add_review':
+        return record['movie_rank']
+    if record['op'] == 'add_movie':
+        return record['rank']
+    return None
+
+
+def encode(record: dict) -> bytes:
+    return json.dumps(record, separators=(',', ':')).encode('utf-8') + b'\n'
+
+
+def decode(line: bytes) -> dict:
+    return json.loads(line)
+
+
+def apply(record: dict, repo: AbstractRepository):
+    """ Makes the mutation described by record on repo. """
+    op = record['op']
+    if op == 'add_user':
+        repo.add_user(User(record['username'], record['password']))
+    elif op == 'add_review':
+        review = Review(repo.get_movie(record['movie_rank']), record['review_text'], record['rating'],
+                        datetime.fromisoformat(record['timestamp']))
+        repo.add_review(review)
+    elif op == 'add_watchlist':
+        user = repo.get_user(record['username'])
+        if user is None:
+            raise RepositoryException(f'Unknown user {record["username"]}')
+        watchlist = WatchList(user, record['name'])
+        for movie in repo.get_movies_by_rank(record['movie_ranks']):
+            watchlist.add_movie(movie)
+        repo.add_watchlist(watchlist)
+    elif op == 'add_movie':
+        repo.add_movie(_movie_from_record(record, repo))
+    else:
+        raise RepositoryException(f'Unknown mutation {op}')
+
+
+def _movie_from_record(record: dict, repo: AbstractRepository) -> Movie:
+    # Movies refer to the repository's own Director, Genre and Actor objects, which are added if they are new.
+    movie = Movie(record['title'], 0 if record['release_year'] is None else record['release_year'])
+    movie.rank = record['rank']
+    movie.description = record['description']
+    movie.director = _repository_entity(repo.get_director, repo.add_director, Director, record['director'])
+    genres = {genre.genre_name: genre for genre in repo.get_genres()}
+    for name in record['genres']:
+        genre = genres.get(name)
+        if genre is None:
+            genre = Genre(name)
+            repo.add_genre(genre)
+        movie.add_genre(genre)
+    for name in record['actors']:
+        movie.add_actor(_repository_entity(repo.get_actor, repo.add_actor, Actor, name))
+    if record['runtime_minutes'] > 0:
+        movie.runtime_minutes = record['runtime_minutes']
+    movie.rating = record['rating']
+    movie.votes = record['votes']
+    movie.revenue = record['revenue']
+    movie.metascore = record['metascore']
+    return movie
+
+
+def _repository_entity(get, add, entity_class, name: str):
+    entity = get(name)
+    if entity is None:
+        entity = entity_class(name)
+        add(entity)
+    return entity
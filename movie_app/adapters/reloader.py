@@ -0,0 +1,114 @@
+import os
+import threading
+import time
+from datetime import datetime
+import movie_app.adapters.repository as repo
+from movie_app.adapters.memory_repository import MemoryRepository, load_data
+
+
+# Set by create_app for the memory repository.
+reloader_instance = None
+
+
+class Reloader:
+    """ Replaces the movie catalog of the running MemoryRepository when the movie data file changes.
+
+    A reload loads the data file into a new repository while the current one keeps serving requests, hands the
+    current repository's users, reviews and watchlists over to it, then swaps it into repo.repo_instance with a
+    single assignment. Requests already running keep the repository they started with (see web.pinning), and
+    mutations they make are forwarded to the new one. Reads never wait for a reload; writes wait only while user
+    data is copied.
+
+    Reloads are started explicitly, or by a thread that polls the data file's size and modification time.
+    """
+
+    def __init__(self, data_path: str, load_options: dict = None, on_reload=None, poll_interval: float = 0):
+        self.__file_name = os.path.join(data_path, 'Data1000Movies.csv')
+        self.__data_path = data_path
+        self.__load_options = dict() if load_options is None else load_options
+        self.__on_reload = on_reload
+        self.__poll_interval = poll_interval
+        self.__lock = threading.Lock()
+        self.__stopped = threading.Event()
+        self.__watcher = None
+        self.__signature = self.__file_signature()
+        self.__status = {
+            'reloading': False,
+            'reloads': 0,
+            'last_reload': None,
+            'last_duration': None,
+            'last_dropped': 0,
+            'last_error': None
+        }
+
+    def status(self) -> dict:
+        return dict(self.__status)
+
+    def reload(self) -> dict:
+        """ Reloads the data file now, waiting for a reload already in progress first, and returns the status. """
+        with self.__lock:
+            self.__status['reloading'] = True
+            start = time.perf_counter()
+            try:
+                signature = self.__file_signature()
+                successor = MemoryRepository()
+                load_data(self.__data_path, successor, **self.__load_options)
+                dropped = repo.repo_instance.hand_over(successor)
+                repo.repo_instance = successor
+                self.__signature = signature
+                if self.__on_reload is not None:
+                    self.__on_reload()
+            except Exception as exception:
+                self.__status['last_error'] = f'{type(exception).__name__}: {exception}'
+                raise
+            finally:
+                self.__status['reloading'] = False
+            self.__status.update(
+                reloads=self.__status['reloads'] + 1,
+                last_reload=datetime.utcnow().replace(microsecond=0).isoformat(),
+                last_duration=round(time.perf_counter() - start, 3),
+                last_dropped=dropped,
+                last_error=None
+            )
+            return self.status()
+
+    def reload_in_background(self) -> bool:
+        """ Starts a reload on another thread. Returns False, starting nothing, if one is already in progress. """
+        if self.__status['reloading'] or self.__lock.locked():
+            return False
+        threading.Thread(target=self.__reload_quietly, name='catalog-reload', daemon=True).start()
+        return True
+
+    def start_watching(self):
+        """ Reloads whenever the data file changes, checking every poll_interval seconds (0 never checks). """
+        if self.__poll_interval > 0 and (self.__watcher is None or not self.__watcher.is_alive()):
+            self.__stopped.clear()
+            self.__watcher = threading.Thread(target=self.__watch, name='catalog-watcher', daemon=True)
+            self.__watcher.start()
+
+    def stop_watching(self):
+        self.__stopped.set()
+
+    def after_fork(self):
+        """ Restarts the watcher in a forked process, which inherits no threads. """
+        self.__watcher = None
+        self.start_watching()
+
+    def __watch(self):
+        while not self.__stopped.wait(self.__poll_interval):
+            if self.__file_signature() != self.__signature:
+                self.__reload_quietly()
+
+    def __reload_quietly(self):
+        # The error is kept in the status; the current repository stays in service.
+        try:
+            self.reload()
+        except Exception:
+            pass
+
+    def __file_signature(self) -> tuple:
+        try:
+            stat = os.stat(self.__file_name)
+        except OSError:
+            return None
+        return stat.st_size, stat.st_mtime_ns
@@ -0,0 +1,176 @@
+import os
+import sqlite3
+import threading
+from typing import List
+from movie_app.adapters import mutations
+from movie_app.adapters.repository import RepositoryException
+
+
+# Set by create_app when REPLICATION_DATABASE is configured.
+replicator_instance = None
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS changes (
+    id INTEGER PRIMARY KEY,
+    record TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS reload_requests (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    generation INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO reload_requests (id, generation) VALUES (0, 0);
+'''
+
+
+class Replicator:
+    """ Shares repository mutations between the worker processes of one server, through a change table in an
+    SQLite database file that every worker opens.
+
+    The change table orders all mutations. A worker that makes a mutation takes the database write lock, first
+    applies every change other workers have committed, then applies its own and appends it to the table in the
+    same transaction, so every worker applies the same changes in the same order. Each worker remembers the id of
+    the last change it applied, and only ever applies changes after it, so each change is applied exactly once.
+
+    Reads stay in memory. A worker pulls new changes before handling a request, which costs one cheap query when
+    nothing has changed, so a request sees every mutation committed before it started, by any worker.
+
+    A catalog reload is shared the same way: a worker asked to reload bumps a generation number in the database,
+    and the other workers see it when they next pull.
+    """
+
+    def __init__(self, database: str):
+        self.__database = os.path.abspath(database)
+        self.__connection = self.__connect()
+        # Guards the connection, which every thread of the worker shares.
+        self.__lock = threading.RLock()
+        self.__last_applied = 0
+        self.__changed_ranks = []
+        self.__data_version = None
+        self.__in_transaction = False
+        self.__reload_generation = self.__read_reload_generation()
+        self.__reload_requested = False
+
+    def __connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.__database, isolation_level=None, check_same_thread=False)
+        connection.execute('PRAGMA busy_timeout = 10000')
+        connection.execute('PRAGMA journal_mode = WAL')
+        connection.executescript(SCHEMA)
+        return connection
+
+    def after_fork(self):
+        """ Opens a connection of this process's own in a forked process, leaving the parent's alone. """
+        self.__inherited_connection = self.__connection
+        self.__connection = self.__connect()
+        self.__lock = threading.RLock()
+        self.__data_version = None
+
+    @property
+    def last_applied(self) -> int:
+        return self.__last_applied
+
+    def has_changes(self) -> bool:
+        # PRAGMA data_version changes when another connection commits to the database, and reads no table.
+        with self.__lock:
+            data_version = self.__connection.execute('PRAGMA data_version').fetchone()[0]
+            changed = data_version != self.__data_version
+            self.__data_version = data_version
+            return changed
+
+    def pull(self, repo) -> List[int]:
+        """ Applies the changes committed by other workers since the last pull to repo, and returns the ranks of
+        the movies changed by them, including changes applied meanwhile by this worker's own writes.
+        """
+        if self.has_changes():
+            repo.apply_replicated(self)
+            generation = self.__read_reload_generation()
+            with self.__lock:
+                if generation > self.__reload_generation:
+                    self.__reload_generation = generation
+                    self.__reload_requested = True
+        with self.__lock:
+            ranks, self.__changed_ranks = self.__changed_ranks, []
+        return ranks
+
+    def request_reload(self):
+        """ Asks the other workers to reload the movie catalog when they next pull. """
+        # A connection of its own keeps the request out of a transaction that another thread may have open.
+        connection = self.__connect()
+        try:
+            connection.execute('BEGIN IMMEDIATE')
+            connection.execute('UPDATE reload_requests SET generation = generation + 1')
+            generation = connection.execute('SELECT generation FROM reload_requests').fetchone()[0]
+            connection.execute('COMMIT')
+        finally:
+            connection.close()
+        with self.__lock:
+            self.__reload_generation = max(self.__reload_generation, generation)
+
+    def take_reload_request(self) -> bool:
+        """ Returns whether another worker requested a reload since the last call. """
+        with self.__lock:
+            requested, self.__reload_requested = self.__reload_requested, False
+            return requested
+
+    def __read_reload_generation(self) -> int:
+        with self.__lock:
+            return self.__connection.execute('SELECT generation FROM reload_requests').fetchone()[0]
+
+    def apply_pending(self, apply) -> int:
+        """ Calls apply with each change committed since the last one applied, in order, and returns the number of
+        changes. Must be called with the repository's write lock held.
+        """
+        with self.__lock:
+            rows = self.__connection.execute(
+                'SELECT id, record FROM changes WHERE id > ? ORDER BY id', (self.__last_applied,)).fetchall()
+        for change_id, record in rows:
+            record = mutations.decode(record)
+            try:
+                apply(record)
+            except RepositoryException:
+                # Every worker fails the same change in the same way, e.g. a username taken by an earlier change,
+                # so skipping it keeps them consistent.
+                pass
+            self.__last_applied = change_id
+            rank = mutations.movie_rank(record)
+            if rank is not None:
+                with self.__lock:
+                    self.__changed_ranks.append(rank)
+        return len(rows)
+
+    def begin(self):
+        """ Takes the database write lock, so no other worker can commit a change until commit or rollback. """
+        with self.__lock:
+            self.__connection.execute('BEGIN IMMEDIATE')
+            self.__in_transaction = True
+
+    def commit(self, records: List[dict]):
+        """ Appends records, the changes made since begin, and commits them. """
+        with self.__lock:
+            for record in records:
+                cursor = self.__connection.execute('INSERT INTO changes (record) VALUES (?)',
+                                                   (mutations.encode(record).decode('utf-8'),))
+                self.__last_applied = cursor.lastrowid
+            self.__connection.execute('COMMIT')
+            self.__in_transaction = False
+
+    def rollback(self):
+        with self.__lock:
+            if self.__in_transaction:
+                self.__connection.execute('ROLLBACK')
+                self.__in_transaction = False
+
+    def close(self):
+        with self.__lock:
+            self.__connection.close()
+
+
+def init_app(app, replicator: Replicator, get_repository, reload=None):
+    """ Pulls changes from other workers before each request. They are applied through the repository's write
+    methods, so the caches that those keep current drop the movies they changed. When another worker has requested
+    a catalog reload, reload is called as well.
+    """
+    @app.before_request
+    def pull_changes():
+        replicator.pull(get_repository())
+        if replicator.take_reload_request() and reload is not None:
+            reload()
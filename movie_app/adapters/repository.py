@@ -1,10 +1,54 @@
 import abc
-from typing import List
+import itertools
+import os
+from datetime import datetime
+from typing import Iterable, Iterator, List, Tuple
 from movie_app.domain.model import Director, Genre, Actor, Movie, Review, User, WatchList
 
 
 repo_instance = None
 
+# Called as movie_listener(rank, genre_names) once a Movie added to any repository, or a Review of it, can be read;
+# genre_names are those of the Genres a new Movie is listed under. create_app sets it to drop the cached pages that
+# show the Movie, so every write path keeps them current.
+movie_listener = None
+
+# Versions are drawn from one process-wide sequence, so a version number is never reused, even by another
+# repository instance. Caches can therefore key entries on (rank, version) alone.
+_versions = itertools.count(1)
+
+
+def next_version() -> int:
+    return next(_versions)
+
+
+def reseed_versions():
+    """ Called in a forked worker process. Moves the rest of its version sequence to a random offset, so that
+    sibling workers, whose repositories diverge after the fork, never give the same version to different data, and
+    a cache that they share can still key entries on versions.
+    """
+    global _versions
+    _versions = itertools.count(next_version() + (int.from_bytes(os.urandom(8), 'big') >> 2))
+
+
+def advance_versions(past: int):
+    """ Makes next_version return numbers above past, a version that was read from a database rather than drawn
+    from this process's sequence, so this process does not give the number to other data.
+    """
+    global _versions
+    version = next_version()
+    if version <= past:
+        _versions = itertools.count(past + 1)
+
+
+# The orders of a movie's review timeline: newest first, or highest rated first (newest first among equal ratings).
+REVIEW_ORDERS = ('newest', 'top_rated')
+
+
+def notify_movie_changed(rank: int, genre_names: Iterable[str] = ()):
+    if movie_listener is not None:
+        movie_listener(rank, genre_names)
+
 
 class RepositoryException(Exception):
 
@@ -86,6 +130,13 @@ class AbstractRepository(abc.ABC):
         """
         raise NotImplementedError
 
+    @abc.abstractmethod
+    def iter_movies(self) -> Iterator[Movie]:
+        """ Returns an iterator over all Movies in the repository, yielding them one at a time
+        rather than building a list of them.
+        """
+        raise NotImplementedError
+
     @abc.abstractmethod
     def get_movie_ranks_for_genre(self, genre_name: str):
         """ Returns a list of ranks representing Movies that are categorised by genre_name.
@@ -103,11 +154,49 @@ class AbstractRepository(abc.ABC):
         if review.movie is None:
             raise RepositoryException('Review not correctly attached to a Movie')
 
+    def add_reviews(self, reviews: List[Review]):
+        """ Adds Reviews to the repository, all or none of them.
+        If a Review doesn't have links with a Movie, this method raises a RepositoryException and doesn't update
+        the repository.
+        """
+        for review in reviews:
+            AbstractRepository.add_review(self, review)
+        for review in reviews:
+            self.add_review(review)
+
+    @abc.abstractmethod
+    def get_reviews_for_movie(self, rank: int) -> List[Review]:
+        """ Returns the Reviews of the Movie with rank, oldest first.
+        If the Movie has no Reviews, this method returns an empty list.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_number_of_reviews_for_movie(self, rank: int) -> int:
+        """ Returns the number of Reviews of the Movie with rank. """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_review_timeline(self, rank: int, order: str = 'newest', after: int = None,
+                            limit: int = 10) -> List[Tuple[int, Review]]:
+        """ Returns up to limit Reviews of the Movie with rank, in order (one of REVIEW_ORDERS), as (id, Review)
+        pairs. The ids identify Reviews within their Movie; passing the last id of a page as after returns the
+        next page. If after identifies no Review of the Movie, this method returns an empty list.
+        """
+        raise NotImplementedError
+
     @abc.abstractmethod
     def get_reviews(self):
         """ Returns the Reviews stored in the repository. """
         raise NotImplementedError
 
+    @abc.abstractmethod
+    def iter_reviews(self) -> Iterator[Review]:
+        """ Returns an iterator over all Reviews in the repository, yielding them one at a time
+        rather than building a list of them.
+        """
+        raise NotImplementedError
+
     @abc.abstractmethod
     def add_user(self, user: User):
         """" Adds a User to the repository. """
@@ -131,3 +220,22 @@ class AbstractRepository(abc.ABC):
         If the User does not own any watchlist, this method returns an empty list.
         """
         raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_version(self) -> int:
+        """ Returns the repository version, a number that increases whenever a Movie, Genre or Review
+        is added to the repository.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_movie_version(self, rank: int) -> int:
+        """ Returns the version of the Movie with rank, a number that increases whenever the Movie is added
+        or reviewed. If there is no Movie with the given rank, this method returns 0.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_last_modified(self) -> datetime:
+        """ Returns the time (UTC, to the second) at which the repository version last increased. """
+        raise NotImplementedError
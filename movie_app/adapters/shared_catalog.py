@@ -0,0 +1,249 @@
+import json
+import math
+import mmap
+import os
+import struct
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List
+from movie_app.caching.lru_cache import LRUCache
+from movie_app.domain.model import Director, Genre, Actor, Movie, MovieFileCSVReader
+
+
+MAGIC = b'CS235CAT'
+FORMAT_VERSION = 1
+# Magic, then the byte length of the JSON table of contents that follows it.
+HEADER = struct.Struct('<8sQ')
+
+
+class SharedCatalog:
+    """ A movie catalog stored as flat arrays in a binary image file, which every worker process maps read-only.
+
+    The image holds one array per movie field, indexed by record number, with strings kept as offsets into byte
+    blobs. Mapped pages belong to the operating system's page cache, so every process that maps the image shares
+    one copy of it, however many workers there are; Python reference counting never writes to them. A process keeps
+    only the Genre objects and a bounded LRU cache of the Movie objects it has built from the image.
+
+    The image is built from the movie data file on first use and rebuilt when that file changes. Building writes a
+    temporary file and renames it into place, so concurrent workers never map a partial image.
+    """
+
+    def __init__(self, file_name: str, image_path: str, cache_size: int = 256):
+        if not _image_is_current(file_name, image_path):
+            # Built in a child process, so the pages of the objects built on the way are not left behind in this
+            # process, to be copied into every worker forked from it.
+            with ProcessPoolExecutor(max_workers=1) as executor:
+                executor.submit(build_image, file_name, image_path).result()
+        self.__file = open(image_path, mode='rb')
+        self.__data = mmap.mmap(self.__file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.__view = memoryview(self.__data)
+        length = HEADER.unpack_from(self.__data)[1]
+        contents = json.loads(bytes(self.__data[HEADER.size:HEADER.size + length]))
+        self.__sections = {
+            name: self.__view[offset:offset + count * array(typecode).itemsize].cast(typecode)
+            for name, (typecode, offset, count) in contents['sections'].items()
+        }
+        self.__movies = LRUCache(cache_size)
+        self.__genres = [Genre(self.__string('genre', i)) for i in range(len(self.__sections['genre_start']) - 1)]
+
+    def __len__(self):
+        return len(self.__sections['rank'])
+
+    @property
+    def genres(self) -> List[Genre]:
+        return self.__genres
+
+    def stats(self) -> dict:
+        return self.__movies.stats()
+
+    def close(self):
+        # The mapping cannot be closed while any view of it is still alive.
+        for section in self.__sections.values():
+            section.release()
+        self.__sections = dict()
+        self.__view.release()
+        self.__data.close()
+        self.__file.close()
+
+    def movie(self, record: int) -> Movie:
+        """ Returns the record'th movie of the catalog. """
+        movie = self.__movies.get(record)
+        if movie is None:
+            movie = self.__build_movie(record)
+            self.__movies.put(record, movie)
+        return movie
+
+    def movie_by_rank(self, rank: int) -> Movie:
+        record = self.__find('rank_order', lambda r: self.__sections['rank'][r], rank)
+        return self.movie(record) if record is not None else None
+
+    def iter_movies(self) -> Iterator[Movie]:
+        for record in range(len(self)):
+            yield self.movie(record)
+
+    def movie_ranks_for_genre(self, genre_name: str) -> List[int]:
+        genre = next((i for i, genre in enumerate(self.__genres) if genre.genre_name == genre_name), None)
+        if genre is None:
+            return list()
+        start, end = self.__sections['genre_movies_start'][genre:genre + 2]
+        return self.__sections['genre_movies'][start:end].tolist()
+
+    def director(self, name: str) -> Director:
+        director = self.__find('director_order', lambda i: self.__string('director', i), name)
+        return Director(name) if director is not None else None
+
+    def actor(self, name: str) -> Actor:
+        actor = self.__find('actor_order', lambda i: self.__string('actor', i), name)
+        return Actor(name) if actor is not None else None
+
+    def __build_movie(self, record: int) -> Movie:
+        sections = self.__sections
+        movie = Movie(self.__string('title', record), sections['year'][record])
+        movie.rank = sections['rank'][record]
+        movie.description = self.__string('description', record)
+        movie.director = Director(self.__string('director', sections['director'][record]))
+        start, end = sections['genre_ids_start'][record:record + 2]
+        movie.genres = [self.__genres[i] for i in sections['genre_ids'][start:end]]
+        start, end = sections['actor_ids_start'][record:record + 2]
+        movie.actors = [Actor(self.__string('actor', i)) for i in sections['actor_ids'][start:end]]
+        if sections['runtime'][record] > 0:
+            movie.runtime_minutes = sections['runtime'][record]
+        movie.rating = _float_or_none(sections['rating'][record])
+        movie.votes = _int_or_none(sections['votes'][record])
+        movie.revenue = _float_or_none(sections['revenue'][record])
+        movie.metascore = _int_or_none(sections['metascore'][record])
+        return movie
+
+    def __string(self, table: str, i: int) -> str:
+        start, end = self.__sections[f'{table}_start'][i:i + 2]
+        return str(self.__sections[f'{table}_bytes'][start:end], 'utf-8')
+
+    def __find(self, order: str, key, value):
+        # Binary search of a permutation array that lists records in order of key.
+        order = self.__sections[order]
+        low, high = 0, len(order)
+        while low < high:
+            middle = (low + high) // 2
+            if key(order[middle]) < value:
+                low = middle + 1
+            else:
+                high = middle
+        if low < len(order) and key(order[low]) == value:
+            return order[low]
+        return None
+
+
+def build_image(file_name: str, image_path: str):
+    """ Writes the catalog image of the movie data file file_name to image_path. """
+    sections = {name: array('q') for name in (
+        'rank', 'year', 'runtime', 'votes', 'metascore', 'director', 'genre_ids_start', 'genre_ids',
+        'actor_ids_start', 'actor_ids', 'title_start', 'description_start')}
+    sections['rating'] = array('d')
+    sections['revenue'] = array('d')
+    titles = bytearray()
+    descriptions = bytearray()
+    tables = {'director': dict(), 'genre': dict(), 'actor': dict()}
+    genre_movies = dict()
+    sections['genre_ids_start'].append(0)
+    sections['actor_ids_start'].append(0)
+    sections['title_start'].append(0)
+    sections['description_start'].append(0)
+
+    for movie in MovieFileCSVReader(file_name).iter_movies():
+        sections['rank'].append(movie.rank)
+        sections['year'].append(0 if movie.release_year is None else movie.release_year)
+        sections['runtime'].append(movie.runtime_minutes)
+        sections['votes'].append(-1 if movie.votes is None else movie.votes)
+        sections['metascore'].append(-1 if movie.metascore is None else movie.metascore)
+        sections['rating'].append(math.nan if movie.rating is None else movie.rating)
+        sections['revenue'].append(math.nan if movie.revenue is None else movie.revenue)
+        sections['director'].append(_name_id(tables['director'], movie.director.director_full_name))
+        for genre in movie.genres:
+            genre_id = _name_id(tables['genre'], genre.genre_name)
+            sections['genre_ids'].append(genre_id)
+            genre_movies.setdefault(genre_id, array('q')).append(movie.rank)
+        sections['genre_ids_start'].append(len(sections['genre_ids']))
+        sections['actor_ids'].extend(_name_id(tables['actor'], actor.actor_full_name) for actor in movie.actors)
+        sections['actor_ids_start'].append(len(sections['actor_ids']))
+        titles += (movie.title or '').encode('utf-8')
+        sections['title_start'].append(len(titles))
+        descriptions += movie.description.encode('utf-8')
+        sections['description_start'].append(len(descriptions))
+
+    sections['title_bytes'] = array('B', titles)
+    sections['description_bytes'] = array('B', descriptions)
+    sections['rank_order'] = array('q', sorted(range(len(sections['rank'])), key=sections['rank'].__getitem__))
+    for table, ids in tables.items():
+        names = list(ids)
+        encoded = [name.encode('utf-8') for name in names]
+        sections[f'{table}_start'] = array('q', _offsets(len(name) for name in encoded))
+        sections[f'{table}_bytes'] = array('B', b''.join(encoded))
+        sections[f'{table}_order'] = array('q', sorted(range(len(names)), key=names.__getitem__))
+    sections['genre_movies_start'] = array('q', _offsets(
+        len(genre_movies[i]) for i in range(len(tables['genre']))))
+    sections['genre_movies'] = array('q')
+    for i in range(len(tables['genre'])):
+        sections['genre_movies'].extend(genre_movies[i])
+
+    _write_image(file_name, image_path, sections)
+
+
+def _write_image(file_name: str, image_path: str, sections: dict):
+    # Sections are laid out after the table of contents, each aligned to 8 bytes so it can be cast in place.
+    source = os.stat(file_name)
+    contents = {'version': FORMAT_VERSION, 'source_size': source.st_size, 'source_mtime': source.st_mtime_ns}
+    # The table of contents holds the offsets of the sections, which depend on its own length: reserve room for it.
+    layout = {name: [section.typecode, 0, len(section)] for name, section in sections.items()}
+    reserved = len(json.dumps(dict(contents, sections=layout))) + 32 * len(sections)
+    offset = _aligned(HEADER.size + reserved)
+    for name, section in sections.items():
+        layout[name][1] = offset
+        offset = _aligned(offset + len(section) * section.itemsize)
+    encoded_contents = json.dumps(dict(contents, sections=layout)).encode('utf-8')
+
+    temporary_path = f'{image_path}.{os.getpid()}.tmp'
+    with open(temporary_path, 'wb') as image:
+        image.write(HEADER.pack(MAGIC, len(encoded_contents)))
+        image.write(encoded_contents)
+        for name, section in sections.items():
+            image.seek(layout[name][1])
+            section.tofile(image)
+        image.truncate(max(offset, image.tell()))
+    os.replace(temporary_path, image_path)
+
+
+def _image_is_current(file_name: str, image_path: str) -> bool:
+    try:
+        with open(image_path, 'rb') as image:
+            magic, length = HEADER.unpack(image.read(HEADER.size))
+            contents = json.loads(image.read(length)) if magic == MAGIC else None
+    except (OSError, ValueError, struct.error):
+        return False
+    source = os.stat(file_name)
+    return (contents is not None and contents['version'] == FORMAT_VERSION and
+            contents['source_size'] == source.st_size and contents['source_mtime'] == source.st_mtime_ns)
+
+
+def _name_id(ids: dict, name: str) -> int:
+    return ids.setdefault(name, len(ids))
+
+
+def _offsets(lengths) -> Iterator[int]:
+    # Offsets of consecutive strings, starting with 0.
+    total = 0
+    yield total
+    for length in lengths:
+        total += length
+        yield total
+
+
+def _aligned(offset: int) -> int:
+    return (offset + 7) // 8 * 8
+
+
+def _float_or_none(value: float) -> float:
+    return None if math.isnan(value) else value
+
+
+def _int_or_none(value: int) -> int:
+    return None if value < 0 else value
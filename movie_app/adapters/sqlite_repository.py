@@ -0,0 +1,595 @@
+import os
+import queue
+import sqlite3
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Iterable, Iterator, List, Tuple
+from werkzeug.security import generate_password_hash
+from movie_app.adapters import parallel_loader
+from movie_app.adapters.repository import AbstractRepository, RepositoryException, REVIEW_ORDERS, next_version, \
+    advance_versions, notify_movie_changed
+from movie_app.domain.model import Director, Genre, Actor, Movie, MovieFileCSVReader, Review, User, WatchList, \
+    shared_entity
+
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS directors (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS genres (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS actors (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS movies (
+    rank INTEGER PRIMARY KEY,
+    title TEXT,
+    release_year INTEGER,
+    description TEXT NOT NULL,
+    director_id INTEGER NOT NULL REFERENCES directors (id),
+    runtime_minutes INTEGER NOT NULL,
+    rating REAL,
+    votes INTEGER,
+    revenue REAL,
+    metascore INTEGER
+);
+CREATE INDEX IF NOT EXISTS movies_by_director ON movies (director_id);
+CREATE TABLE IF NOT EXISTS movie_genres (
+    movie_rank INTEGER NOT NULL REFERENCES movies (rank),
+    position INTEGER NOT NULL,
+    genre_id INTEGER NOT NULL REFERENCES genres (id),
+    PRIMARY KEY (movie_rank, position)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS movie_genres_by_genre ON movie_genres (genre_id, movie_rank);
+CREATE TABLE IF NOT EXISTS movie_actors (
+    movie_rank INTEGER NOT NULL REFERENCES movies (rank),
+    position INTEGER NOT NULL,
+    actor_id INTEGER NOT NULL REFERENCES actors (id),
+    PRIMARY KEY (movie_rank, position)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS movie_actors_by_actor ON movie_actors (actor_id, movie_rank);
+CREATE TABLE IF NOT EXISTS reviews (
+    id INTEGER PRIMARY KEY,
+    movie_rank INTEGER NOT NULL REFERENCES movies (rank),
+    review_text TEXT,
+    rating INTEGER,
+    timestamp TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS reviews_by_movie ON reviews (movie_rank, id);
+CREATE INDEX IF NOT EXISTS reviews_by_movie_newest ON reviews (movie_rank, timestamp, id);
+CREATE INDEX IF NOT EXISTS reviews_by_movie_top_rated ON reviews (movie_rank, rating, timestamp, id);
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY,
+    username TEXT NOT NULL UNIQUE,
+    password TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS watchlists (
+    id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users (id),
+    name TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS watchlists_by_user ON watchlists (user_id);
+CREATE TABLE IF NOT EXISTS watchlist_movies (
+    watchlist_id INTEGER NOT NULL REFERENCES watchlists (id),
+    position INTEGER NOT NULL,
+    movie_rank INTEGER NOT NULL REFERENCES movies (rank),
+    PRIMARY KEY (watchlist_id, position)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS versions (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    version INTEGER NOT NULL,
+    last_modified TEXT NOT NULL
+);
+INSERT OR IGNORE INTO versions (id, version, last_modified) VALUES (0, 0, strftime('%Y-%m-%dT%H:%M:%S', 'now'));
+CREATE TABLE IF NOT EXISTS movie_versions (
+    movie_rank INTEGER PRIMARY KEY REFERENCES movies (rank),
+    version INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS movie_versions_by_version ON movie_versions (version);
+'''
+
+# Statements are module constants, so each pooled connection prepares them once and reuses them from its
+# statement cache.
+INSERT_DIRECTOR = 'INSERT OR IGNORE INTO directors (name) VALUES (?)'
+INSERT_GENRE = 'INSERT OR IGNORE INTO genres (name) VALUES (?)'
+INSERT_ACTOR = 'INSERT OR IGNORE INTO actors (name) VALUES (?)'
+INSERT_MOVIE = '''
+INSERT INTO movies (rank, title, release_year, description, director_id, runtime_minutes, rating, votes, revenue,
+                    metascore)
+SELECT ?, ?, ?, ?, id, ?, ?, ?, ?, ? FROM directors WHERE name = ?
+'''
+INSERT_MOVIE_GENRE = 'INSERT INTO movie_genres (movie_rank, position, genre_id) SELECT ?, ?, id FROM genres WHERE name = ?'
+INSERT_MOVIE_ACTOR = 'INSERT INTO movie_actors (movie_rank, position, actor_id) SELECT ?, ?, id FROM actors WHERE name = ?'
+INSERT_REVIEW = 'INSERT INTO reviews (movie_rank, review_text, rating, timestamp) VALUES (?, ?, ?, ?)'
+INSERT_USER = 'INSERT INTO users (username, password) VALUES (?, ?)'
+INSERT_WATCHLIST = 'INSERT INTO watchlists (user_id, name) SELECT id, ? FROM users WHERE username = ?'
+INSERT_WATCHLIST_MOVIE = 'INSERT INTO watchlist_movies (watchlist_id, position, movie_rank) VALUES (?, ?, ?)'
+
+SELECT_MOVIE_COLUMNS = '''
+SELECT rank, title, release_year, description, directors.name, runtime_minutes, rating, votes, revenue, metascore
+FROM movies JOIN directors ON directors.id = movies.director_id
+'''
+SELECT_REVIEW_COLUMNS = 'SELECT id, movie_rank, review_text, rating, timestamp FROM reviews'
+
+# The pages of each review order. A page after a review compares row values with that review's, so it is read
+# straight from the order's index.
+SELECT_REVIEW_TIMELINE = {
+    'newest': f'{SELECT_REVIEW_COLUMNS} WHERE movie_rank = ? ORDER BY timestamp DESC, id DESC LIMIT ?',
+    'top_rated': f'{SELECT_REVIEW_COLUMNS} WHERE movie_rank = ? ORDER BY rating DESC, timestamp DESC, id DESC LIMIT ?'
+}
+SELECT_REVIEW_TIMELINE_AFTER = {
+    'newest': f'{SELECT_REVIEW_COLUMNS} WHERE movie_rank = ? '
+              'AND (timestamp, id) < (SELECT timestamp, id FROM reviews WHERE id = ? AND movie_rank = ?) '
+              'ORDER BY timestamp DESC, id DESC LIMIT ?',
+    'top_rated': f'{SELECT_REVIEW_COLUMNS} WHERE movie_rank = ? '
+                 'AND (rating, timestamp, id) < '
+                 '(SELECT rating, timestamp, id FROM reviews WHERE id = ? AND movie_rank = ?) '
+                 'ORDER BY rating DESC, timestamp DESC, id DESC LIMIT ?'
+}
+
+# SQLite limits the number of parameters in one statement, so rank lists are looked up in batches of this size.
+BATCH_SIZE = 500
+
+
+class SqliteRepository(AbstractRepository):
+    """ A repository stored in an SQLite database file, so users, reviews and watchlists outlive the process.
+
+    Each thread borrows a connection from a pool for the length of one repository call, so connections are
+    reused across requests without ever being used by two threads at once. File databases use write-ahead
+    logging, which lets readers carry on while a write is in progress.
+
+    Versions are kept in the database, and every write to a movie or genre gives them a new one in its own
+    transaction, so every process and repository that shares the file sees the same versions. Each repository keeps
+    a copy of the versions and movie ranks, which it brings up to date when PRAGMA data_version shows that the
+    database has changed.
+    """
+
+    def __init__(self, database: str = ':memory:', pool_size: int = 8):
+        if database == ':memory:':
+            # Every pooled connection has to see the same database, which a plain in-memory database does not allow.
+            self.__database = f'file:cs235flix-{uuid.uuid4().hex}?mode=memory&cache=shared'
+        else:
+            self.__database = f'file:{os.path.abspath(database)}'
+        self.__pool = queue.LifoQueue(maxsize=pool_size)
+        self.__directors = dict()
+        self.__genres = dict()
+        self.__actors = dict()
+        # A connection of its own for PRAGMA data_version, which only reports commits made by other connections.
+        self.__watcher = None
+        self.__sync_lock = threading.Lock()
+        self.__data_version = None
+        self.__version = 0
+        self.__movie_versions = dict()
+        self.__ranks = frozenset()
+        self.__last_modified = None
+        with self.__connection() as connection:
+            connection.executescript(SCHEMA)
+        with self.__transaction() as connection:
+            # Movies stored before versions were kept in the database start at the same version.
+            if connection.execute('SELECT 1 FROM movies WHERE rank NOT IN (SELECT movie_rank FROM movie_versions) '
+                                  'LIMIT 1').fetchone() is not None:
+                version = self.__new_version(connection)
+                connection.execute('INSERT INTO movie_versions (movie_rank, version) SELECT rank, ? FROM movies '
+                                   'WHERE rank NOT IN (SELECT movie_rank FROM movie_versions)', (version,))
+        self.__sync(notify=False)
+
+    def __connect(self) -> sqlite3.Connection:
+        # Transactions are started explicitly, so isolation_level None leaves single statements in autocommit.
+        connection = sqlite3.connect(self.__database, uri=True, isolation_level=None, check_same_thread=False,
+                                     cached_statements=64)
+        connection.execute('PRAGMA foreign_keys = ON')
+        connection.execute('PRAGMA busy_timeout = 5000')
+        if 'mode=memory' not in self.__database:
+            connection.execute('PRAGMA journal_mode = WAL')
+            connection.execute('PRAGMA synchronous = NORMAL')
+        return connection
+
+    @contextmanager
+    def __connection(self):
+        try:
+            connection = self.__pool.get_nowait()
+        except queue.Empty:
+            connection = self.__connect()
+        try:
+            yield connection
+        finally:
+            try:
+                self.__pool.put_nowait(connection)
+            except queue.Full:
+                connection.close()
+
+    @contextmanager
+    def __transaction(self):
+        # BEGIN IMMEDIATE takes the write lock up front, so two writers cannot deadlock upgrading read locks.
+        with self.__connection() as connection:
+            connection.execute('BEGIN IMMEDIATE')
+            try:
+                yield connection
+            except BaseException:
+                connection.execute('ROLLBACK')
+                raise
+            connection.execute('COMMIT')
+
+    def after_fork(self):
+        """ Stops using the connections inherited from the parent of a forked process, without closing them under
+        it, so the pool opens new ones.
+        """
+        self.__inherited_pool = self.__pool
+        self.__pool = queue.LifoQueue(maxsize=self.__pool.maxsize)
+        self.__inherited_watcher = self.__watcher
+        self.__watcher = None
+        self.__sync_lock = threading.Lock()
+
+    def close(self):
+        if self.__watcher is not None:
+            self.__watcher.close()
+            self.__watcher = None
+        while True:
+            try:
+                self.__pool.get_nowait().close()
+            except queue.Empty:
+                return
+
+    def __new_version(self, connection) -> int:
+        # Called in a write transaction. Versions in the database only increase, so a repository finds the movies
+        # changed since the version it last read, and are beyond this process's own sequence, so they are not reused.
+        current, = connection.execute('SELECT version FROM versions WHERE id = 0').fetchone()
+        version = max(current + 1, next_version())
+        connection.execute('UPDATE versions SET version = ?, last_modified = ? WHERE id = 0',
+                           (version, datetime.utcnow().replace(microsecond=0).isoformat()))
+        return version
+
+    def __bump_versions(self, connection, ranks: Iterable[int]):
+        version = self.__new_version(connection)
+        connection.executemany('INSERT OR REPLACE INTO movie_versions (movie_rank, version) VALUES (?, ?)',
+                               ((rank, version) for rank in ranks))
+
+    def __sync(self, force: bool = False, notify: bool = True):
+        # Reads the versions written since the last sync, by this repository or any other on the same database.
+        with self.__sync_lock:
+            if self.__watcher is None:
+                self.__watcher = self.__connect()
+            data_version, = self.__watcher.execute('PRAGMA data_version').fetchone()
+            if data_version == self.__data_version and not force:
+                return
+            self.__data_version = data_version
+            self.__watcher.execute('BEGIN')
+            try:
+                version, last_modified = self.__watcher.execute(
+                    'SELECT version, last_modified FROM versions WHERE id = 0').fetchone()
+                if version == self.__version:
+                    return
+                changed = self.__watcher.execute('SELECT movie_rank, version FROM movie_versions WHERE version > ?',
+                                                 (self.__version,)).fetchall()
+                new_ranks = [rank for rank, _ in changed if rank not in self.__ranks]
+                genre_names = self.__genre_names(self.__watcher, new_ranks) if notify else dict()
+            finally:
+                self.__watcher.execute('COMMIT')
+            # Movies are listed only once their versions are, so every listed movie has a version.
+            self.__movie_versions.update(changed)
+            self.__ranks = self.__ranks.union(new_ranks)
+            self.__last_modified = datetime.fromisoformat(last_modified)
+            self.__version = version
+            advance_versions(version)
+        if notify:
+            for rank, _ in changed:
+                notify_movie_changed(rank, genre_names.get(rank, ()))
+
+    @staticmethod
+    def __genre_names(connection, ranks: List[int]) -> dict:
+        genre_names = dict()
+        for start in range(0, len(ranks), BATCH_SIZE):
+            batch = ranks[start:start + BATCH_SIZE]
+            for rank, name in connection.execute(
+                    'SELECT movie_rank, genres.name FROM movie_genres JOIN genres ON genres.id = movie_genres.genre_id '
+                    f'WHERE movie_rank IN ({",".join("?" * len(batch))}) ORDER BY movie_rank, position', batch):
+                genre_names.setdefault(rank, []).append(name)
+        return genre_names
+
+    def add_director(self, director: Director):
+        with self.__connection() as connection:
+            connection.execute(INSERT_DIRECTOR, (director.director_full_name,))
+
+    def get_director(self, director_name) -> Director:
+        with self.__connection() as connection:
+            row = connection.execute('SELECT name FROM directors WHERE name = ?', (director_name,)).fetchone()
+        return None if row is None else shared_entity(self.__directors, Director, row[0])
+
+    def add_genre(self, genre: Genre):
+        with self.__transaction() as connection:
+            connection.execute(INSERT_GENRE, (genre.genre_name,))
+            self.__new_version(connection)
+        self.__sync(force=True)
+
+    def get_genres(self) -> List[Genre]:
+        with self.__connection() as connection:
+            rows = connection.execute('SELECT name FROM genres ORDER BY id').fetchall()
+        return [shared_entity(self.__genres, Genre, name) for name, in rows]
+
+    def add_actor(self, actor: Actor):
+        with self.__connection() as connection:
+            connection.execute(INSERT_ACTOR, (actor.actor_full_name,))
+
+    def get_actor(self, actor_name) -> Actor:
+        with self.__connection() as connection:
+            row = connection.execute('SELECT name FROM actors WHERE name = ?', (actor_name,)).fetchone()
+        return None if row is None else shared_entity(self.__actors, Actor, row[0])
+
+    def add_movie(self, movie: Movie):
+        self.add_movies([movie])
+
+    def add_movies(self, movies: Iterable[Movie]):
+        """ Adds Movies, and any Directors, Genres and Actors they refer to, in a single transaction.
+        Rows are written with one executemany per table for every BATCH_SIZE movies.
+        """
+        ranks = []
+        with self.__transaction() as connection:
+            batch = []
+            for movie in movies:
+                batch.append(movie)
+                if len(batch) == BATCH_SIZE:
+                    ranks.extend(self.__insert_movies(connection, batch))
+                    batch = []
+            ranks.extend(self.__insert_movies(connection, batch))
+            self.__bump_versions(connection, ranks)
+        self.__sync(force=True)
+
+    @staticmethod
+    def __insert_movies(connection, movies: List[Movie]) -> List[int]:
+        if len(movies) == 0:
+            return []
+        connection.executemany(INSERT_DIRECTOR, ((movie.director.director_full_name,) for movie in movies))
+        connection.executemany(INSERT_GENRE, ((genre.genre_name,) for movie in movies for genre in movie.genres))
+        connection.executemany(INSERT_ACTOR, ((actor.actor_full_name,) for movie in movies for actor in movie.actors))
+        connection.executemany(INSERT_MOVIE, (
+            (movie.rank, movie.title, movie.release_year, movie.description, movie.runtime_minutes, movie.rating,
+             movie.votes, movie.revenue, movie.metascore, movie.director.director_full_name) for movie in movies))
+        connection.executemany(INSERT_MOVIE_GENRE, (
+            (movie.rank, position, genre.genre_name)
+            for movie in movies for position, genre in enumerate(movie.genres)))
+        connection.executemany(INSERT_MOVIE_ACTOR, (
+            (movie.rank, position, actor.actor_full_name)
+            for movie in movies for position, actor in enumerate(movie.actors)))
+        return [movie.rank for movie in movies]
+
+    def get_movie(self, rank: int) -> Movie:
+        movies = self.get_movies_by_rank([rank])
+        return movies[0] if len(movies) > 0 else None
+
+    def get_number_of_movies(self):
+        self.__sync()
+        return len(self.__ranks)
+
+    def get_first_movie(self) -> Movie:
+        # Movies are kept in rank order, which is the order of the data file.
+        self.__sync()
+        ranks = self.__ranks
+        return self.get_movie(min(ranks)) if len(ranks) > 0 else None
+
+    def get_last_movie(self) -> Movie:
+        self.__sync()
+        ranks = self.__ranks
+        return self.get_movie(max(ranks)) if len(ranks) > 0 else None
+
+    def get_movies_by_rank(self, rank_list):
+        # Strip out any ranks in rank_list that don't represent Movie ranks in the repository.
+        self.__sync()
+        ranks = self.__ranks
+        existing_ranks = [rank for rank in rank_list if rank in ranks]
+        movies = dict()
+        with self.__connection() as connection:
+            for start in range(0, len(existing_ranks), BATCH_SIZE):
+                movies.update(self.__load_movies(connection, existing_ranks[start:start + BATCH_SIZE]))
+        return [movies[rank] for rank in existing_ranks if rank in movies]
+
+    def iter_movies(self) -> Iterator[Movie]:
+        self.__sync()
+        ranks = sorted(self.__ranks)
+        for start in range(0, len(ranks), BATCH_SIZE):
+            batch = ranks[start:start + BATCH_SIZE]
+            with self.__connection() as connection:
+                movies = self.__load_movies(connection, batch)
+            yield from (movies[rank] for rank in batch if rank in movies)
+
+    def __load_movies(self, connection, ranks: List[int]) -> dict:
+        # Three queries load a whole batch: the movies with their directors, then their genres, then their actors.
+        if len(ranks) == 0:
+            return dict()
+        placeholders = ','.join('?' * len(set(ranks)))
+        parameters = list(set(ranks))
+        movies = dict()
+        for row in connection.execute(f'{SELECT_MOVIE_COLUMNS} WHERE rank IN ({placeholders})', parameters):
+            rank, title, release_year, description, director, runtime_minutes, rating, votes, revenue, metascore = row
+            # A Movie stores an invalid year as None, and Movie() turns 0 back into None.
+            movie = Movie(title, 0 if release_year is None else release_year)
+            movie.rank = rank
+            movie.description = description
+            movie.director = shared_entity(self.__directors, Director, director)
+            if runtime_minutes > 0:
+                movie.runtime_minutes = runtime_minutes
+            movie.rating = rating
+            movie.votes = votes
+            movie.revenue = revenue
+            movie.metascore = metascore
+            movies[rank] = movie
+        for rank, name in connection.execute(
+                f'SELECT movie_rank, genres.name FROM movie_genres JOIN genres ON genres.id = movie_genres.genre_id '
+                f'WHERE movie_rank IN ({placeholders}) ORDER BY movie_rank, position', parameters):
+            movies[rank].add_genre(shared_entity(self.__genres, Genre, name))
+        for rank, name in connection.execute(
+                f'SELECT movie_rank, actors.name FROM movie_actors JOIN actors ON actors.id = movie_actors.actor_id '
+                f'WHERE movie_rank IN ({placeholders}) ORDER BY movie_rank, position', parameters):
+            movies[rank].add_actor(shared_entity(self.__actors, Actor, name))
+        return movies
+
+    def get_movie_ranks_for_genre(self, genre_name: str):
+        with self.__connection() as connection:
+            rows = connection.execute(
+                'SELECT movie_rank FROM movie_genres JOIN genres ON genres.id = movie_genres.genre_id '
+                'WHERE genres.name = ? ORDER BY movie_rank', (genre_name,)).fetchall()
+        return [rank for rank, in rows]
+
+    def add_review(self, review: Review):
+        super().add_review(review)
+        with self.__transaction() as connection:
+            connection.execute(INSERT_REVIEW, (
+                review.movie.rank, review.review_text, review.rating, review.timestamp.isoformat()))
+            self.__bump_versions(connection, [review.movie.rank])
+        self.__sync(force=True)
+
+    def add_reviews(self, reviews: List[Review]):
+        for review in reviews:
+            AbstractRepository.add_review(self, review)
+        with self.__transaction() as connection:
+            connection.executemany(INSERT_REVIEW, (
+                (review.movie.rank, review.review_text, review.rating, review.timestamp.isoformat())
+                for review in reviews))
+            self.__bump_versions(connection, {review.movie.rank for review in reviews})
+        self.__sync(force=True)
+
+    def get_reviews_for_movie(self, rank: int) -> List[Review]:
+        with self.__connection() as connection:
+            rows = connection.execute(f'{SELECT_REVIEW_COLUMNS} WHERE movie_rank = ? ORDER BY id', (rank,)).fetchall()
+        return self.__reviews_from_rows(rows)
+
+    def get_number_of_reviews_for_movie(self, rank: int) -> int:
+        with self.__connection() as connection:
+            count, = connection.execute('SELECT COUNT(*) FROM reviews WHERE movie_rank = ?', (rank,)).fetchone()
+        return count
+
+    def get_review_timeline(self, rank: int, order: str = 'newest', after: int = None,
+                            limit: int = 10) -> List[Tuple[int, Review]]:
+        if order not in REVIEW_ORDERS:
+            raise RepositoryException(f'Unknown review order {order}')
+        with self.__connection() as connection:
+            if after is None:
+                rows = connection.execute(SELECT_REVIEW_TIMELINE[order], (rank, limit)).fetchall()
+            else:
+                rows = connection.execute(SELECT_REVIEW_TIMELINE_AFTER[order], (rank, after, rank, limit)).fetchall()
+        return list(zip((row[0] for row in rows), self.__reviews_from_rows(rows)))
+
+    def get_reviews(self):
+        return list(self.iter_reviews())
+
+    def iter_reviews(self) -> Iterator[Review]:
+        last_id = 0
+        while True:
+            with self.__connection() as connection:
+                rows = connection.execute(f'{SELECT_REVIEW_COLUMNS} WHERE id > ? ORDER BY id LIMIT ?',
+                                          (last_id, BATCH_SIZE)).fetchall()
+            if len(rows) == 0:
+                return
+            yield from self.__reviews_from_rows(rows)
+            last_id = rows[-1][0]
+
+    def __reviews_from_rows(self, rows) -> List[Review]:
+        movies = {movie.rank: movie for movie in self.get_movies_by_rank({row[1] for row in rows})}
+        return [Review(movies[rank], review_text, rating, datetime.fromisoformat(timestamp))
+                for _, rank, review_text, rating, timestamp in rows]
+
+    def add_user(self, user: User):
+        try:
+            with self.__connection() as connection:
+                connection.execute(INSERT_USER, (user.user_name, user.password))
+        except sqlite3.IntegrityError:
+            raise RepositoryException(f'User {user.user_name} already exists')
+
+    def get_user(self, username: str) -> User:
+        with self.__connection() as connection:
+            row = connection.execute('SELECT username, password FROM users WHERE username = ?', (username,)).fetchone()
+        return None if row is None else User(row[0], row[1])
+
+    def add_watchlist(self, watchlist: WatchList):
+        with self.__transaction() as connection:
+            cursor = connection.execute(INSERT_WATCHLIST,
+                                        (watchlist.watchlist_name, watchlist.watchlist_owner.user_name))
+            if cursor.rowcount == 0:
+                raise RepositoryException('WatchList owner is not in the repository')
+            connection.executemany(INSERT_WATCHLIST_MOVIE, (
+                (cursor.lastrowid, position, movie.rank) for position, movie in enumerate(watchlist.watchlist)))
+
+    def get_watchlist(self, user: User) -> List[WatchList]:
+        if not isinstance(user, User):
+            return list()
+        with self.__connection() as connection:
+            rows = connection.execute(
+                'SELECT watchlists.id, watchlists.name, watchlist_movies.movie_rank FROM watchlists '
+                'JOIN users ON users.id = watchlists.user_id '
+                'LEFT JOIN watchlist_movies ON watchlist_movies.watchlist_id = watchlists.id '
+                'WHERE users.username = ? ORDER BY watchlists.id, watchlist_movies.position',
+                (user.user_name,)).fetchall()
+        movies = {movie.rank: movie for movie in self.get_movies_by_rank({row[2] for row in rows if row[2] is not None})}
+        all_watchlist = dict()
+        for watchlist_id, name, rank in rows:
+            watchlist = all_watchlist.get(watchlist_id)
+            if watchlist is None:
+                watchlist = all_watchlist[watchlist_id] = WatchList(user, name)
+            if rank is not None:
+                watchlist.add_movie(movies[rank])
+        return list(all_watchlist.values())
+
+    def get_version(self) -> int:
+        self.__sync()
+        return self.__version
+
+    def get_movie_version(self, rank: int) -> int:
+        self.__sync()
+        return self.__movie_versions.get(rank, 0)
+
+    def get_last_modified(self) -> datetime:
+        self.__sync()
+        return self.__last_modified
+
+
+def load_data(data_path: str, repo: SqliteRepository, workers: int = 1):
+    file_name = os.path.join(data_path, 'Data1000Movies.csv')
+    if workers > 1:
+        movies = parallel_loader.iter_movies_parallel(file_name, workers)
+    else:
+        movies = MovieFileCSVReader(file_name).iter_movies()
+
+    # Movies, and the directors, genres and actors they refer to, are inserted in batches in one transaction.
+    repo.add_movies(movies)
+
+
+def load_review_and_user(repo: SqliteRepository):
+    # load default review for default user into repository, then load default user into repository.
+    review = Review(
+        movie=repo.get_movie(1),
+        txt='GOTG is my new favourite movie of all time!',
+        rating=10
+    )
+    user = User(username='nton939', password=generate_password_hash('nton939Password'))
+    user.add_review(review)
+    repo.add_review(review)
+    repo.add_user(user)
+
+
+def load_watchlist(repo: SqliteRepository):
+    # load default watchlist for default user.
+    movies = repo.get_movies_by_rank([1, 2, 3, 4, 5])
+    watchlist = WatchList(user=repo.get_user('nton939'), watchlist_name='Watch Later')
+    for movie in movies:
+        watchlist.add_movie(movie)
+    repo.add_watchlist(watchlist)
+
+
+def populate(data_path: str, repo: SqliteRepository, workers: int = 1):
+    # A database that already holds the catalog keeps it, along with the users, reviews and watchlists added since.
+    if repo.get_number_of_movies() > 0:
+        return
+
+    # Load directors, genres, actors and movies into the repository.
+    load_data(data_path, repo, workers)
+
+    # Load default review and user into the repository.
+    load_review_and_user(repo)
+
+    # Load default watchlist into the repository.
+    load_watchlist(repo)
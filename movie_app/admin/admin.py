@@ -0,0 +1,101 @@
+import hmac
+import io
+import click
+from flask import Blueprint, abort, current_app, request
+import movie_app.adapters.reloader as reloader
+import movie_app.adapters.replication as replication
+import movie_app.admin.services as services
+from movie_app.api.api import json_error, json_response
+from movie_app.api.json_encoding import dumps
+from movie_app.web import prefork
+from movie_app.web.pinning import current_repository
+
+# Configure Blueprint. The CLI commands are available as 'flask admin ...'.
+admin_blueprint = Blueprint('admin_bp', __name__, url_prefix='/admin', cli_group='admin')
+
+
+@admin_blueprint.before_request
+def require_admin_token():
+    # Administration is off unless ADMIN_TOKEN is set, and then needs it as a bearer token.
+    token = current_app.config.get('ADMIN_TOKEN')
+    if not token:
+        abort(404)
+    supplied = request.headers.get('Authorization', '')
+    if not hmac.compare_digest(supplied.encode('utf-8'), f'Bearer {token}'.encode('utf-8')):
+        abort(403)
+
+
+def require_shared_repository():
+    # A command runs in a process of its own, whose writes reach the server only through a shared repository.
+    problem = prefork.shared_repository_problem(current_app.config)
+    if problem is not None:
+        raise click.ClickException(f'The running server would not see the import: {problem}. '
+                                   'Send the file to the /admin endpoint instead.')
+
+
+@admin_blueprint.route('/reload', methods=['POST'])
+def reload():
+    # The reload runs in the background, in every worker process; poll GET /admin/reload for its outcome.
+    status = services.start_reload(reloader.reloader_instance, replication.replicator_instance)
+    return json_response(dumps(status), 202)
+
+
+@admin_blueprint.route('/reload', methods=['GET'])
+def reload_status():
+    return json_response(dumps(services.get_reload_status(reloader.reloader_instance)))
+
+
+@admin_blueprint.route('/caches', methods=['GET'])
+def cache_stats():
+    return json_response(dumps(services.get_cache_stats()))
+
+
+@admin_blueprint.route('/movies', methods=['POST'])
+def import_movies():
+    # The request body is CSV with the movie data file's header row, e.g. curl --data-binary @new_movies.csv.
+    lines = io.StringIO(request.get_data(as_text=True), newline='')
+    result = services.import_movies(lines, current_repository())
+    return json_response(dumps(result), 201 if len(result['added']) > 0 else 200)
+
+
+@admin_blueprint.cli.command('import-movies')
+@click.argument('csv_file', type=click.File('r', encoding='utf-8-sig'))
+def import_movies_command(csv_file):
+    """Add the movies of a CSV file, laid out like the movie data file, to the repository."""
+    require_shared_repository()
+    try:
+        result = services.import_movies(csv_file, current_repository())
+    except services.InvalidMovieDataException as exception:
+        raise click.ClickException(str(exception))
+    click.echo(f'Added {len(result["added"])} movies, skipped {len(result["skipped"])} already present, '
+               f'in {result["seconds"]} s.')
+
+
+@admin_blueprint.route('/reviews', methods=['POST'])
+def import_reviews():
+    # The request body is NDJSON, one review per line, e.g. curl --data-binary @reviews.ndjson.
+    lines = io.StringIO(request.get_data(as_text=True))
+    result = services.import_reviews(lines, current_repository())
+    return json_response(dumps(result), 201 if result['added'] > 0 else 200)
+
+
+@admin_blueprint.cli.command('import-reviews')
+@click.argument('ndjson_file', type=click.File('r', encoding='utf-8'))
+def import_reviews_command(ndjson_file):
+    """Add the reviews of an NDJSON file, one review per line, to the repository."""
+    require_shared_repository()
+    result = services.import_reviews(ndjson_file, current_repository())
+    click.echo(f'Added {result["added"]} reviews, rejected {len(result["rejected"])}, in {result["seconds"]} s '
+               f'({result["reviews_per_second"]} reviews/s).')
+    for rejection in result['rejected'][:10]:
+        click.echo(f'Line {rejection["line"]}: {rejection["error"]}')
+
+
+@admin_blueprint.errorhandler(services.InvalidMovieDataException)
+def invalid_movie_data(e):
+    return json_error(f'Invalid movie data: {e}', 400)
+
+
+@admin_blueprint.errorhandler(services.ReloadUnavailableException)
+def reload_unavailable(e):
+    return json_error('The catalog can only be reloaded with the memory repository', 409)
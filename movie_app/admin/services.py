@@ -0,0 +1,179 @@
+import csv
+import json
+import time
+from datetime import datetime
+from typing import Iterable
+import movie_app.api.services as api_services
+import movie_app.caching.fragment_cache as fragment_cache
+import movie_app.caching.service_cache as service_cache
+import movie_app.caching.view_models as view_models
+from movie_app.adapters import mutations
+from movie_app.adapters.parallel_loader import column_map, number_or_none
+from movie_app.adapters.reloader import Reloader
+from movie_app.adapters.replication import Replicator
+from movie_app.adapters.repository import AbstractRepository
+from movie_app.domain.model import Review
+from movie_app.movies.profanity_filter import filter_instance as profanity_filter
+
+
+class ReloadUnavailableException(Exception):
+    pass
+
+
+class InvalidMovieDataException(Exception):
+    pass
+
+
+def start_reload(reloader: Reloader, replicator: Replicator = None) -> dict:
+    # Only the memory repository can be reloaded; the SQLite repository keeps its catalog in the database.
+    if reloader is None:
+        raise ReloadUnavailableException
+    started = reloader.reload_in_background()
+    if replicator is not None:
+        # The other worker processes reload when they next pull changes.
+        replicator.request_reload()
+    return dict(reloader.status(), started=started)
+
+
+def get_reload_status(reloader: Reloader) -> dict:
+    if reloader is None:
+        raise ReloadUnavailableException
+    return reloader.status()
+
+
+def get_cache_stats() -> dict:
+    caches = {
+        'fragments': fragment_cache.cache_instance.stats(),
+        'view_models': view_models.cache_instance.stats(),
+        'api_json': api_services.json_cache_instance.stats()
+    }
+    if service_cache.caches_instance is not None:
+        caches['services'] = service_cache.caches_instance.stats()
+    return caches
+
+
+def import_movies(lines: Iterable[str], repo: AbstractRepository) -> dict:
+    """ Adds the movies of CSV lines, laid out like the movie data file with a header row, to repo. Movies whose
+    rank repo already has are skipped. Every row is checked before any movie is added.
+    """
+    start = time.perf_counter()
+    reader = csv.reader(lines)
+    try:
+        columns = column_map(next(reader, []))
+        records = [_movie_record(row, columns) for row in reader if len(row) > 0]
+    except (ValueError, IndexError) as exception:
+        raise InvalidMovieDataException(str(exception) or 'Malformed movie row')
+
+    added = list()
+    skipped = list()
+    genre_names = set()
+    for record in records:
+        if repo.get_movie(record['rank']) is not None:
+            skipped.append(record['rank'])
+            continue
+        # Added like any other movie: secondary indexes and versions are updated for this movie alone, and the
+        # addition is journaled and replicated.
+        mutations.apply(record, repo)
+        added.append(record['rank'])
+        genre_names.update(record['genres'])
+    return {
+        'added': added,
+        'skipped': skipped,
+        'genres': sorted(genre_names),
+        'seconds': round(time.perf_counter() - start, 3)
+    }
+
+
+def _movie_record(row: list, columns: dict) -> dict:
+    return {
+        'op': 'add_movie',
+        'rank': int(row[columns['Rank']].strip()),
+        'title': row[columns['Title']],
+        'release_year': int(row[columns['Year']].strip()),
+        'description': row[columns['Description']].strip(),
+        'director': row[columns['Director']].strip(),
+        'actors': [name.strip() for name in row[columns['Actors']].split(',')],
+        'genres': [name.strip() for name in row[columns['Genre']].split(',')],
+        'runtime_minutes': int(row[columns['Runtime (Minutes)']].strip()),
+        'rating': number_or_none(row[columns['Rating']], float),
+        'votes': number_or_none(row[columns['Votes']], int),
+        'revenue': number_or_none(row[columns['Revenue (Millions)']], float),
+        'metascore': number_or_none(row[columns['Metascore']], int)
+    }
+
+
+def import_reviews(lines: Iterable[str], repo: AbstractRepository) -> dict:
+    """ Adds the reviews of NDJSON lines, each an object with movie_rank, username, review_text, rating and an
+    optional ISO 8601 timestamp, to repo in one write. Reviews that fail the checks of the review form, or name an
+    unknown movie or user, are rejected, with their line number, and the others added.
+    """
+    start = time.perf_counter()
+    entries = list()
+    rejected = list()
+    for line_number, line in enumerate(lines, start=1):
+        if line.strip() == '':
+            continue
+        try:
+            entries.append((line_number, _review_entry(line)))
+        except KeyError as exception:
+            rejected.append({'line': line_number, 'error': f'Missing {exception}'})
+        except (ValueError, TypeError) as exception:
+            rejected.append({'line': line_number, 'error': str(exception) or type(exception).__name__})
+
+    # One repository lookup for all the movies, and one per distinct user.
+    movie_ranks = sorted({entry['movie_rank'] for _, entry in entries})
+    movies = {movie.rank: movie for movie in repo.get_movies_by_rank(movie_ranks)}
+    users = {username: repo.get_user(username) for username in {entry['username'] for _, entry in entries}}
+
+    reviews = list()
+    for line_number, entry in entries:
+        movie = movies.get(entry['movie_rank'])
+        if movie is None:
+            rejected.append({'line': line_number, 'error': f'Unknown movie {entry["movie_rank"]}'})
+        elif users[entry['username']] is None:
+            rejected.append({'line': line_number, 'error': f'Unknown user {entry["username"]}'})
+        else:
+            reviews.append(Review(movie, entry['review_text'], entry['rating'], entry['timestamp']))
+    if len(reviews) > 0:
+        repo.add_reviews(reviews)
+
+    seconds = time.perf_counter() - start
+    return {
+        'added': len(reviews),
+        'rejected': sorted(rejected, key=lambda rejection: rejection['line']),
+        'movie_ranks': sorted({review.movie.rank for review in reviews}),
+        'seconds': round(seconds, 3),
+        'reviews_per_second': round(len(reviews) / seconds) if seconds > 0 else None
+    }
+
+
+def _review_entry(line: str) -> dict:
+    # The checks of the review form: a rating from 1 to 10, and at least 2 characters of text without profanity.
+    entry = json.loads(line)
+    if not isinstance(entry, dict):
+        raise ValueError('Not a JSON object')
+    movie_rank, username, review_text, rating = (
+        entry['movie_rank'], entry['username'], entry['review_text'], entry['rating'])
+    if type(movie_rank) is not int:
+        raise ValueError('movie_rank must be an integer')
+    if type(username) is not str:
+        raise ValueError('username must be a string')
+    if type(review_text) is not str or len(review_text.strip()) < 2:
+        raise ValueError('review_text must be at least 2 characters long')
+    if type(rating) is not int or not 1 <= rating <= 10:
+        raise ValueError('rating must be an integer between 1 and 10')
+    if profanity_filter.contains_profanity(review_text):
+        raise ValueError('Profanity is not allowed in reviews')
+    timestamp = entry.get('timestamp')
+    if timestamp is not None:
+        timestamp = datetime.fromisoformat(timestamp)
+        if timestamp.tzinfo is not None:
+            # Reviews are timestamped in local time, and timelines order them by timestamp.
+            timestamp = timestamp.astimezone().replace(tzinfo=None)
+    return {
+        'movie_rank': movie_rank,
+        'username': username,
+        'review_text': review_text,
+        'rating': rating,
+        'timestamp': timestamp
+    }
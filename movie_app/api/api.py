@@ -0,0 +1,87 @@
+from flask import Blueprint, current_app, request
+import movie_app.api.services as services
+import movie_app.movies.services as movies_services
+from movie_app.api.json_encoding import dumps
+from movie_app.web.pinning import current_repository
+
+# Configure Blueprint.
+api_blueprint = Blueprint('api_bp', __name__, url_prefix='/api')
+
+MAX_MOVIES_PER_REQUEST = 100
+
+
+@api_blueprint.route('/movies', methods=['GET'])
+def movies():
+    # Read query parameters.
+    ranks = request.args.get('ranks')
+    fields = services.parse_fields(request.args.get('fields'))
+
+    if ranks is not None:
+        # Batch request, e.g. /api/movies?ranks=1,2,3.
+        rank_list = [services.parse_whole_number(rank) for rank in ranks.split(',') if rank.strip() != '']
+        if len(rank_list) > MAX_MOVIES_PER_REQUEST:
+            return json_error(f'At most {MAX_MOVIES_PER_REQUEST} movies can be requested at once', 400)
+    else:
+        # Page through all movies in rank order, e.g. /api/movies?cursor=20&limit=10.
+        cursor = services.parse_whole_number(request.args.get('cursor'), 0)
+        limit = min(services.parse_whole_number(request.args.get('limit'), 20), MAX_MOVIES_PER_REQUEST)
+        rank_list = range(cursor + 1, min(cursor + limit, current_repository().get_number_of_movies()) + 1)
+
+    return json_response(services.get_movies_json(rank_list, fields, current_repository(),
+                                                  services.json_cache_instance))
+
+
+@api_blueprint.route('/movies/<int:rank>', methods=['GET'])
+def movie(rank):
+    fields = services.parse_fields(request.args.get('fields'))
+    return json_response(services.get_movie_json(rank, fields, current_repository(), services.json_cache_instance))
+
+
+@api_blueprint.route('/movies/<int:rank>/reviews', methods=['GET'])
+def movie_reviews(rank):
+    return json_response(services.get_reviews_json(rank, current_repository()))
+
+
+@api_blueprint.route('/genres', methods=['GET'])
+def genres():
+    return json_response(services.get_genres_json(current_repository()))
+
+
+@api_blueprint.route('/genres/<genre>/movies', methods=['GET'])
+def genre_movies(genre):
+    fields = services.parse_fields(request.args.get('fields'))
+    cursor = services.parse_whole_number(request.args.get('cursor'), 0)
+    limit = min(services.parse_whole_number(request.args.get('limit'), 20), MAX_MOVIES_PER_REQUEST)
+
+    movie_ranks = movies_services.get_movie_ranks_for_genre(genre, current_repository())
+    return json_response(services.get_movies_json(movie_ranks[cursor:cursor + limit], fields, current_repository(),
+                                                  services.json_cache_instance))
+
+
+@api_blueprint.route('/featured', methods=['GET'])
+def featured():
+    quantity = min(services.parse_whole_number(request.args.get('quantity'), 3), MAX_MOVIES_PER_REQUEST)
+    return json_response(services.get_featured_movies_json(quantity, current_repository()))
+
+
+@api_blueprint.errorhandler(services.UnknownFieldException)
+def unknown_field(e):
+    return json_error(f'Unknown fields: {e}', 400)
+
+
+@api_blueprint.errorhandler(movies_services.NonExistentMovieException)
+def non_existent_movie(e):
+    return json_error('Movie not found', 404)
+
+
+@api_blueprint.errorhandler(services.InvalidParameterException)
+def invalid_parameter(e):
+    return json_error('Query parameters must be whole numbers', 400)
+
+
+def json_response(data: bytes, status: int = 200):
+    return current_app.response_class(data, status=status, mimetype='application/json')
+
+
+def json_error(message: str, status: int):
+    return json_response(dumps({'error': message}), status)
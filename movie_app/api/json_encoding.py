@@ -0,0 +1,22 @@
+import json
+from datetime import datetime
+
+# Use orjson, the fastest JSON encoder, when it is installed; otherwise fall back to the standard library.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _default(obj):
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+
+if orjson is not None:
+    def dumps(obj) -> bytes:
+        return orjson.dumps(obj, default=_default)
+else:
+    def dumps(obj) -> bytes:
+        return json.dumps(obj, default=_default, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
@@ -0,0 +1,84 @@
+from typing import Iterable
+from movie_app.adapters.repository import AbstractRepository
+from movie_app.api.json_encoding import dumps
+from movie_app.caching.lru_cache import LRUCache
+import movie_app.movies.services as movies_services
+import movie_app.utilities.services as utilities_services
+
+
+MOVIE_FIELDS = ('rank', 'title', 'release_year', 'description', 'director', 'actors', 'genres', 'runtime_minutes',
+                'rating', 'votes', 'revenue', 'metascore')
+
+
+# Serialized movies, keyed by (rank, movie version, fields). A new version makes old entries unreachable, and the
+# LRU bound lets them age out.
+json_cache_instance = None
+
+
+class UnknownFieldException(Exception):
+    pass
+
+
+class InvalidParameterException(Exception):
+    pass
+
+
+def parse_whole_number(value: str, default: int = None) -> int:
+    # Query parameters that must be whole numbers, such as ranks, cursors and limits.
+    if value is None and default is not None:
+        return default
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        raise InvalidParameterException(value)
+    if number < 0:
+        raise InvalidParameterException(value)
+    return number
+
+
+def parse_fields(fields: str):
+    # Returns the requested movie fields in canonical order, or all fields if none were requested.
+    if fields is None or fields.strip() == '':
+        return MOVIE_FIELDS
+    requested = {field.strip() for field in fields.split(',') if field.strip() != ''}
+    unknown = requested.difference(MOVIE_FIELDS)
+    if len(unknown) > 0:
+        raise UnknownFieldException(', '.join(sorted(unknown)))
+    return tuple(field for field in MOVIE_FIELDS if field in requested)
+
+
+def get_movies_json(rank_list: Iterable[int], fields, repo: AbstractRepository, cache: LRUCache = None) -> bytes:
+    # A single repository call fetches the whole batch; each movie is then serialized at most once per version.
+    movies = repo.get_movies_by_rank(list(rank_list))
+    return b'[' + b','.join(movie_json(movie, fields, repo, cache) for movie in movies) + b']'
+
+
+def get_movie_json(movie_rank: int, fields, repo: AbstractRepository, cache: LRUCache = None) -> bytes:
+    movie = repo.get_movie(movie_rank)
+    if movie is None:
+        raise movies_services.NonExistentMovieException
+    return movie_json(movie, fields, repo, cache)
+
+
+def movie_json(movie, fields, repo: AbstractRepository, cache: LRUCache = None) -> bytes:
+    key = (movie.rank, repo.get_movie_version(movie.rank), fields)
+    data = cache.get(key) if cache is not None else None
+    if data is None:
+        movie_dict = movies_services.movie_to_dict(movie)
+        data = dumps({field: movie_dict[field] for field in fields})
+        if cache is not None:
+            cache.put(key, data)
+    return data
+
+
+def get_reviews_json(movie_rank: int, repo: AbstractRepository) -> bytes:
+    return dumps(movies_services.get_reviews_for_movie(movie_rank, repo))
+
+
+def get_genres_json(repo: AbstractRepository) -> bytes:
+    return dumps(utilities_services.get_genre_names(repo))
+
+
+def get_featured_movies_json(quantity: int, repo: AbstractRepository) -> bytes:
+    # Featured view models are flat read-only mappings, which JSON encoders only accept as dicts.
+    return dumps([dict(movie) for movie in utilities_services.get_random_movies(quantity, repo)])
@@ -6,7 +6,8 @@ from password_validator import PasswordValidator
 from functools import wraps
 import movie_app.utilities.utilities as utilities
 import movie_app.authentication.services as services
-import movie_app.adapters.repository as repo
+from movie_app.authentication.password_hashing import PasswordHashingBusyException
+from movie_app.web.pinning import current_repository
 
 # Configure Blueprint.
 authentication_blueprint = Blueprint('authentication_bp', __name__, url_prefix='/authentication')
@@ -20,7 +21,7 @@ def register():
         # Successful POST, i.e. the username and password have passed validation checking.
         # Use the service layer to attempt to add the new user.
         try:
-            services.add_user(form.username.data, form.password.data, repo.repo_instance)
+            services.add_user(form.username.data, form.password.data, current_repository())
 
             # All is well, redirect the user to the login page.
             return redirect(url_for('authentication_bp.login'))
@@ -48,10 +49,10 @@ def login():
         # Successful POST, i.e. the username and password have passed validation checking.
         # Use the service layer to lookup the user.
         try:
-            user = services.get_user(form.username.data, repo.repo_instance)
+            user = services.get_user(form.username.data, current_repository())
 
             # Authenticate user.
-            services.authenticate_user(user['username'], form.password.data, repo.repo_instance)
+            services.authenticate_user(user['username'], form.password.data, current_repository())
 
             # Initialise session and redirect the user to the home page.
             session.clear()
@@ -76,6 +77,12 @@ def login():
     )
 
 
+@authentication_blueprint.errorhandler(PasswordHashingBusyException)
+def password_hashing_busy(e):
+    # Rejected at once when too many logins and registrations are waiting for the password hasher.
+    return 'Too many people are signing in right now - please try again in a moment', 503, {'Retry-After': '1'}
+
+
 @authentication_blueprint.route('/logout')
 def logout():
     session.clear()
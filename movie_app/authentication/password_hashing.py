@@ -0,0 +1,96 @@
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from werkzeug.security import generate_password_hash, check_password_hash
+
+
+class PasswordHashingBusyException(Exception):
+    pass
+
+
+class PasswordHasher:
+    """ Hashes and checks passwords with PBKDF2-SHA256 in a pool of worker processes, so that the request threads
+    of a server process, and the requests they serve, do not wait for hashing to release the GIL.
+
+    At most workers hashes run at once, and at most queue_depth more wait for a worker; any further hash is
+    rejected at once with PasswordHashingBusyException, instead of making every request wait. With no workers,
+    hashes run on the calling thread, at most queue_depth + 1 at a time.
+
+    New hashes use iterations rounds of PBKDF2 (the work factor). Checks use the rounds recorded in the hash, so
+    changing the work factor keeps existing hashes valid.
+    """
+
+    def __init__(self, workers: int = 0, queue_depth: int = 16, iterations: int = 150000):
+        self.__workers = workers
+        self.__method = f'pbkdf2:sha256:{iterations}'
+        self.__slots = threading.BoundedSemaphore(max(workers, 1) + queue_depth)
+        self.__pool = None
+        self.__lock = threading.Lock()
+        self.__pending = 0
+        self.__hashed = 0
+        self.__checked = 0
+        self.__rejected = 0
+
+    def hash(self, password: str) -> str:
+        password_hash = self.__run(generate_password_hash, password, self.__method)
+        with self.__lock:
+            self.__hashed += 1
+        return password_hash
+
+    def check(self, password_hash: str, password: str) -> bool:
+        matches = self.__run(check_password_hash, password_hash, password)
+        with self.__lock:
+            self.__checked += 1
+        return matches
+
+    def __run(self, function, *args):
+        # The counters are changed by every request thread, so only under the lock.
+        if not self.__slots.acquire(blocking=False):
+            with self.__lock:
+                self.__rejected += 1
+            raise PasswordHashingBusyException
+        with self.__lock:
+            self.__pending += 1
+        try:
+            if self.__workers == 0:
+                result = function(*args)
+            else:
+                result = self.__executor().submit(function, *args).result()
+        finally:
+            with self.__lock:
+                self.__pending -= 1
+            self.__slots.release()
+        return result
+
+    def __executor(self) -> ProcessPoolExecutor:
+        # Started on first use, so that a server that forks its workers after loading the app starts one pool in
+        # each worker rather than one in the master that no worker can use.
+        with self.__lock:
+            if self.__pool is None:
+                self.__pool = ProcessPoolExecutor(max_workers=self.__workers)
+            return self.__pool
+
+    def after_fork(self):
+        """ Forgets a pool inherited from the parent process, whose threads do not survive the fork. """
+        self.__pool = None
+        self.__lock = threading.Lock()
+
+    def close(self):
+        with self.__lock:
+            if self.__pool is not None:
+                self.__pool.shutdown()
+                self.__pool = None
+
+    def stats(self) -> dict:
+        with self.__lock:
+            return {
+                'workers': self.__workers,
+                'pending': self.__pending,
+                'hashed': self.__hashed,
+                'checked': self.__checked,
+                'rejected': self.__rejected
+            }
+
+
+# Replaced by create_app with a hasher configured from PASSWORD_HASH_WORKERS, PASSWORD_HASH_QUEUE_DEPTH and
+# PASSWORD_HASH_ITERATIONS.
+hasher_instance = PasswordHasher()
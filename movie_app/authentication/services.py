@@ -1,4 +1,4 @@
-from werkzeug.security import generate_password_hash, check_password_hash
+import movie_app.authentication.password_hashing as password_hashing
 from movie_app.adapters.repository import AbstractRepository
 from movie_app.domain.model import User
 
@@ -21,8 +21,9 @@ def add_user(username: str, password: str, repo: AbstractRepository):
     if user is not None:
         raise NameNotUniqueException
 
-    # Encrypt password so that the database doesn't store passwords 'in the clear'.
-    password_hash = generate_password_hash(password)
+    # Encrypt password so that the database doesn't store passwords 'in the clear'. Raises
+    # PasswordHashingBusyException when too many passwords are being hashed already.
+    password_hash = password_hashing.hasher_instance.hash(password)
 
     # Create and store the new User, with password encrypted.
     user = User(username, password_hash)
@@ -40,7 +41,7 @@ def authenticate_user(username: str, password: str, repo: AbstractRepository):
     authenticated = False
     user = repo.get_user(username)
     if user is not None:
-        authenticated = check_password_hash(user.password, password)
+        authenticated = password_hashing.hasher_instance.check(user.password, password)
     if not authenticated:
         raise AuthenticationException
 
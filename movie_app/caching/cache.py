@@ -0,0 +1,36 @@
+import abc
+
+
+class AbstractCache(abc.ABC):
+    """ A bounded key-value cache. Keys are strings; values stored by a cache that other processes share must be
+    picklable.
+    """
+
+    @abc.abstractmethod
+    def get(self, key, default=None):
+        """ Returns the value stored under key, or default if there is none or it has expired. """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def put(self, key, value):
+        """ Stores value under key, evicting other entries if the cache is full. """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def delete(self, key) -> bool:
+        """ Removes the entry stored under key, and returns whether there was one. """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def clear(self):
+        """ Removes every entry. """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def stats(self) -> dict:
+        """ Returns the cache's size, max_entries, hits, misses, evictions, expirations and hit_rate. """
+        raise NotImplementedError
+
+    def after_fork(self):
+        """ Called in a forked worker process before it uses a cache inherited from its parent. """
+        pass
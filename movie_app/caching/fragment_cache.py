@@ -0,0 +1,93 @@
+import threading
+from typing import Iterable
+from movie_app.caching.lru_cache import LRUCache
+
+
+cache_instance = None
+
+
+class FragmentCache:
+    """ Caches rendered HTML (whole pages and per-movie fragments) and remembers which movie ranks
+    each entry shows, so that a change to one movie drops exactly the entries that display it.
+    Pages that list a genre also give genre_key(genre_name) among their ranks, so a movie added to the genre
+    drops them too.
+    """
+
+    def __init__(self, max_entries: int = 2048, ttl: float = 300):
+        self.__cache = LRUCache(max_entries, ttl, on_evict=self.__forget)
+        self.__keys_by_movie = dict()
+        self.__ranks_by_key = dict()
+        self.__invalidated_at = dict()
+        self.__all_invalidated_at = -1
+        self.__generation = 0
+        self.__lock = threading.RLock()
+
+    @property
+    def generation(self) -> int:
+        """ Read before rendering a fragment and pass to put, so that a fragment rendered from data that
+        was invalidated while it was being rendered is not cached.
+        """
+        return self.__generation
+
+    @property
+    def hit_rate(self) -> float:
+        return self.__cache.hit_rate
+
+    def __len__(self):
+        return len(self.__cache)
+
+    def get(self, key):
+        return self.__cache.get(key)
+
+    def put(self, key, fragment, movie_ranks: Iterable[int], generation: int = None):
+        movie_ranks = tuple(movie_ranks)
+        with self.__lock:
+            if generation is not None and (self.__all_invalidated_at >= generation or
+                                           any(self.__invalidated_at.get(rank, -1) >= generation
+                                               for rank in movie_ranks)):
+                return
+            self.__ranks_by_key[key] = movie_ranks
+            for rank in movie_ranks:
+                self.__keys_by_movie.setdefault(rank, set()).add(key)
+            self.__cache.put(key, fragment)
+
+    def invalidate_movie(self, rank: int):
+        with self.__lock:
+            self.__invalidated_at[rank] = self.__generation
+            self.__generation += 1
+            for key in self.__keys_by_movie.pop(rank, set()):
+                self.__cache.delete(key)
+                self.__forget(key)
+
+    def invalidate_genre(self, genre_name: str):
+        self.invalidate_movie(genre_key(genre_name))
+
+    def invalidate_all(self):
+        """ Drops every entry, and rejects fragments rendered before the call, e.g. after the catalog is reloaded. """
+        with self.__lock:
+            self.__all_invalidated_at = self.__generation
+            self.__generation += 1
+            self.clear()
+
+    def clear(self):
+        self.__cache.clear()
+        with self.__lock:
+            self.__keys_by_movie.clear()
+            self.__ranks_by_key.clear()
+
+    def stats(self) -> dict:
+        return self.__cache.stats()
+
+    def __forget(self, key, fragment=None):
+        # Drop an evicted or invalidated key from the reverse index.
+        with self.__lock:
+            for rank in self.__ranks_by_key.pop(key, ()):
+                keys = self.__keys_by_movie.get(rank)
+                if keys is not None:
+                    keys.discard(key)
+                    if len(keys) == 0:
+                        del self.__keys_by_movie[rank]
+
+
+def genre_key(genre_name: str) -> tuple:
+    return 'genre', genre_name
@@ -0,0 +1,103 @@
+import threading
+import time
+from collections import OrderedDict
+from movie_app.caching.cache import AbstractCache
+
+
+class LRUCache(AbstractCache):
+    """ A bounded, thread-safe cache that evicts the least recently used entry when full and
+    treats entries older than ttl seconds as missing. A ttl of None disables expiry.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = None, on_evict=None, clock=time.monotonic):
+        if type(max_entries) is not int or max_entries < 1:
+            raise ValueError("A cache must hold at least one entry")
+        self.__max_entries = max_entries
+        self.__ttl = ttl
+        self.__on_evict = on_evict
+        self.__clock = clock
+        self.__entries = OrderedDict()
+        self.__lock = threading.Lock()
+        self.__hits = 0
+        self.__misses = 0
+        self.__evictions = 0
+        self.__expirations = 0
+
+    @property
+    def max_entries(self) -> int:
+        return self.__max_entries
+
+    @property
+    def ttl(self) -> float:
+        return self.__ttl
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.__hits + self.__misses
+        return self.__hits / lookups if lookups > 0 else 0.0
+
+    def __len__(self):
+        return len(self.__entries)
+
+    def __contains__(self, key):
+        with self.__lock:
+            entry = self.__entries.get(key)
+            return entry is not None and not self.__expired(entry)
+
+    def __expired(self, entry) -> bool:
+        expires_at = entry[0]
+        return expires_at is not None and expires_at <= self.__clock()
+
+    def get(self, key, default=None):
+        evicted = None
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is not None and self.__expired(entry):
+                del self.__entries[key]
+                self.__expirations += 1
+                evicted = (key, entry[1])
+                entry = None
+            if entry is None:
+                self.__misses += 1
+                value = default
+            else:
+                self.__entries.move_to_end(key)
+                self.__hits += 1
+                value = entry[1]
+        if evicted is not None and self.__on_evict is not None:
+            self.__on_evict(*evicted)
+        return value
+
+    def put(self, key, value):
+        expires_at = None if self.__ttl is None else self.__clock() + self.__ttl
+        evicted = []
+        with self.__lock:
+            self.__entries[key] = (expires_at, value)
+            self.__entries.move_to_end(key)
+            while len(self.__entries) > self.__max_entries:
+                evicted_key, evicted_entry = self.__entries.popitem(last=False)
+                self.__evictions += 1
+                evicted.append((evicted_key, evicted_entry[1]))
+        # Callbacks run outside the lock, so they may safely call back into the cache.
+        if self.__on_evict is not None:
+            for evicted_key, evicted_value in evicted:
+                self.__on_evict(evicted_key, evicted_value)
+
+    def delete(self, key) -> bool:
+        with self.__lock:
+            return self.__entries.pop(key, None) is not None
+
+    def clear(self):
+        with self.__lock:
+            self.__entries.clear()
+
+    def stats(self) -> dict:
+        return {
+            'size': len(self.__entries),
+            'max_entries': self.__max_entries,
+            'hits': self.__hits,
+            'misses': self.__misses,
+            'evictions': self.__evictions,
+            'expirations': self.__expirations,
+            'hit_rate': self.hit_rate
+        }
@@ -0,0 +1,101 @@
+import functools
+import inspect
+import time
+from typing import Callable
+from movie_app.caching.cache import AbstractCache
+from movie_app.caching.single_flight import SingleFlight
+
+
+# Set by create_app. None disables service caching: decorated functions are called directly.
+caches_instance = None
+
+
+class ServiceCaches:
+    """ The named caches that hold the results of service functions decorated with cached. make_cache(name)
+    creates each cache when its name is first used.
+
+    A result is fresh for fresh_for seconds (None: as long as its cache keeps it). A cache should keep results
+    longer than that: a result that is no longer fresh is still returned, while another thread computes it again.
+    """
+
+    def __init__(self, make_cache: Callable[[str], AbstractCache], fresh_for: float = None, clock=time.time):
+        self.__make_cache = make_cache
+        self.__caches = dict()
+        self.__flights = SingleFlight()
+        self.__fresh_for = fresh_for
+        self.__clock = clock
+
+    @property
+    def flights(self) -> SingleFlight:
+        """ Coalesces concurrent computations of the same result. """
+        return self.__flights
+
+    def get(self, name: str) -> AbstractCache:
+        cache = self.__caches.get(name)
+        if cache is None:
+            cache = self.__caches.setdefault(name, self.__make_cache(name))
+        return cache
+
+    def fresh_until(self) -> float:
+        """ Returns the time until which a result computed now is fresh. """
+        return None if self.__fresh_for is None else self.__clock() + self.__fresh_for
+
+    def is_fresh(self, fresh_until: float) -> bool:
+        return fresh_until is None or self.__clock() < fresh_until
+
+    def after_fork(self):
+        for cache in list(self.__caches.values()):
+            cache.after_fork()
+
+    def clear(self):
+        for cache in list(self.__caches.values()):
+            cache.clear()
+
+    def stats(self) -> dict:
+        stats = {name: cache.stats() for name, cache in sorted(self.__caches.items())}
+        stats['flights'] = self.__flights.stats()
+        return stats
+
+
+def cached(name: str, version: Callable = None):
+    """ Caches the results of a service function in the service cache called name.
+
+    Results are keyed on the function's arguments, other than the repository (the argument called repo), and on
+    the version of the data they were computed from: version is called with the function's arguments, and by
+    default returns the repository's version. Versions are never reused, so a change to the repository makes old
+    results unreachable rather than stale. Arguments must have a stable repr, results of a cache that other
+    processes share must be picklable, and callers must not modify results, which are shared.
+    Exceptions are not cached.
+
+    Concurrent calls that miss the cache for the same key wait for one computation of the result. A result that is
+    no longer fresh is returned at once, while it is computed again in the background.
+    """
+    def decorate(function):
+        signature = inspect.signature(function)
+
+        @functools.wraps(function)
+        def cached_function(*args, **kwargs):
+            caches = caches_instance
+            if caches is None:
+                return function(*args, **kwargs)
+            arguments = signature.bind(*args, **kwargs).arguments
+            repo = arguments.pop('repo')
+            data_version = repo.get_version() if version is None else version(*args, **kwargs)
+            key = repr((tuple(arguments.items()), data_version))
+            cache = caches.get(name)
+
+            def compute():
+                result = function(*args, **kwargs)
+                cache.put(key, (result, caches.fresh_until()))
+                return result
+
+            entry = cache.get(key, None)
+            if entry is None:
+                return caches.flights.do((name, key), compute)
+            result, fresh_until = entry
+            if not caches.is_fresh(fresh_until):
+                caches.flights.do_in_background((name, key), compute)
+            return result
+        return cached_function
+    return decorate
+
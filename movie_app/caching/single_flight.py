@@ -0,0 +1,70 @@
+import threading
+
+
+class SingleFlight:
+    """ Coalesces concurrent computations of the same value in one process: while one thread computes the value
+    for a key, other threads that ask for the same key wait for its result (or its exception) instead of computing
+    it again.
+    """
+
+    def __init__(self):
+        self.__flights = dict()
+        self.__lock = threading.Lock()
+        self.__computations = 0
+        self.__coalesced = 0
+
+    def do(self, key, compute):
+        """ Returns compute(), or the result of the computation of key already in flight. """
+        with self.__lock:
+            flight = self.__flights.get(key)
+            if flight is None:
+                flight = self.__flights[key] = _Flight()
+                self.__computations += 1
+                leader = True
+            else:
+                self.__coalesced += 1
+                leader = False
+        if leader:
+            self.__run(key, flight, compute)
+        else:
+            flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        return flight.result
+
+    def do_in_background(self, key, compute) -> bool:
+        """ Starts compute on another thread, unless a computation of key is already in flight, and returns whether
+        it did. Exceptions are dropped; the next caller tries again.
+        """
+        with self.__lock:
+            if key in self.__flights:
+                return False
+            flight = self.__flights[key] = _Flight()
+            self.__computations += 1
+        threading.Thread(target=self.__run, args=(key, flight, compute), name='single-flight', daemon=True).start()
+        return True
+
+    def __run(self, key, flight, compute):
+        try:
+            flight.result = compute()
+        except Exception as exception:
+            flight.error = exception
+        finally:
+            with self.__lock:
+                del self.__flights[key]
+            flight.done.set()
+
+    def stats(self) -> dict:
+        return {
+            'in_flight': len(self.__flights),
+            'computations': self.__computations,
+            'coalesced': self.__coalesced
+        }
+
+
+class _Flight:
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
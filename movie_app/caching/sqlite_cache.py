@@ -0,0 +1,156 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from movie_app.caching.cache import AbstractCache
+
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS entries (
+    cache TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value BLOB NOT NULL,
+    expires_at REAL,
+    used_at REAL NOT NULL,
+    PRIMARY KEY (cache, key)
+);
+CREATE INDEX IF NOT EXISTS entries_by_use ON entries (cache, used_at);
+'''
+
+
+class SqliteCache(AbstractCache):
+    """ A cache kept in an SQLite database file, which every worker process of a server opens, so a value computed
+    by one worker is found by the others. Several caches can share one file; name tells their entries apart.
+
+    Like LRUCache, it evicts the least recently used entries beyond max_entries and treats entries older than ttl
+    seconds as missing (a ttl of None disables expiry). Values are pickled. Hits, misses, evictions and
+    expirations are counted by each process; size counts the entries of all of them.
+    """
+
+    def __init__(self, database: str, name: str, max_entries: int = 1024, ttl: float = None, clock=time.time):
+        if type(max_entries) is not int or max_entries < 1:
+            raise ValueError("A cache must hold at least one entry")
+        self.__database = os.path.abspath(database)
+        self.__name = name
+        self.__max_entries = max_entries
+        self.__ttl = ttl
+        # Wall-clock time, which every process shares, orders uses and expiries.
+        self.__clock = clock
+        self.__connection = self.__connect()
+        # Guards the connection, which every thread of the process shares.
+        self.__lock = threading.Lock()
+        self.__hits = 0
+        self.__misses = 0
+        self.__evictions = 0
+        self.__expirations = 0
+
+    def __connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.__database, isolation_level=None, check_same_thread=False)
+        connection.execute('PRAGMA busy_timeout = 10000')
+        connection.execute('PRAGMA journal_mode = WAL')
+        # Losing the last entries written before a power failure only costs recomputing them.
+        connection.execute('PRAGMA synchronous = OFF')
+        connection.executescript(SCHEMA)
+        return connection
+
+    def after_fork(self):
+        """ Opens a connection of this process's own in a forked process, leaving the parent's alone. """
+        self.__inherited_connection = self.__connection
+        self.__connection = self.__connect()
+        self.__lock = threading.Lock()
+
+    @property
+    def max_entries(self) -> int:
+        return self.__max_entries
+
+    @property
+    def ttl(self) -> float:
+        return self.__ttl
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.__hits + self.__misses
+        return self.__hits / lookups if lookups > 0 else 0.0
+
+    def __len__(self):
+        with self.__lock:
+            return self.__connection.execute(
+                'SELECT COUNT(*) FROM entries WHERE cache = ?', (self.__name,)
+            ).fetchone()[0]
+
+    def get(self, key, default=None):
+        now = self.__clock()
+        with self.__lock:
+            row = self.__connection.execute(
+                'SELECT value, expires_at FROM entries WHERE cache = ? AND key = ?', (self.__name, key)
+            ).fetchone()
+            if row is not None and row[1] is not None and row[1] <= now:
+                self.__connection.execute('DELETE FROM entries WHERE cache = ? AND key = ?', (self.__name, key))
+                self.__expirations += 1
+                row = None
+            if row is None:
+                self.__misses += 1
+                return default
+            self.__connection.execute(
+                'UPDATE entries SET used_at = ? WHERE cache = ? AND key = ?', (now, self.__name, key)
+            )
+            self.__hits += 1
+        return pickle.loads(row[0])
+
+    def put(self, key, value):
+        now = self.__clock()
+        expires_at = None if self.__ttl is None else now + self.__ttl
+        value = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self.__lock:
+            self.__connection.execute('BEGIN IMMEDIATE')
+            try:
+                self.__connection.execute(
+                    'INSERT OR REPLACE INTO entries (cache, key, value, expires_at, used_at) VALUES (?, ?, ?, ?, ?)',
+                    (self.__name, key, value, expires_at, now)
+                )
+                evicted = self.__connection.execute(
+                    'DELETE FROM entries WHERE rowid IN (SELECT rowid FROM entries WHERE cache = ? '
+                    'ORDER BY used_at DESC LIMIT -1 OFFSET ?)', (self.__name, self.__max_entries)
+                ).rowcount
+                self.__connection.execute('COMMIT')
+            except BaseException:
+                self.__connection.execute('ROLLBACK')
+                raise
+            self.__evictions += evicted
+
+    def delete(self, key) -> bool:
+        with self.__lock:
+            return self.__connection.execute(
+                'DELETE FROM entries WHERE cache = ? AND key = ?', (self.__name, key)
+            ).rowcount > 0
+
+    def clear(self):
+        with self.__lock:
+            self.__connection.execute('DELETE FROM entries WHERE cache = ?', (self.__name,))
+
+    def close(self):
+        with self.__lock:
+            self.__connection.close()
+
+    def stats(self) -> dict:
+        return {
+            'size': len(self),
+            'max_entries': self.__max_entries,
+            'hits': self.__hits,
+            'misses': self.__misses,
+            'evictions': self.__evictions,
+            'expirations': self.__expirations,
+            'hit_rate': self.hit_rate
+        }
+
+
+def clear_database(database: str):
+    """ Removes the entries of every cache kept in database. """
+    connection = sqlite3.connect(database, isolation_level=None)
+    try:
+        connection.execute('PRAGMA busy_timeout = 10000')
+        connection.executescript(SCHEMA)
+        connection.execute('DELETE FROM entries')
+    finally:
+        connection.close()
@@ -0,0 +1,45 @@
+from collections import ChainMap
+from types import MappingProxyType
+from movie_app.caching.lru_cache import LRUCache
+
+
+class ViewModelCache:
+    """ Keeps the serialized (dict) form of each movie until the movie's repository version changes.
+
+    View models are frozen, so one instance can be shared by every request: dicts become read-only mappings and
+    lists become tuples. Views that need per-request fields wrap a view model with overlay().
+    """
+
+    def __init__(self, max_entries: int = 4096):
+        self.__cache = LRUCache(max_entries)
+
+    def get(self, kind: str, movie, repo, build):
+        # Repository versions are never reused, so (kind, rank, version) identifies one state of one movie.
+        key = (kind, movie.rank, repo.get_movie_version(movie.rank))
+        view_model = self.__cache.get(key)
+        if view_model is None:
+            view_model = freeze(build(movie))
+            self.__cache.put(key, view_model)
+        return view_model
+
+    def clear(self):
+        self.__cache.clear()
+
+    def stats(self) -> dict:
+        return self.__cache.stats()
+
+
+cache_instance = ViewModelCache()
+
+
+def freeze(value):
+    if isinstance(value, dict):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+def overlay(view_model, **fields):
+    # Per-request fields shadow the shared view model without copying or mutating it.
+    return ChainMap(fields, view_model)
@@ -334,17 +334,31 @@ class MovieFileCSVReader:
         return self.__dataset_of_genres
 
     def read_csv_file(self):
+        for movie in self.iter_movies():
+            # assigning to respective datasets
+            self.__dataset_of_movies.append(movie)
+            for a in movie.actors:
+                self.__dataset_of_actors.add(a)
+            self.__dataset_of_directors.add(movie.director)
+            for g in movie.genres:
+                self.__dataset_of_genres.add(g)
+
+    def iter_movies(self):
+        # Yields each movie as soon as its row is read, without adding it to the datasets. Movies share one
+        # Director, Genre and Actor object per name instead of each holding their own copies.
+        directors = dict()
+        genres = dict()
+        actors = dict()
         with open(self.__file_name, mode='r', encoding='utf-8-sig') as csvfile:
             movie_file_reader = csv.DictReader(csvfile)
-            i = 0
             for row in movie_file_reader:
                 # reading from csv
                 movie_rank = int(row['Rank'].strip())
                 title = row['Title']
-                genres = row['Genre'].split(',')
+                movie_genres = row['Genre'].split(',')
                 movie_description = row['Description'].strip()
                 director = row['Director'].strip()
-                actors = row['Actors'].split(',')
+                movie_actors = row['Actors'].split(',')
                 year = int(row['Year'].strip())
                 runtime = int(row['Runtime (Minutes)'].strip())
                 movie_rating = float(row['Rating'].strip()) if row['Rating'].strip() != 'N/A' else row['Rating'].strip()
@@ -355,40 +369,32 @@ class MovieFileCSVReader:
                     if row['Metascore'].strip() != 'N/A' else row['Metascore'].strip()
 
                 # assigning to respective objects
-                movie_director = Director(director)
-                movie_genres = list()
-                for g in genres:
-                    genre = g.strip()
-                    movie_genres.append(Genre(genre))
-                movie_actors = list()
-                for a in actors:
-                    actor = a.strip()
-                    movie_actors.append(Actor(actor))
-
-                # assigning to respective datasets
-                self.__dataset_of_movies.append(Movie(title, year))
-                self.__dataset_of_movies[len(self.__dataset_of_movies)-1].rank = movie_rank
-                self.__dataset_of_movies[len(self.__dataset_of_movies)-1].genres = movie_genres
-                self.__dataset_of_movies[len(self.__dataset_of_movies)-1].description = movie_description
-                self.__dataset_of_movies[len(self.__dataset_of_movies)-1].director = movie_director
-                self.__dataset_of_movies[len(self.__dataset_of_movies)-1].actors = movie_actors
-                self.__dataset_of_movies[len(self.__dataset_of_movies)-1].runtime_minutes = runtime
-                self.__dataset_of_movies[len(self.__dataset_of_movies) - 1].rating = movie_rating
-                self.__dataset_of_movies[len(self.__dataset_of_movies) - 1].votes = movie_votes
-                self.__dataset_of_movies[len(self.__dataset_of_movies) - 1].revenue = movie_revenue
-                self.__dataset_of_movies[len(self.__dataset_of_movies) - 1].metascore = movie_metascore
-                for a in movie_actors:
-                    self.__dataset_of_actors.add(a)
-                self.__dataset_of_directors.add(movie_director)
-                for g in movie_genres:
-                    self.__dataset_of_genres.add(g)
-                i += 1
+                movie = Movie(title, year)
+                movie.rank = movie_rank
+                movie.genres = [shared_entity(genres, Genre, g.strip()) for g in movie_genres]
+                movie.description = movie_description
+                movie.director = shared_entity(directors, Director, director)
+                movie.actors = [shared_entity(actors, Actor, a.strip()) for a in movie_actors]
+                movie.runtime_minutes = runtime
+                movie.rating = movie_rating
+                movie.votes = movie_votes
+                movie.revenue = movie_revenue
+                movie.metascore = movie_metascore
+                yield movie
+
+
+def shared_entity(entities: dict, entity_class, name: str):
+    # Returns the entity called name from entities, adding it first if it is new, so movies share one instance.
+    entity = entities.get(name)
+    if entity is None:
+        entity = entities[name] = entity_class(name)
+    return entity
 
 
 class Review:
 
-    def __init__(self, movie: Movie, txt: str, rating: int):
-        if type(movie) is not Movie:
+    def __init__(self, movie: Movie, txt: str, rating: int, timestamp: datetime = None):
+        if not isinstance(movie, Movie):
             self.__movie = None
         else:
             self.__movie = movie
@@ -400,7 +406,7 @@ class Review:
             self.__rating = None
         else:
             self.__rating = rating
-        self.__timestamp = datetime.now()
+        self.__timestamp = datetime.now() if timestamp is None else timestamp
 
     @property
     def movie(self) -> Movie:
@@ -613,7 +619,7 @@ class MovieWatchingSimulation:
             raise Exception("Sorry, that is an invalid User")
         else:
             self.__administrator = admin
-        if type(movie) is not Movie:
+        if not isinstance(movie, Movie):
             raise Exception("Sorry, that is an invalid Movie")
         else:
             self.__movie_to_watch = movie
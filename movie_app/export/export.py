@@ -0,0 +1,57 @@
+import click
+from flask import Blueprint, Response, abort, stream_with_context
+import movie_app.export.services as services
+from movie_app.web.pinning import current_repository
+
+# Configure Blueprint. The CLI commands are available as 'flask export movies' and 'flask export reviews'.
+export_blueprint = Blueprint('export_bp', __name__, url_prefix='/export', cli_group='export')
+
+MIMETYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv'
+}
+
+
+@export_blueprint.route('/movies.<export_format>', methods=['GET'])
+def export_movies(export_format):
+    return streamed_export('movies', export_format, services.export_movies)
+
+
+@export_blueprint.route('/reviews.<export_format>', methods=['GET'])
+def export_reviews(export_format):
+    return streamed_export('reviews', export_format, services.export_reviews)
+
+
+def streamed_export(name, export_format, export):
+    if export_format not in MIMETYPES:
+        abort(404)
+    # Rows are generated while the response is being sent, so the first bytes go out straight away.
+    return Response(
+        stream_with_context(export(export_format, current_repository())),
+        mimetype=MIMETYPES[export_format],
+        headers={'Content-Disposition': f'attachment; filename={name}.{export_format}'}
+    )
+
+
+@export_blueprint.cli.command('movies')
+@click.option('--format', 'export_format', type=click.Choice(list(MIMETYPES)), default='ndjson')
+@click.option('--output', type=click.Path(dir_okay=False, writable=True, allow_dash=True), default='-',
+              help='File to write to (default: standard output).')
+def export_movies_command(export_format, output):
+    """Export all movies as NDJSON or CSV."""
+    write_export(services.export_movies(export_format, current_repository()), output)
+
+
+@export_blueprint.cli.command('reviews')
+@click.option('--format', 'export_format', type=click.Choice(list(MIMETYPES)), default='ndjson')
+@click.option('--output', type=click.Path(dir_okay=False, writable=True, allow_dash=True), default='-',
+              help='File to write to (default: standard output).')
+def export_reviews_command(export_format, output):
+    """Export all reviews as NDJSON or CSV."""
+    write_export(services.export_reviews(export_format, current_repository()), output)
+
+
+def write_export(chunks, output):
+    with click.open_file(output, mode='wb') as output_file:
+        for chunk in chunks:
+            output_file.write(chunk)
@@ -0,0 +1,98 @@
+import csv
+import io
+from typing import Iterable, Iterator
+from movie_app.adapters.repository import AbstractRepository
+from movie_app.api.json_encoding import dumps
+from movie_app.domain.model import Movie, Review
+import movie_app.movies.services as movies_services
+
+
+# Movies are exported with the columns of the movie data file, so an export can be loaded back in.
+MOVIE_CSV_COLUMNS = ['Rank', 'Title', 'Genre', 'Description', 'Director', 'Actors', 'Year', 'Runtime (Minutes)',
+                     'Rating', 'Votes', 'Revenue (Millions)', 'Metascore']
+REVIEW_CSV_COLUMNS = ['Movie Rank', 'Review', 'Rating', 'Timestamp']
+
+# Rows are yielded in chunks of about this many bytes, so the response is not sent one tiny packet per row.
+CHUNK_SIZE = 16 * 1024
+
+
+class UnknownFormatException(Exception):
+    pass
+
+
+def export_movies(export_format: str, repo: AbstractRepository) -> Iterator[bytes]:
+    if export_format == 'ndjson':
+        rows = (dumps(movies_services.movie_to_dict(movie)) + b'\n' for movie in repo.iter_movies())
+    elif export_format == 'csv':
+        rows = csv_rows(MOVIE_CSV_COLUMNS, (movie_to_row(movie) for movie in repo.iter_movies()))
+    else:
+        raise UnknownFormatException
+    return chunked(rows)
+
+
+def export_reviews(export_format: str, repo: AbstractRepository) -> Iterator[bytes]:
+    if export_format == 'ndjson':
+        rows = (dumps(movies_services.review_to_dict(review)) + b'\n' for review in repo.iter_reviews())
+    elif export_format == 'csv':
+        rows = csv_rows(REVIEW_CSV_COLUMNS, (review_to_row(review) for review in repo.iter_reviews()))
+    else:
+        raise UnknownFormatException
+    return chunked(rows)
+
+
+def csv_rows(columns, rows: Iterable[list]) -> Iterator[bytes]:
+    # One small buffer is reused for every row, so memory use does not grow with the number of rows.
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in _prepend(columns, rows):
+        writer.writerow(row)
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def chunked(rows: Iterable[bytes]) -> Iterator[bytes]:
+    chunk = []
+    chunk_size = 0
+    for row in rows:
+        chunk.append(row)
+        chunk_size += len(row)
+        if chunk_size >= CHUNK_SIZE:
+            yield b''.join(chunk)
+            chunk = []
+            chunk_size = 0
+    if len(chunk) > 0:
+        yield b''.join(chunk)
+
+
+def _prepend(first, rest: Iterable):
+    yield first
+    yield from rest
+
+
+# ===========================================
+# Functions to convert model entities to rows
+# ===========================================
+def movie_to_row(movie: Movie) -> list:
+    return [
+        movie.rank,
+        movie.title,
+        ','.join(genre.genre_name for genre in movie.genres),
+        movie.description,
+        movie.director.director_full_name,
+        ','.join(actor.actor_full_name for actor in movie.actors),
+        movie.release_year,
+        movie.runtime_minutes,
+        _value_or_not_available(movie.rating),
+        _value_or_not_available(movie.votes),
+        _value_or_not_available(movie.revenue),
+        _value_or_not_available(movie.metascore)
+    ]
+
+
+def review_to_row(review: Review) -> list:
+    return [review.movie.rank, review.review_text, review.rating, review.timestamp.isoformat()]
+
+
+def _value_or_not_available(value):
+    return 'N/A' if value is None else value
@@ -1,10 +1,16 @@
 from flask import Blueprint, render_template
 import movie_app.utilities.utilities as utilities
+from movie_app.web.conditional import conditional_get
 
 home_blueprint = Blueprint('home_bp', __name__)
 
 
+def home_versions(repository):
+    return repository.get_version()
+
+
 @home_blueprint.route('/', methods=['GET'])
+@conditional_get(home_versions)
 def home():
     return render_template(
         'home/home.html',
@@ -1,22 +1,54 @@
-from flask import Blueprint
+from flask import Blueprint, abort
 from flask import request, render_template, redirect, url_for, session
-from better_profanity import profanity
+from markupsafe import Markup
 from flask_wtf import FlaskForm
 from wtforms import TextAreaField, HiddenField, SubmitField, IntegerField
 from wtforms.validators import DataRequired, Length, ValidationError, NumberRange
 from movie_app.authentication.authentication import login_required
-import movie_app.adapters.repository as repo
+from movie_app.web.conditional import conditional_get
+import movie_app.caching.fragment_cache as fragment_cache
+from movie_app.caching.single_flight import SingleFlight
+from movie_app.caching.view_models import overlay
+import movie_app.statistics.view_counters as view_counters
 import movie_app.utilities.utilities as utilities
+import movie_app.movies.profanity_filter as profanity_filter
 import movie_app.movies.services as services
+from movie_app.web import warmup
+from movie_app.web.pinning import current_repository
 
 # Configure Blueprint.
 movies_blueprint = Blueprint('movies_bp', __name__)
 
+MOVIES_PER_PAGE = 3
+REVIEWS_PER_PAGE = 10
+
+REVIEW_ORDER_NAMES = {
+    'newest': 'Newest',
+    'top_rated': 'Top rated'
+}
+
+# Coalesces concurrent renderings of the same page.
+page_flights = SingleFlight()
+
+# Cached pages hold this in place of the sidebar, whose featured movies are picked at random for each response.
+SIDEBAR_PLACEHOLDER = Markup('<!-- sidebar -->')
+
+
+def movies_by_rank_versions(repository):
+    # The page shows a fixed window of ranks, so only reviews of those movies (or a new genre) change it.
+    cursor = int(request.args.get('cursor', 0))
+    page_movie_ranks = list(range(1, 1001))[cursor:cursor + MOVIES_PER_PAGE]
+    return [repository.get_movie_version(rank) for rank in page_movie_ranks], len(repository.get_genres())
+
+
+def movies_by_genre_versions(repository):
+    # Finding the movies of a genre is service-layer work, so genre pages use the repository-wide version.
+    return repository.get_version()
+
 
 @movies_blueprint.route('/movies_by_rank', methods=['GET'])
+@conditional_get(movies_by_rank_versions)
 def movies_by_rank():
-    movies_per_page = 3
-
     # Read query parameters.
     cursor = request.args.get('cursor')
     movie_to_show_reviews = request.args.get('view_reviews_for')
@@ -35,10 +67,29 @@ def movies_by_rank():
         # Convert cursor from string to int.
         cursor = int(cursor)
 
+    # Serve the whole page from the fragment cache if an identical page has already been rendered.
+    page_key = ('page', 'movies_by_rank', None, cursor, movie_to_show_reviews)
+    page, page_movie_ranks = get_page(
+        page_key, lambda: render_movies_by_rank(page_key, cursor, movie_to_show_reviews)
+    )
+
+    # Count this visitor as a viewer of each movie on the page.
+    record_views(page_movie_ranks)
+    return page
+
+
+def render_movies_by_rank(page_key, cursor, movie_to_show_reviews):
+    movies_per_page = MOVIES_PER_PAGE
+    generation = fragment_cache.cache_instance.generation
+
     movie_ranks = list(range(1, 1001))
+    page_movie_ranks = movie_ranks[cursor:cursor + movies_per_page]
 
-    # Retrieve the batch of movies to display on the web page.
-    movies = services.get_movies_by_rank(movie_ranks[cursor:cursor + movies_per_page], repo.repo_instance)
+    # Retrieve the rendered movies to display on the web page, with urls for viewing and adding reviews.
+    articles = get_movie_articles(
+        'movies_by_rank', None, cursor, page_movie_ranks, movie_to_show_reviews,
+        lambda rank: url_for('movies_bp.movies_by_rank', cursor=cursor, view_reviews_for=rank)
+    )
     first_movie_url = None
     last_movie_url = None
     next_movie_url = None
@@ -57,19 +108,13 @@ def movies_by_rank():
             last_cursor -= movies_per_page
         last_movie_url = url_for('movies_bp.movies_by_rank', cursor=last_cursor)
 
-    # Construct urls for viewing movie reviews and adding reviews.
-    for movie in movies:
-        movie['view_review_url'] = url_for('movies_bp.movies_by_rank', cursor=cursor, view_reviews_for=movie['rank'])
-        movie['add_review_url'] = url_for('movies_bp.review_on_movie', movie=movie['rank'])
-        movie['reviews'] = services.get_reviews_for_movie(movie['rank'], repo.repo_instance)
-
     # Generate the webpage to display the movies.
-    return render_template(
+    page = render_template(
         'movies/movies.html',
         title='Movies',
         movies_title='Ranked Movies',
-        movies=movies,
-        featured_movies=utilities.get_featured_movies(3),
+        articles=articles,
+        sidebar=SIDEBAR_PLACEHOLDER,
         genre_urls=utilities.get_genres_and_urls(),
         first_movie_url=first_movie_url,
         last_movie_url=last_movie_url,
@@ -77,12 +122,13 @@ def movies_by_rank():
         next_movie_url=next_movie_url,
         show_reviews_for_movie=movie_to_show_reviews
     )
+    cache_page(page_key, page, page_movie_ranks, generation)
+    return page, page_movie_ranks
 
 
 @movies_blueprint.route('/movies_by_genre', methods=['GET'])
+@conditional_get(movies_by_genre_versions)
 def movies_by_genre():
-    movies_per_page = 3
-
     # Read query parameters.
     genre_name = request.args.get('genre')
     cursor = request.args.get('cursor')
@@ -101,11 +147,30 @@ def movies_by_genre():
         # Convert cursor from string to int.
         cursor = int(cursor)
 
+    # Serve the whole page from the fragment cache if an identical page has already been rendered.
+    page_key = ('page', 'movies_by_genre', genre_name, cursor, movie_to_show_reviews)
+    page, page_movie_ranks = get_page(
+        page_key, lambda: render_movies_by_genre(page_key, genre_name, cursor, movie_to_show_reviews)
+    )
+
+    # Count this visitor as a viewer of the genre page and of each movie on it.
+    record_views(page_movie_ranks, genre_name)
+    return page
+
+
+def render_movies_by_genre(page_key, genre_name, cursor, movie_to_show_reviews):
+    movies_per_page = MOVIES_PER_PAGE
+    generation = fragment_cache.cache_instance.generation
+
     # Retrieve movie ranks for movies that have genre genre_name.
-    movie_ranks = services.get_movie_ranks_for_genre(genre_name, repo.repo_instance)
+    movie_ranks = services.get_movie_ranks_for_genre(genre_name, current_repository())
+    page_movie_ranks = movie_ranks[cursor:cursor + movies_per_page]
 
-    # Retrieve the batch of movies to display on the web page.
-    movies = services.get_movies_by_rank(movie_ranks[cursor:cursor + movies_per_page], repo.repo_instance)
+    # Retrieve the rendered movies to display on the web page, with urls for viewing and adding reviews.
+    articles = get_movie_articles(
+        'movies_by_genre', genre_name, cursor, page_movie_ranks, movie_to_show_reviews,
+        lambda rank: url_for('movies_bp.movies_by_genre', genre=genre_name, cursor=cursor, view_reviews_for=rank)
+    )
     first_movie_url = None
     last_movie_url = None
     next_movie_url = None
@@ -124,20 +189,13 @@ def movies_by_genre():
             last_cursor -= movies_per_page
         last_movie_url = url_for('movies_bp.movies_by_genre', genre=genre_name, cursor=last_cursor)
 
-    # Construct urls for viewing movie reviews and adding reviews.
-    for movie in movies:
-        movie['view_review_url'] = url_for('movies_bp.movies_by_genre', genre=genre_name, cursor=cursor,
-                                           view_reviews_for=movie['rank'])
-        movie['add_review_url'] = url_for('movies_bp.review_on_movie', movie=movie['rank'])
-        movie['reviews'] = services.get_reviews_for_movie(movie['rank'], repo.repo_instance)
-
     # Generate the webpage to display the movies.
-    return render_template(
+    page = render_template(
         'movies/movies.html',
         title='Movies',
         movies_title='Movies with genre ' + genre_name,
-        movies=movies,
-        featured_movies=utilities.get_featured_movies(3),
+        articles=articles,
+        sidebar=SIDEBAR_PLACEHOLDER,
         genre_urls=utilities.get_genres_and_urls(),
         first_movie_url=first_movie_url,
         last_movie_url=last_movie_url,
@@ -145,6 +203,8 @@ def movies_by_genre():
         next_movie_url=next_movie_url,
         show_reviews_for_movie=movie_to_show_reviews
     )
+    cache_page(page_key, page, page_movie_ranks, generation, genre_name)
+    return page, page_movie_ranks
 
 
 @movies_blueprint.route('/movie_after_review', methods=['GET'])
@@ -167,15 +227,14 @@ def movie_after_review():
         # Convert movie_rank from string to int.
         movie_rank = int(movie_rank)
 
-    # Retrieve the movie to display on the web page.
-    movie = services.get_movie(movie_rank, repo.repo_instance)
+    # Check that the movie exists.
+    services.get_movie(movie_rank, current_repository())
 
-    # Construct urls for viewing movie reviews and adding reviews.
-    movie['view_review_url'] = url_for('movies_bp.movie_after_review', view_reviews_for=movie['rank'],
-                                       movie_rank=movie['rank'])
-    movie['add_review_url'] = url_for('movies_bp.review_on_movie', movie=movie['rank'])
-    movie['reviews'] = services.get_reviews_for_movie(movie['rank'], repo.repo_instance)
-    movies = [movie]
+    # Retrieve the rendered movie to display on the web page, with urls for viewing and adding reviews.
+    articles = get_movie_articles(
+        'movie_after_review', None, None, [movie_rank], movie_to_show_reviews,
+        lambda rank: url_for('movies_bp.movie_after_review', view_reviews_for=rank, movie_rank=rank)
+    )
     first_movie_url = None
     last_movie_url = None
     next_movie_url = None
@@ -186,7 +245,7 @@ def movie_after_review():
         'movies/movies.html',
         title='Movies',
         movies_title='Thank you for reviewing!',
-        movies=movies,
+        articles=articles,
         featured_movies=utilities.get_featured_movies(3),
         genre_urls=utilities.get_genres_and_urls(),
         first_movie_url=first_movie_url,
@@ -213,11 +272,12 @@ def review_on_movie():
         # Extract the movie rank, representing the reviewed movie, from the form.
         movie_rank = int(form.movie_rank.data)
 
-        # Use the service layer to store the new review.
-        services.add_review(movie_rank, form.review.data, form.rating.data, username, repo.repo_instance)
+        # Use the service layer to store the new review. The repository drops every cached page and fragment that
+        # shows the reviewed movie.
+        services.add_review(movie_rank, form.review.data, form.rating.data, username, current_repository())
 
         # Retrieve the movie in dict form.
-        movie = services.get_movie(movie_rank, repo.repo_instance)
+        movie = services.get_movie(movie_rank, current_repository())
 
         return redirect(url_for('movies_bp.movie_after_review', view_reviews_for=movie_rank, movie_rank=movie_rank))
 
@@ -235,7 +295,7 @@ def review_on_movie():
 
     # For a GET or an unsuccessful POST, retrieve the movie to review in dict form, and return a web page that allows
     # the user to enter a review. The generated web page includes a form object.
-    movie = services.get_movie(movie_rank, repo.repo_instance)
+    movie = services.get_movie(movie_rank, current_repository())
     return render_template(
         'movies/review_on_movie.html',
         title='Review Movie',
@@ -247,6 +307,119 @@ def review_on_movie():
     )
 
 
+def get_movie_articles(route, genre_name, cursor, movie_ranks, movie_to_show_reviews, view_review_url):
+    # Rendered <article> blocks are cached per page position, so only movies missing from the cache are fetched
+    # through the service layer and rendered.
+    cache = fragment_cache.cache_instance
+    generation = cache.generation
+    articles = dict()
+    missing_ranks = list()
+    for rank in movie_ranks:
+        article = cache.get(('article', route, genre_name, cursor, rank, rank == movie_to_show_reviews))
+        if article is None:
+            missing_ranks.append(rank)
+        else:
+            articles[rank] = article
+
+    if len(missing_ranks) > 0:
+        genre_urls = utilities.get_genres_and_urls()
+        for movie in services.get_movies_by_rank(missing_ranks, current_repository()):
+            rank = movie['rank']
+            movie = overlay(
+                movie,
+                view_review_url=view_review_url(rank),
+                add_review_url=url_for('movies_bp.review_on_movie', movie=rank),
+                review_timeline=get_review_timeline(rank, 'newest', None)
+            )
+            article = Markup(render_template(
+                'movies/movie.html',
+                movie=movie,
+                genre_urls=genre_urls,
+                show_reviews_for_movie=movie_to_show_reviews
+            ))
+            cache.put(('article', route, genre_name, cursor, rank, rank == movie_to_show_reviews), article, [rank],
+                      generation)
+            articles[rank] = article
+    return [articles[rank] for rank in movie_ranks if rank in articles]
+
+
+@movies_blueprint.route('/movie_reviews', methods=['GET'])
+def movie_reviews():
+    # An HTML fragment with a page of a movie's reviews, which a movie's article fetches to show more of them or to
+    # change their order. The first page of an order comes with the buttons that change it.
+    try:
+        movie_rank = int(request.args.get('movie'))
+        order = request.args.get('order', 'newest')
+        cursor = request.args.get('cursor')
+        cursor = None if cursor is None else int(cursor)
+    except (TypeError, ValueError):
+        abort(400)
+
+    cache = fragment_cache.cache_instance
+    fragment_key = ('reviews', movie_rank, order, cursor)
+    fragment = cache.get(fragment_key)
+    if fragment is None:
+        generation = cache.generation
+        try:
+            timeline = get_review_timeline(movie_rank, order, cursor)
+        except services.NonExistentMovieException:
+            abort(404)
+        except services.UnknownReviewOrderException:
+            abort(400)
+        fragment = render_template('movies/reviews.html', timeline=timeline)
+        cache.put(fragment_key, fragment, [movie_rank], generation)
+    return fragment
+
+
+def get_review_timeline(movie_rank, order, cursor):
+    # A page of the movie's reviews, with the urls of the page after it and of the first page of each order.
+    timeline = services.get_review_timeline(movie_rank, order, cursor, REVIEWS_PER_PAGE, current_repository())
+    next_cursor = timeline['next_cursor']
+    return overlay(
+        timeline,
+        first_page=cursor is None,
+        orders=[
+            {'name': name, 'url': url_for('movies_bp.movie_reviews', movie=movie_rank, order=other_order),
+             'current': other_order == order}
+            for other_order, name in REVIEW_ORDER_NAMES.items()
+        ],
+        next_page_url=None if next_cursor is None else url_for(
+            'movies_bp.movie_reviews', movie=movie_rank, order=order, cursor=next_cursor)
+    )
+
+
+def get_page(page_key, render):
+    # Whole pages are only shared between anonymous visitors, as the navigation bar greets logged in users by name.
+    if 'username' in session:
+        page, movie_ranks = render()
+    else:
+        cached_page = fragment_cache.cache_instance.get(page_key)
+        if cached_page is None:
+            # Concurrent requests for a page that is not cached wait for one of them to render it.
+            cached_page = page_flights.do(page_key, render)
+        page, movie_ranks = cached_page
+    sidebar = render_template('sidebar.html', featured_movies=utilities.get_featured_movies(3))
+    return page.replace(SIDEBAR_PLACEHOLDER, sidebar, 1), movie_ranks
+
+
+def cache_page(page_key, page, movie_ranks, generation, genre_name=None):
+    # A page listing a genre changes when a movie is added to the genre, as well as when one of its movies changes.
+    if 'username' not in session:
+        dependencies = movie_ranks if genre_name is None else movie_ranks + [fragment_cache.genre_key(genre_name)]
+        fragment_cache.cache_instance.put(page_key, (page, movie_ranks), dependencies, generation)
+
+
+def record_views(movie_ranks, genre_name=None):
+    if warmup.is_warmup_request(request.environ):
+        return
+    # Logged in users are identified by username, anonymous visitors by their address.
+    if 'username' in session:
+        viewer_id = 'user:' + session['username']
+    else:
+        viewer_id = 'address:' + str(request.remote_addr)
+    view_counters.counters_instance.record_views(viewer_id, movie_ranks, genre_name)
+
+
 class ProfanityFree:
     def __init__(self, message=None):
         if not message:
@@ -254,7 +427,7 @@ class ProfanityFree:
         self.message = message
 
     def __call__(self, form, field):
-        if profanity.contains_profanity(field.data):
+        if profanity_filter.filter_instance.contains_profanity(field.data):
             raise ValidationError(self.message)
 
 
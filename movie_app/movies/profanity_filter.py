@@ -0,0 +1,124 @@
+import importlib.util
+import os
+from collections import deque
+from typing import Iterable
+
+# Characters that stand for letters in disguised words, as better_profanity expands them: '@' can be an 'a' or
+# an 'o', and so on.
+LEET_VARIANTS = {
+    'a': ('@', '*', '4'),
+    'i': ('*', 'l', '1'),
+    'o': ('*', '0', '@'),
+    'u': ('*', 'v'),
+    'v': ('*', 'u'),
+    'l': ('1',),
+    'e': ('*', '3'),
+    's': ('$', '5'),
+    't': ('7',)
+}
+
+# Characters that, besides letters and digits, belong to words.
+WORD_SYMBOLS = set('@$*"\'')
+
+SEPARATOR = ' '
+# Stands for the word characters that no listed word uses.
+OTHER = ''
+
+
+class ProfanityFilter:
+    """ Finds whole words and phrases of a word list in text, ignoring case and seeing through letters disguised
+    as digits or symbols (LEET_VARIANTS).
+
+    The word list is compiled once into a deterministic automaton: an Aho-Corasick trie whose states are sets of
+    trie nodes, as a disguised character can stand for several letters. Words only match at word boundaries, so
+    the trie restarts at each separator instead of following failure links. contains_profanity then reads each
+    character of the text once, with two dict lookups, however long the word list.
+    """
+
+    def __init__(self, words: Iterable[str]):
+        # Phrases match whatever separators join their words.
+        patterns = {SEPARATOR.join(word.lower().split()) + SEPARATOR for word in words if word.strip() != ''}
+        trie = [dict()]
+        accepting_nodes = set()
+        for pattern in patterns:
+            node = 0
+            for char in pattern:
+                if char not in trie[node]:
+                    trie[node][char] = len(trie)
+                    trie.append(dict())
+                node = trie[node][char]
+            accepting_nodes.add(node)
+
+        # Each character of the text stands for itself and the letters it can disguise.
+        meanings = {char: {char} for node in trie for char in node}
+        for letter, variants in LEET_VARIANTS.items():
+            for variant in variants:
+                meanings.setdefault(variant, {variant}).add(letter)
+        symbols_meaning = dict()
+        for symbol, chars in meanings.items():
+            for char in chars:
+                symbols_meaning.setdefault(char, []).append(symbol)
+        self.__symbols = {char: char for char in meanings}
+
+        # Subset construction. A symbol missing from a state's transitions leads to the dead state, which only a
+        # separator leaves; a separator also leads back to the root, where words start.
+        dead = frozenset()
+        states = {dead: 0, frozenset([0]): 1}
+        self.__transitions = [dict(), dict()]
+        self.__accepting = [False, False]
+        queue = deque(states)
+        while queue:
+            state = queue.popleft()
+            targets = {SEPARATOR: {0}}
+            for node in state:
+                for char, child in trie[node].items():
+                    for symbol in symbols_meaning[char]:
+                        targets.setdefault(symbol, set()).add(child)
+            transitions = self.__transitions[states[state]]
+            for symbol, nodes in targets.items():
+                target = frozenset(nodes)
+                if target not in states:
+                    states[target] = len(self.__transitions)
+                    self.__transitions.append(dict())
+                    self.__accepting.append(any(node in accepting_nodes for node in target))
+                    queue.append(target)
+                transitions[symbol] = states[target]
+        self.__start = states[frozenset([0])]
+
+    @property
+    def state_count(self) -> int:
+        return len(self.__transitions)
+
+    def contains_profanity(self, text: str) -> bool:
+        symbols = self.__symbols
+        transitions = self.__transitions
+        accepting = self.__accepting
+        state = self.__start
+        after_separator = True
+        for char in text.lower() + SEPARATOR:
+            symbol = symbols.get(char)
+            if symbol is None:
+                symbol = OTHER if char.isalnum() or char in WORD_SYMBOLS else SEPARATOR
+            if symbol == SEPARATOR:
+                # A run of separators is one separator.
+                if after_separator:
+                    continue
+                after_separator = True
+            else:
+                after_separator = False
+            state = transitions[state].get(symbol, 0)
+            if accepting[state]:
+                return True
+        return False
+
+
+def load_default_words() -> list:
+    """ Returns better_profanity's word list, without importing better_profanity, which expands every word into
+    all its disguises on import.
+    """
+    package_path = importlib.util.find_spec('better_profanity').submodule_search_locations[0]
+    with open(os.path.join(package_path, 'profanity_wordlist.txt'), encoding='utf-8') as wordlist_file:
+        return [line.strip() for line in wordlist_file if line.strip() != '']
+
+
+filter_instance = ProfanityFilter(load_default_words())
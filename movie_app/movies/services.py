@@ -1,6 +1,8 @@
 from typing import List, Iterable
-from movie_app.adapters.repository import AbstractRepository
+from movie_app.adapters.repository import AbstractRepository, REVIEW_ORDERS
 from movie_app.domain.model import Director, Genre, Actor, Movie, Review, User, WatchList
+import movie_app.caching.view_models as view_models
+from movie_app.caching.service_cache import cached
 
 
 class NonExistentMovieException(Exception):
@@ -11,6 +13,10 @@ class UnknownUserException(Exception):
     pass
 
 
+class UnknownReviewOrderException(Exception):
+    pass
+
+
 def add_review(movie_rank: int, review_text: str, rating: int, username: str, repo: AbstractRepository):
     # Check that the movie exists.
     movie = repo.get_movie(movie_rank)
@@ -31,19 +37,20 @@ def get_movie(movie_rank: int, repo: AbstractRepository):
     movie = repo.get_movie(movie_rank)
     if movie is None:
         raise NonExistentMovieException
-    return movie_to_dict(movie)
+    return movie_view_model(movie, repo)
 
 
 def get_first_movie(repo: AbstractRepository):
     movie = repo.get_first_movie()
-    return movie_to_dict(movie)
+    return movie_view_model(movie, repo)
 
 
 def get_last_movie(repo: AbstractRepository):
     movie = repo.get_last_movie()
-    return movie_to_dict(movie)
+    return movie_view_model(movie, repo)
 
 
+@cached('genre_movie_ranks')
 def get_movie_ranks_for_genre(genre_name: str, repo: AbstractRepository):
     movie_ranks = repo.get_movie_ranks_for_genre(genre_name)
     return movie_ranks
@@ -51,20 +58,36 @@ def get_movie_ranks_for_genre(genre_name: str, repo: AbstractRepository):
 
 def get_movies_by_rank(rank_list, repo: AbstractRepository):
     movies = repo.get_movies_by_rank(rank_list)
-    movies_as_dict = movies_to_dict(movies)
+    movies_as_dict = [movie_view_model(movie, repo) for movie in movies]
     return movies_as_dict
 
 
+@cached('movie_reviews', version=lambda movie_rank, repo: repo.get_movie_version(movie_rank))
 def get_reviews_for_movie(movie_rank, repo: AbstractRepository):
     movie = repo.get_movie(movie_rank)
     if movie is None:
         raise NonExistentMovieException
-    reviews = repo.get_reviews()
-    review_list = []
-    for review in reviews:
-        if review.movie == movie:
-            review_list.append(review)
-    return reviews_to_dict(review_list)
+    reviews = repo.get_reviews_for_movie(movie_rank)
+    return reviews_to_dict(reviews)
+
+
+@cached('review_timelines', version=lambda movie_rank, order, cursor, limit, repo: repo.get_movie_version(movie_rank))
+def get_review_timeline(movie_rank: int, order: str, cursor, limit: int, repo: AbstractRepository):
+    """ Returns a page of up to limit reviews of the movie, in order, following the review identified by cursor
+    (None for the first page), along with the cursor of the next page (None after the last page) and the number of
+    reviews of the movie.
+    """
+    if order not in REVIEW_ORDERS:
+        raise UnknownReviewOrderException
+    if repo.get_movie(movie_rank) is None:
+        raise NonExistentMovieException
+    # One review more than the page shows tells whether there is a next page.
+    page = repo.get_review_timeline(movie_rank, order, cursor, limit + 1)
+    return {
+        'reviews': reviews_to_dict(review for _, review in page[:limit]),
+        'next_cursor': page[limit - 1][0] if len(page) > limit else None,
+        'review_count': repo.get_number_of_reviews_for_movie(movie_rank)
+    }
 
 
 # ============================================
@@ -92,6 +115,11 @@ def movies_to_dict(movies: Iterable[Movie]):
     return [movie_to_dict(movie) for movie in movies]
 
 
+def movie_view_model(movie: Movie, repo: AbstractRepository):
+    # Read-only movie_to_dict result, shared between requests until the movie's repository version changes.
+    return view_models.cache_instance.get('movie', movie, repo, movie_to_dict)
+
+
 def review_to_dict(review: Review):
     review_dict = {
         'movie_rank': review.movie.rank,
@@ -0,0 +1,76 @@
+import hashlib
+import math
+
+
+def hash_value(value) -> int:
+    # 64-bit hash that is stable across processes (unlike hash(), which is salted per interpreter).
+    return int.from_bytes(hashlib.blake2b(str(value).encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+class HyperLogLog:
+
+    def __init__(self, precision: int = 12):
+        if type(precision) is not int or precision < 4 or precision > 16:
+            raise ValueError("Precision must be an integer between 4 and 16")
+        self.__precision = precision
+        self.__registers = bytearray(1 << precision)
+
+    @property
+    def precision(self) -> int:
+        return self.__precision
+
+    @property
+    def registers(self) -> bytearray:
+        return self.__registers
+
+    def __repr__(self):
+        return f"<HyperLogLog p={self.__precision}, ~{self.count()}>"
+
+    def add(self, value):
+        self.add_hash(hash_value(value))
+
+    def add_hash(self, hashed: int):
+        # The first p bits select a register, the remaining bits supply the run of leading zeros.
+        remaining_bits = 64 - self.__precision
+        index = hashed >> remaining_bits
+        rho = remaining_bits - (hashed & ((1 << remaining_bits) - 1)).bit_length() + 1
+        if rho > self.__registers[index]:
+            self.__registers[index] = rho
+
+    def count(self) -> int:
+        m = len(self.__registers)
+        if m == 16:
+            alpha = 0.673
+        elif m == 32:
+            alpha = 0.697
+        elif m == 64:
+            alpha = 0.709
+        else:
+            alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0 ** -register for register in self.__registers)
+
+        # Small range correction: fall back to linear counting while registers are still empty.
+        empty_registers = self.__registers.count(0)
+        if estimate <= 2.5 * m and empty_registers > 0:
+            estimate = m * math.log(m / empty_registers)
+        return int(round(estimate))
+
+    def merge(self, other):
+        if not isinstance(other, HyperLogLog):
+            raise Exception("Only HyperLogLogs can be merged")
+        if other.precision != self.__precision:
+            raise ValueError("HyperLogLogs must have the same precision to be merged")
+        # Merging takes the register-wise maximum, so it is idempotent and order independent.
+        self.__registers[:] = bytearray(map(max, self.__registers, other.registers))
+
+    def to_bytes(self) -> bytes:
+        return bytes(self.__registers)
+
+    @classmethod
+    def from_bytes(cls, data: bytes):
+        precision = len(data).bit_length() - 1
+        if len(data) != 1 << precision:
+            raise ValueError("Register data length must be a power of two")
+        hll = cls(precision)
+        hll.__registers = bytearray(data)
+        return hll
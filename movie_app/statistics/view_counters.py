@@ -0,0 +1,164 @@
+import base64
+import glob
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Iterable, List
+from movie_app.statistics.hyperloglog import HyperLogLog, hash_value
+
+
+counters_instance = None
+
+
+class ViewCounters:
+    """ Approximate distinct-viewer counts for movie and genre pages.
+
+    Every key holds a HyperLogLog sketch, so memory per key is fixed (2 ** precision bytes) no matter how many
+    viewers are seen. When snapshot_dir is set, each process periodically writes its sketches to its own file and
+    merges in the files written by its siblings, on a background thread rather than a request's. Merging is a
+    register-wise maximum, so re-merging a snapshot that has already been merged never over-counts. A file that has
+    not been rewritten for STALE_INTERVALS intervals was left by a process that has stopped, e.g. a worker replaced
+    after max_requests; it is deleted once its counts are saved in the file of the process that merged it.
+    """
+
+    SNAPSHOT_PREFIX = 'view_counters-'
+    STALE_INTERVALS = 3
+
+    def __init__(self, precision: int = 12, snapshot_dir: str = None, snapshot_interval: int = 60):
+        self.__precision = precision
+        self.__snapshot_dir = snapshot_dir
+        self.__snapshot_interval = snapshot_interval
+        self.__counters = dict()
+        self.__snapshot_lock = threading.Lock()
+        self.__stopped = threading.Event()
+        self.__snapshotter = None
+
+    @property
+    def snapshot_path(self) -> str:
+        if self.__snapshot_dir is None:
+            return None
+        return os.path.join(self.__snapshot_dir, f'{self.SNAPSHOT_PREFIX}{os.getpid()}.json')
+
+    def __counter(self, key) -> HyperLogLog:
+        counter = self.__counters.get(key)
+        if counter is None:
+            # setdefault is atomic, so concurrent first views of a key end up sharing one sketch.
+            counter = self.__counters.setdefault(key, HyperLogLog(self.__precision))
+        return counter
+
+    def record_views(self, viewer_id, movie_ranks: Iterable[int], genre_name: str = None):
+        # Hash the viewer once and reuse it for every sketch touched by this page view.
+        hashed = hash_value(viewer_id)
+        for rank in movie_ranks:
+            self.__counter(('movie', rank)).add_hash(hashed)
+        if genre_name is not None:
+            self.__counter(('genre', genre_name)).add_hash(hashed)
+
+    def unique_viewers_for_movie(self, rank: int) -> int:
+        counter = self.__counters.get(('movie', rank))
+        return 0 if counter is None else counter.count()
+
+    def unique_viewers_for_genre(self, genre_name: str) -> int:
+        counter = self.__counters.get(('genre', genre_name))
+        return 0 if counter is None else counter.count()
+
+    def merge(self, other):
+        if not isinstance(other, ViewCounters):
+            raise Exception("Only ViewCounters can be merged")
+        for key, counter in list(other.__counters.items()):
+            self.__counter(key).merge(counter)
+
+    def start_snapshotting(self):
+        """ Takes a snapshot every snapshot_interval seconds on a background thread, if snapshot_dir is set. """
+        if self.__snapshot_dir is None or self.__snapshot_interval <= 0:
+            return
+        if self.__snapshotter is None or not self.__snapshotter.is_alive():
+            self.__stopped.clear()
+            self.__snapshotter = threading.Thread(target=self.__snapshot_periodically, name='view-counter-snapshots',
+                                                  daemon=True)
+            self.__snapshotter.start()
+
+    def stop_snapshotting(self):
+        self.__stopped.set()
+
+    def after_fork(self):
+        """ Restarts the snapshot thread in a forked process, which inherits no threads. """
+        self.__snapshotter = None
+        self.__snapshot_lock = threading.Lock()
+        self.start_snapshotting()
+
+    def snapshot(self):
+        """ Merges the siblings' snapshots, saves this process's own, then deletes the stale snapshots it merged. """
+        if self.__snapshot_dir is None:
+            return
+        with self.__snapshot_lock:
+            stale_paths = self.merge_snapshots()
+            self.save_snapshot()
+            for path in stale_paths:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass    # Already deleted by a sibling.
+
+    def __snapshot_periodically(self):
+        while not self.__stopped.wait(self.__snapshot_interval):
+            try:
+                self.snapshot()
+            except OSError:
+                pass    # Tried again at the next interval.
+
+    def save_snapshot(self, path: str = None):
+        path = path if path is not None else self.snapshot_path
+        if path is None:
+            return
+        counters = {
+            encode_key(key): base64.b64encode(counter.to_bytes()).decode('ascii')
+            for key, counter in list(self.__counters.items())
+        }
+        directory = os.path.dirname(path) or '.'
+        os.makedirs(directory, exist_ok=True)
+
+        # Write to a temporary file and rename it, so readers never see a partially written snapshot.
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-', suffix='.json')
+        with os.fdopen(fd, 'w', encoding='utf-8') as snapshot_file:
+            json.dump({'precision': self.__precision, 'counters': counters}, snapshot_file)
+        os.replace(temp_path, path)
+
+    def load_snapshot(self, path: str):
+        with open(path, mode='r', encoding='utf-8') as snapshot_file:
+            snapshot = json.load(snapshot_file)
+        if snapshot['precision'] != self.__precision:
+            raise ValueError("Snapshot precision does not match these counters")
+        for key, registers in snapshot['counters'].items():
+            self.__counter(decode_key(key)).merge(HyperLogLog.from_bytes(base64.b64decode(registers)))
+
+    def merge_snapshots(self) -> List[str]:
+        """ Merges every worker's snapshot, including this process's own from before a restart, and returns the paths
+        of those merged that are stale.
+        """
+        if self.__snapshot_dir is None:
+            return []
+        stale_before = time.time() - self.STALE_INTERVALS * self.__snapshot_interval
+        stale_paths = []
+        for path in glob.glob(os.path.join(self.__snapshot_dir, f'{self.SNAPSHOT_PREFIX}*.json')):
+            try:
+                self.load_snapshot(path)
+                if path != self.snapshot_path and os.path.getmtime(path) < stale_before:
+                    stale_paths.append(path)
+            except (OSError, KeyError, ValueError):
+                pass  # Ignore snapshots that are unreadable or from a differently configured worker.
+        return stale_paths
+
+
+def encode_key(key) -> str:
+    kind, name = key
+    return f'{kind}:{name}'
+
+
+def decode_key(encoded_key: str):
+    kind, name = encoded_key.split(':', 1)
+    if kind == 'movie':
+        return kind, int(name)
+    return kind, name
@@ -1,9 +1,12 @@
 from typing import Iterable
 from movie_app.adapters.repository import AbstractRepository
 from movie_app.domain.model import Movie
+import movie_app.caching.view_models as view_models
+from movie_app.caching.service_cache import cached
 import random
 
 
+@cached('genre_names')
 def get_genre_names(repo: AbstractRepository):
     genres = repo.get_genres()
     genre_names = [genre.genre_name for genre in genres]
@@ -19,7 +22,7 @@ def get_random_movies(quantity, repo: AbstractRepository):
     # Pick distinct and random movies.
     random_ranks = random.sample(range(1, movie_count), quantity)
     movies = repo.get_movies_by_rank(random_ranks)
-    return movies_to_dict(movies)
+    return [movie_view_model(movie, repo) for movie in movies]
 
 
 # ============================================
@@ -37,3 +40,8 @@ def movie_to_dict(movie: Movie):
 
 def movies_to_dict(movies: Iterable[Movie]):
     return [movie_to_dict(movie) for movie in movies]
+
+
+def movie_view_model(movie: Movie, repo: AbstractRepository):
+    # Read-only movie_to_dict result, shared between requests until the movie's repository version changes.
+    return view_models.cache_instance.get('featured', movie, repo, movie_to_dict)
@@ -0,0 +1,51 @@
+import gzip
+from flask import current_app, request
+
+
+GZIP_ETAG_SUFFIX = '-gzip'
+
+COMPRESSIBLE_MIMETYPES = {
+    'text/html', 'text/css', 'text/plain', 'text/csv', 'text/javascript', 'application/javascript',
+    'application/json', 'application/x-ndjson', 'image/svg+xml', 'image/x-icon', 'image/vnd.microsoft.icon'
+}
+
+
+def init_app(app):
+    app.after_request(compress_response)
+
+
+def accepts_gzip() -> bool:
+    return request.accept_encodings.quality('gzip') > 0
+
+
+def is_compressible(mimetype: str) -> bool:
+    return mimetype in COMPRESSIBLE_MIMETYPES
+
+
+def gzip_etag(etag: str) -> str:
+    # A compressed body is a different representation, so it needs its own strong ETag.
+    return etag + GZIP_ETAG_SUFFIX
+
+
+def compress_response(response):
+    if not is_compressible(response.mimetype):
+        return response
+    response.vary.add('Accept-Encoding')
+
+    # Leave alone responses that are already encoded, streamed or served straight from a file.
+    if (response.status_code != 200 or response.direct_passthrough or response.is_streamed or
+            'Content-Encoding' in response.headers or not accepts_gzip()):
+        return response
+
+    data = response.get_data()
+    if len(data) < current_app.config.get('COMPRESSION_MIN_SIZE', 500):
+        # Small bodies fit in a packet anyway, so compressing them only costs CPU time.
+        return response
+
+    # No modification time in the gzip header, so the same body always compresses to the same bytes under its ETag.
+    response.set_data(gzip.compress(data, compresslevel=current_app.config.get('COMPRESSION_LEVEL', 6), mtime=0))
+    response.headers['Content-Encoding'] = 'gzip'
+    etag, weak = response.get_etag()
+    if etag is not None:
+        response.set_etag(gzip_etag(etag), weak)
+    return response
@@ -0,0 +1,19 @@
+from flask import g, has_app_context
+import movie_app.adapters.repository as repo
+
+
+def init_app(app):
+    app.before_request(pin_repository)
+
+
+def pin_repository():
+    # Every repository call of a request goes to the repository that was current when the request started, even if
+    # a reload swaps in another one meanwhile.
+    g.repository = repo.repo_instance
+
+
+def current_repository():
+    """ Returns the repository pinned to the current request, or repo.repo_instance outside requests. """
+    if has_app_context() and 'repository' in g:
+        return g.repository
+    return repo.repo_instance
@@ -0,0 +1,58 @@
+import gc
+import movie_app.adapters.reloader as reloader
+import movie_app.adapters.replication as replication
+import movie_app.adapters.repository as repo
+import movie_app.authentication.password_hashing as password_hashing
+import movie_app.caching.service_cache as service_cache
+import movie_app.statistics.view_counters as view_counters
+from movie_app.adapters.sqlite_repository import SqliteRepository
+
+
+def shared_repository_problem(config) -> str:
+    """ Returns why the processes that write users, reviews and watchlists would not all share them, or None if they
+    write to one shared repository.
+    """
+    if config.get('REPOSITORY', 'memory') == 'sqlite':
+        return None
+    if config.get('JOURNAL_DIR'):
+        return 'JOURNAL_DIR is written by a single process; use REPLICATION_DATABASE instead, which also keeps ' \
+               'user data across restarts'
+    if not config.get('REPLICATION_DATABASE'):
+        return 'each process keeps its own user data; set REPOSITORY=sqlite or REPLICATION_DATABASE'
+    return None
+
+
+def check_workers(config, workers: int):
+    """ Raises ValueError if workers worker processes would not share their users, reviews and watchlists. """
+    problem = shared_repository_problem(config) if workers > 1 else None
+    if problem is not None:
+        raise ValueError(f'{workers} worker processes cannot share user data: {problem}, or SERVER_WORKERS=1')
+
+
+def prepare_for_fork(app):
+    """ Readies an app whose repository is loaded to be shared by worker processes forked from this one. """
+    # Everything loaded so far lives as long as the process. Frozen objects are left out of every collection, so
+    # the collector neither spends time scanning them nor writes to their pages, which would copy pages that
+    # forked workers otherwise share.
+    gc.collect()
+    gc.freeze()
+    threshold = app.config.get('GC_GEN0_THRESHOLD', 0)
+    if threshold > 0:
+        gc.set_threshold(threshold, *gc.get_threshold()[1:])
+
+
+def after_fork():
+    """ Called in each worker process as soon as it is forked. """
+    repo.reseed_versions()
+    # SQLite connections must not be used by two processes, so each worker opens its own.
+    if isinstance(repo.repo_instance, SqliteRepository):
+        repo.repo_instance.after_fork()
+    if replication.replicator_instance is not None:
+        replication.replicator_instance.after_fork()
+    if reloader.reloader_instance is not None:
+        reloader.reloader_instance.after_fork()
+    if service_cache.caches_instance is not None:
+        service_cache.caches_instance.after_fork()
+    password_hashing.hasher_instance.after_fork()
+    if view_counters.counters_instance is not None:
+        view_counters.counters_instance.after_fork()
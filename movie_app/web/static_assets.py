@@ -0,0 +1,89 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+import threading
+from flask import current_app, request, safe_join
+from werkzeug.exceptions import NotFound
+from movie_app.web.compression import accepts_gzip, is_compressible, gzip_etag
+
+
+# One year: fingerprinted URLs change whenever the file content changes, so they can be cached forever.
+FINGERPRINTED_MAX_AGE = 31536000
+
+_fingerprints = dict()
+_precompressed = dict()
+_lock = threading.Lock()
+
+
+def init_app(app):
+    app.url_defaults(add_static_fingerprint)
+    app.view_functions['static'] = serve_static
+
+
+def add_static_fingerprint(endpoint, values):
+    # Give every url_for('static', filename=...) a content-hash query parameter.
+    if endpoint == 'static' and 'filename' in values and 'v' not in values:
+        fingerprint = get_fingerprint(values['filename'])
+        if fingerprint is not None:
+            values['v'] = fingerprint
+
+
+def static_path(filename: str) -> str:
+    return safe_join(current_app.static_folder, filename)
+
+
+def get_fingerprint(filename: str) -> str:
+    path = static_path(filename)
+    try:
+        modified_time = os.stat(path).st_mtime
+    except (OSError, TypeError):
+        return None
+    cached = _fingerprints.get(path)
+    if cached is None or cached[0] != modified_time:
+        with open(path, mode='rb') as static_file:
+            cached = (modified_time, hashlib.blake2b(static_file.read(), digest_size=6).hexdigest())
+        _fingerprints[path] = cached
+    return cached[1]
+
+
+def get_precompressed(path: str):
+    # Each static file is gzipped once (and again only if it changes on disk), not on every request.
+    modified_time = os.stat(path).st_mtime
+    cached = _precompressed.get(path)
+    if cached is None or cached[0] != modified_time:
+        with _lock:
+            cached = _precompressed.get(path)
+            if cached is None or cached[0] != modified_time:
+                with open(path, mode='rb') as static_file:
+                    data = static_file.read()
+                compressed = gzip.compress(data, compresslevel=9, mtime=0)
+                etag = gzip_etag(hashlib.blake2b(data, digest_size=16).hexdigest())
+                cached = (modified_time, compressed, etag, len(data))
+                _precompressed[path] = cached
+    return cached
+
+
+def serve_static(filename):
+    path = static_path(filename)
+    if path is None or not os.path.isfile(path):
+        raise NotFound()
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+
+    response = None
+    if is_compressible(mimetype) and accepts_gzip():
+        modified_time, compressed, etag, original_size = get_precompressed(path)
+        if original_size >= current_app.config.get('COMPRESSION_MIN_SIZE', 500):
+            response = current_app.response_class(compressed, mimetype=mimetype)
+            response.headers['Content-Encoding'] = 'gzip'
+            response.set_etag(etag)
+            response.last_modified = modified_time
+    if response is None:
+        response = current_app.send_static_file(filename)
+    if is_compressible(mimetype):
+        response.vary.add('Accept-Encoding')
+
+    if request.args.get('v') is not None and request.args.get('v') == get_fingerprint(filename):
+        response.headers['Cache-Control'] = f'public, max-age={FINGERPRINTED_MAX_AGE}, immutable'
+        response.headers.pop('Expires', None)
+    return response.make_conditional(request)
@@ -0,0 +1,137 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from flask import url_for
+import movie_app.adapters.repository as repo
+import movie_app.statistics.view_counters as view_counters
+import movie_app.utilities.services as utilities_services
+from movie_app.api.api import json_response
+from movie_app.api.json_encoding import dumps
+
+# Marks the requests made by the warm-up, which are not visits.
+WARMUP_ENVIRON_KEY = 'movie_app.warmup'
+
+# Movies whose featured view models are built by one warm-up task.
+FEATURED_CHUNK_SIZE = 500
+
+
+class Readiness:
+    """ Tells a load balancer whether the process has finished warming its caches. """
+
+    def __init__(self):
+        self.__ready = threading.Event()
+        self.__status = {
+            'ready': False,
+            'started': None,
+            'seconds': None,
+            'warmed': 0,
+            'skipped': 0,
+            'errors': 0
+        }
+
+    @property
+    def ready(self) -> bool:
+        return self.__ready.is_set()
+
+    def start(self):
+        self.__status['started'] = datetime.utcnow().replace(microsecond=0).isoformat()
+
+    def finish(self, **results):
+        self.__status.update(results, ready=True)
+        self.__ready.set()
+
+    def wait(self, timeout: float = None) -> bool:
+        return self.__ready.wait(timeout)
+
+    def status(self) -> dict:
+        return dict(self.__status)
+
+
+# Set by init_app.
+readiness_instance = None
+
+
+def init_app(app):
+    global readiness_instance
+    readiness_instance = Readiness()
+    app.add_url_rule('/ready', 'ready', ready)
+    if not app.config.get('WARMUP', False):
+        readiness_instance.finish()
+    elif app.config.get('WARMUP_IN_BACKGROUND', False):
+        threading.Thread(target=warm_up, args=(app, readiness_instance), name='warm-up', daemon=True).start()
+    else:
+        warm_up(app, readiness_instance)
+
+
+def ready():
+    # 503 until the caches are warm, so a load balancer sends no traffic to a cold process.
+    status = readiness_instance.status()
+    return json_response(dumps(status), 200 if status['ready'] else 503)
+
+
+def warm_up(app, readiness: Readiness):
+    """ Requests the most visited pages through the test client, filling the fragment, view-model and service
+    caches, on WARMUP_THREADS threads. Pages not started within WARMUP_BUDGET seconds are skipped.
+    """
+    readiness.start()
+    start = time.perf_counter()
+    deadline = start + app.config.get('WARMUP_BUDGET', 10)
+    tasks = warmup_tasks(app)
+    outcomes = []
+    local = threading.local()
+
+    def run(task):
+        if time.perf_counter() >= deadline:
+            outcomes.append('skipped')
+            return
+        if not hasattr(local, 'client'):
+            local.client = app.test_client()
+        try:
+            task(local.client)
+            outcomes.append('warmed')
+        except Exception:
+            outcomes.append('errors')
+
+    with ThreadPoolExecutor(max_workers=app.config.get('WARMUP_THREADS', 4), thread_name_prefix='warm-up') as pool:
+        for _ in pool.map(run, tasks):
+            pass
+    readiness.finish(
+        seconds=round(time.perf_counter() - start, 3),
+        warmed=outcomes.count('warmed'),
+        skipped=outcomes.count('skipped'),
+        errors=outcomes.count('errors')
+    )
+
+
+def warmup_tasks(app) -> list:
+    # Hottest first: the home page, the first page of movies, then the genre pages by number of unique viewers.
+    with app.test_request_context():
+        paths = [url_for('home_bp.home'), url_for('movies_bp.movies_by_rank')]
+        counters = view_counters.counters_instance
+        genre_names = sorted(utilities_services.get_genre_names(repo.repo_instance),
+                             key=lambda genre_name: -counters.unique_viewers_for_genre(genre_name))
+        paths += [url_for('movies_bp.movies_by_genre', genre=genre_name) for genre_name in genre_names]
+    tasks = [lambda client, path=path: get(client, path) for path in paths]
+
+    # The featured sidebar shows random movies, so their view models are built for the whole catalog.
+    movie_count = repo.repo_instance.get_number_of_movies()
+    for first_rank in range(1, movie_count + 1, FEATURED_CHUNK_SIZE):
+        ranks = list(range(first_rank, min(first_rank + FEATURED_CHUNK_SIZE, movie_count + 1)))
+        tasks.append(lambda client, ranks=ranks: build_featured_view_models(ranks))
+    return tasks
+
+
+def get(client, path: str):
+    response = client.get(path, environ_base={WARMUP_ENVIRON_KEY: True})
+    if response.status_code != 200:
+        raise RuntimeError(f'GET {path} answered {response.status_code}')
+
+
+def build_featured_view_models(ranks: list):
+    for movie in repo.repo_instance.get_movies_by_rank(ranks):
+        utilities_services.movie_view_model(movie, repo.repo_instance)
+
+
+def is_warmup_request(environ) -> bool:
+    return environ.get(WARMUP_ENVIRON_KEY, False)
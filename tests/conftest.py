@@ -3,6 +3,8 @@ import pytest
 from movie_app import create_app
 from movie_app.adapters import memory_repository
 from movie_app.adapters.memory_repository import MemoryRepository
+from movie_app.adapters import sqlite_repository
+from movie_app.adapters.sqlite_repository import SqliteRepository
 
 TEST_DATA_PATH = os.path.join('C:', os.sep, 'Users', 'neoxb', 'Documents', 'CS235Flix', 'tests', 'data')
 
@@ -14,6 +16,14 @@ def in_memory_repo():
     return repo
 
 
+@pytest.fixture
+def sqlite_repo():
+    repo = SqliteRepository(':memory:')
+    sqlite_repository.populate(TEST_DATA_PATH, repo)
+    yield repo
+    repo.close()
+
+
 @pytest.fixture
 def client():
     my_app = create_app({
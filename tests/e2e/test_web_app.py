@@ -1,5 +1,25 @@
+import csv
+import gc
+import gzip
+import io
+import json
+import re
 import pytest
 from flask import session
+from movie_app import create_app
+from movie_app.adapters import memory_repository, reloader
+from movie_app.adapters import repository as repo
+from movie_app.adapters.memory_repository import MemoryRepository
+from movie_app.adapters.replication import Replicator
+from movie_app.api import services as api_services
+from movie_app.authentication import password_hashing
+from movie_app.authentication.password_hashing import PasswordHashingBusyException
+from movie_app.caching import fragment_cache
+from movie_app.movies import services as movies_services
+from movie_app.statistics import view_counters
+from movie_app.utilities import utilities
+from movie_app.web import prefork, warmup
+from tests.conftest import TEST_DATA_PATH
 
 
 def test_register(client):
@@ -110,6 +130,28 @@ def test_movies_with_review(client):
     assert b'GOTG is my new favourite movie of all time!' in response.data
 
 
+def test_movie_reviews_fragment_pages_through_reviews(client, auth):
+    auth.login()
+    for rating in range(1, 13):
+        client.post('/review', data={'review': f'Review number {rating}', 'rating': min(rating, 10), 'movie_rank': 2})
+
+    # The page shows the newest reviews, and a button that fetches the next ones.
+    response = client.get('/movie_after_review?view_reviews_for=2&movie_rank=2')
+    assert b'12 Reviews' in response.data
+    assert b'Review number 12' in response.data and b'Review number 2,' not in response.data
+    assert b'/movie_reviews?movie=2&amp;order=newest&amp;cursor=' in response.data
+
+    response = client.get('/movie_reviews?movie=2&order=top_rated')
+    assert response.status_code == 200
+    assert b'Top rated' in response.data and b'Review number 1,' not in response.data
+    cursor = response.data.split(b'cursor=')[1].split(b"'")[0].decode()
+    response = client.get(f'/movie_reviews?movie=2&order=top_rated&cursor={cursor}')
+    assert b'Review number 1,' in response.data and b'Top rated' not in response.data
+
+    assert client.get('/movie_reviews?movie=2&order=oldest').status_code == 400
+    assert client.get('/movie_reviews?movie=0').status_code == 404
+
+
 def test_movies_with_genre(client):
     # Check that we can retrieve the movies page.
     response = client.get('/movies_by_genre?genre=Action')
@@ -120,3 +162,372 @@ def test_movies_with_genre(client):
     assert b'Guardians of the Galaxy' in response.data
     assert b'Suicide Squad' in response.data
     assert b'The Great Wall' in response.data
+
+
+def test_movies_pages_count_unique_viewers(client, auth):
+    client.get('/movies_by_genre?genre=Action')
+    client.get('/movies_by_genre?genre=Action')
+    auth.login()
+    client.get('/movies_by_rank')
+
+    counters = view_counters.counters_instance
+    assert counters.unique_viewers_for_genre('Action') == 1
+    assert counters.unique_viewers_for_movie(1) == 2
+
+
+def test_cached_movies_page_shows_new_review(client, auth):
+    # Render and cache the page as an anonymous visitor.
+    response = client.get('/movies_by_genre?genre=Action&cursor=0&view_reviews_for=1')
+    assert b'What a ride!' not in response.data
+    response = client.get('/movies_by_genre?genre=Action&cursor=0&view_reviews_for=1')
+    assert fragment_cache.cache_instance.stats()['hits'] > 0
+
+    # Review a movie shown on the cached page.
+    auth.login()
+    client.post('/review', data={'review': 'What a ride!', 'rating': 9, 'movie_rank': 1})
+    client.get('/authentication/logout')
+
+    # Check that the cached page has been invalidated.
+    response = client.get('/movies_by_genre?genre=Action&cursor=0&view_reviews_for=1')
+    assert b'What a ride!' in response.data
+
+
+def test_cached_movies_page_gets_a_new_sidebar_per_request(client, monkeypatch):
+    client.get('/movies_by_rank')
+    monkeypatch.setattr(utilities, 'get_featured_movies', lambda quantity=3: [{'title': 'Sidebar pick',
+                                                                              'release_year': 2000}])
+    response = client.get('/movies_by_rank')
+    assert fragment_cache.cache_instance.stats()['hits'] > 0
+    assert b'Sidebar pick, (2000)' in response.data
+    assert b'<!-- sidebar -->' not in response.data
+
+
+def test_review_added_outside_the_views_drops_cached_pages(client):
+    client.get('/movies_by_rank?view_reviews_for=1')
+    movies_services.add_review(1, 'Added by a service.', 7, 'nton939', repo.repo_instance)
+    assert b'Added by a service.' in client.get('/movies_by_rank?view_reviews_for=1').data
+
+
+@pytest.mark.parametrize('url', ('/', '/movies_by_rank?cursor=3', '/movies_by_genre?genre=Action'))
+def test_catalog_pages_answer_conditional_get(client, url):
+    response = client.get(url)
+    assert response.status_code == 200
+    etag = response.headers['ETag']
+    # The featured movies in the sidebar differ between responses, so the ETag is weak.
+    assert etag.startswith('W/')
+    assert 'Last-Modified' in response.headers
+
+    # Check that a client holding the current ETag gets an empty 304 response.
+    response = client.get(url, headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.data == b''
+    assert response.headers['ETag'] == etag
+
+
+def test_review_changes_etag_only_for_pages_showing_movie(client, auth):
+    first_page_etag = client.get('/movies_by_rank').headers['ETag']
+    second_page_etag = client.get('/movies_by_rank?cursor=3').headers['ETag']
+
+    auth.login()
+    client.post('/review', data={'review': 'wow!', 'rating': 10, 'movie_rank': 1})
+    client.get('/authentication/logout')
+
+    assert client.get('/movies_by_rank', headers={'If-None-Match': first_page_etag}).status_code == 200
+    assert client.get('/movies_by_rank?cursor=3', headers={'If-None-Match': second_page_etag}).status_code == 304
+
+
+def test_pages_are_compressed_for_clients_accepting_gzip(client):
+    response = client.get('/movies_by_rank?view_reviews_for=1', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert b'GOTG is my new favourite movie of all time!' in gzip.decompress(response.data)
+
+    # Check that the compressed representation can be revalidated.
+    response = client.get('/movies_by_rank?view_reviews_for=1', headers={
+        'Accept-Encoding': 'gzip', 'If-None-Match': response.headers['ETag']})
+    assert response.status_code == 304
+
+    # Check that the same page compresses to the same bytes.
+    api_responses = [client.get('/api/movies/1', headers={'Accept-Encoding': 'gzip'}) for _ in range(2)]
+    assert api_responses[0].headers['Content-Encoding'] == 'gzip'
+    assert api_responses[0].data == api_responses[1].data
+
+    # Check that clients which do not accept gzip get the plain page.
+    response = client.get('/movies_by_rank?view_reviews_for=1')
+    assert 'Content-Encoding' not in response.headers
+    assert b'GOTG is my new favourite movie of all time!' in response.data
+
+
+def test_static_urls_are_fingerprinted_and_cached_long_term(client):
+    page = client.get('/').data.decode('utf-8')
+    css_url = re.search(r'/static/css/main\.css\?v=\w+', page).group(0)
+
+    response = client.get(css_url, headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'max-age=31536000' in response.headers['Cache-Control']
+    assert b'#body' in gzip.decompress(response.data)
+
+    # Check that an outdated fingerprint is not cached long term.
+    response = client.get('/static/css/main.css?v=outdated')
+    assert 'max-age=31536000' not in response.headers.get('Cache-Control', '')
+    response.close()
+
+
+def test_api_returns_batch_of_movies_with_selected_fields(client):
+    response = client.get('/api/movies?ranks=1,2,3,2000&fields=rank,title')
+    assert response.status_code == 200
+    assert response.mimetype == 'application/json'
+    assert response.get_json() == [
+        {'rank': 1, 'title': 'Guardians of the Galaxy'},
+        {'rank': 2, 'title': 'Prometheus'},
+        {'rank': 3, 'title': 'Split'}
+    ]
+
+
+def test_api_returns_movie_reviews_genres_and_featured_movies(client):
+    movie = client.get('/api/movies/1').get_json()
+    assert movie['director'] == {'director_name': 'James Gunn'}
+    assert len(movie['actors']) == 4
+
+    reviews = client.get('/api/movies/1/reviews').get_json()
+    assert reviews[0]['review_text'] == 'GOTG is my new favourite movie of all time!'
+
+    assert 'Action' in client.get('/api/genres').get_json()
+    assert len(client.get('/api/genres/Action/movies?limit=5&fields=rank').get_json()) == 5
+    assert len(client.get('/api/featured').get_json()) == 3
+
+
+def test_api_serialized_movie_changes_when_movie_is_reviewed(client, auth):
+    assert client.get('/api/movies/1?fields=rank').get_json() == {'rank': 1}
+    assert client.get('/api/movies/1?fields=rank').get_json() == {'rank': 1}
+
+    auth.login()
+    client.post('/review', data={'review': 'wow!', 'rating': 10, 'movie_rank': 1})
+    assert len(client.get('/api/movies/1/reviews').get_json()) == 2
+
+
+@pytest.mark.parametrize(('url', 'status_code'), (
+        ('/api/movies/2000', 404),
+        ('/api/movies?ranks=1&fields=budget', 400),
+        ('/api/movies?ranks=one', 400),
+        ('/api/movies?cursor=-3', 400),
+        ('/api/genres/Action/movies?limit=ten', 400),
+))
+def test_api_rejects_invalid_requests(client, url, status_code):
+    response = client.get(url)
+    assert response.status_code == status_code
+    assert 'error' in response.get_json()
+
+
+def test_api_does_not_report_errors_of_its_own_as_bad_parameters(client, monkeypatch):
+    def broken_serializer(repo):
+        raise ValueError('bug')
+    monkeypatch.setattr(api_services, 'get_genres_json', broken_serializer)
+    # The testing app propagates the error, which would otherwise be a 500 response.
+    with pytest.raises(ValueError):
+        client.get('/api/genres')
+
+
+def test_export_streams_movies_as_ndjson(client):
+    response = client.get('/export/movies.ndjson')
+    assert response.status_code == 200
+    assert response.is_streamed
+    lines = response.data.decode('utf-8').splitlines()
+    assert len(lines) == 1000
+    assert json.loads(lines[0])['title'] == 'Guardians of the Galaxy'
+
+
+def test_export_streams_reviews_as_csv(client):
+    response = client.get('/export/reviews.csv')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/csv'
+    rows = list(csv.reader(io.StringIO(response.data.decode('utf-8'))))
+    assert rows[0] == ['Movie Rank', 'Review', 'Rating', 'Timestamp']
+    assert rows[1][:3] == ['1', 'GOTG is my new favourite movie of all time!', '10']
+
+
+def test_export_rejects_unknown_format(client):
+    assert client.get('/export/movies.xml').status_code == 404
+
+
+def test_export_cli_command_writes_file(client, tmp_path):
+    output = tmp_path / 'movies.csv'
+    runner = client.application.test_cli_runner()
+    result = runner.invoke(args=['export', 'movies', '--format', 'csv', '--output', str(output)])
+    assert result.exit_code == 0
+    assert len(output.read_text(encoding='utf-8').splitlines()) == 1001
+
+
+def test_prepare_for_fork_freezes_loaded_heap(client):
+    threshold = gc.get_threshold()
+    client.application.config['GC_GEN0_THRESHOLD'] = 20000
+    try:
+        prefork.prepare_for_fork(client.application)
+        assert gc.get_freeze_count() > 0
+        assert gc.get_threshold()[0] == 20000
+        prefork.after_fork()
+        assert client.get('/movies_by_rank?movie_rank=1').status_code == 200
+    finally:
+        gc.unfreeze()
+        gc.set_threshold(*threshold)
+
+
+def test_several_workers_need_a_shared_repository(client):
+    config = client.application.config
+    prefork.check_workers(config, 1)
+    with pytest.raises(ValueError):
+        prefork.check_workers(config, 3)
+    prefork.check_workers(dict(config, REPLICATION_DATABASE='replication.db'), 3)
+    prefork.check_workers(dict(config, REPOSITORY='sqlite'), 3)
+
+
+def test_several_workers_cannot_share_a_journal(client, tmp_path):
+    config = dict(client.application.config, REPLICATION_DATABASE='replication.db', JOURNAL_DIR=str(tmp_path))
+    prefork.check_workers(config, 1)
+    with pytest.raises(ValueError):
+        prefork.check_workers(config, 3)
+
+
+def test_admin_reload_reaches_every_worker(tmp_path):
+    database = str(tmp_path / 'changes.db')
+    app = create_app({'TESTING': True, 'TEST_DATA_PATH': TEST_DATA_PATH, 'REPLICATION_DATABASE': database,
+                      'ADMIN_TOKEN': 'secret'})
+    client = app.test_client()
+    other_worker = MemoryRepository()
+    memory_repository.populate(TEST_DATA_PATH, other_worker)
+    other_replicator = Replicator(database)
+    other_worker.attach_replicator(other_replicator)
+
+    assert client.post('/admin/reload', headers={'Authorization': 'Bearer secret'}).status_code == 202
+    other_replicator.pull(other_worker)
+    assert other_replicator.take_reload_request() is True
+
+    reloader.reloader_instance.reload()
+    other_replicator.request_reload()
+    assert client.get('/').status_code == 200     # Starts the requested reload in the background.
+    status = reloader.reloader_instance.reload()  # Waits for it, then reloads once more.
+    assert status['reloads'] == 4
+    other_replicator.close()
+
+
+def test_journal_and_replication_cannot_be_combined(tmp_path):
+    with pytest.raises(ValueError):
+        create_app({'TESTING': True, 'TEST_DATA_PATH': TEST_DATA_PATH, 'JOURNAL_DIR': str(tmp_path / 'journal'),
+                    'REPLICATION_DATABASE': str(tmp_path / 'changes.db')})
+
+
+def test_admin_endpoints_are_disabled_without_token(client):
+    assert client.post('/admin/reload').status_code == 404
+
+
+def test_admin_reload_swaps_repository_and_keeps_users(client):
+    client.application.config['ADMIN_TOKEN'] = 'secret'
+    assert client.post('/admin/reload', headers={'Authorization': 'Bearer wrong'}).status_code == 403
+    client.post('/authentication/register', data={'username': 'dave', 'password': 'Password123'})
+
+    response = client.post('/admin/reload', headers={'Authorization': 'Bearer secret'})
+    assert response.status_code == 202
+    assert json.loads(response.data)['started'] is True
+    status = reloader.reloader_instance.reload()    # Waits for the background reload, then reloads once more.
+    assert status['reloads'] == 2
+    response = client.get('/admin/reload', headers={'Authorization': 'Bearer secret'})
+    assert json.loads(response.data)['reloads'] == 2
+    assert client.post('/authentication/login', data={'username': 'dave', 'password': 'Password123'}).status_code == 302
+    assert client.get('/movies_by_rank').status_code == 200
+
+
+def test_admin_import_movies_updates_cached_genre_page(client, tmp_path):
+    client.application.config['ADMIN_TOKEN'] = 'secret'
+    header = 'Rank,Title,Genre,Description,Director,Actors,Year,Runtime (Minutes),Rating,Votes,Revenue (Millions),' \
+             'Metascore\n'
+    # The last page of the Musical genre lists its 4th and 5th movies, and is cached.
+    assert b'Moana 2' not in client.get('/movies_by_genre?genre=Musical&cursor=3').data
+
+    response = client.post('/admin/movies', headers={'Authorization': 'Bearer secret'},
+                           data=header + '1001,Moana 2,"Animation,Musical",A voyage.,David Derrick Jr.,'
+                                         'Dwayne Johnson,2024,100,6.8,N/A,N/A,N/A\n')
+    assert response.status_code == 201
+    assert json.loads(response.data)['added'] == [1001]
+    assert b'Moana 2' in client.get('/movies_by_genre?genre=Musical&cursor=3').data
+
+    response = client.post('/admin/movies', headers={'Authorization': 'Bearer secret'}, data=header + '1002,Broken\n')
+    assert response.status_code == 400
+
+    csv_file = tmp_path / 'new_movies.csv'
+    csv_file.write_text(header + '1001,Moana 2,Musical,A voyage.,David Derrick Jr.,Dwayne Johnson,2024,100,N/A,N/A,N/A,N/A\n'
+                                 '1002,Wicked,Musical,A witch.,Jon M. Chu,Cynthia Erivo,2024,160,7.6,N/A,N/A,N/A\n')
+    result = client.application.test_cli_runner().invoke(args=['admin', 'import-movies', str(csv_file)])
+    # The command's own process does not share the server's memory repository.
+    assert result.exit_code != 0
+    assert 'REPLICATION_DATABASE' in result.output
+
+    app = create_app({'TESTING': True, 'TEST_DATA_PATH': TEST_DATA_PATH,
+                      'REPLICATION_DATABASE': str(tmp_path / 'changes.db')})
+    result = app.test_cli_runner().invoke(args=['admin', 'import-movies', str(csv_file)])
+    assert result.exit_code == 0
+    assert 'Added 2 movies, skipped 0 already present' in result.output
+    assert app.test_client().get('/api/movies/1002').status_code == 200
+
+
+def test_admin_reports_cache_stats(client):
+    client.application.config['ADMIN_TOKEN'] = 'secret'
+    client.get('/movies_by_genre?genre=Musical')
+    response = client.get('/admin/caches', headers={'Authorization': 'Bearer secret'})
+    caches = json.loads(response.data)
+    assert caches['fragments']['misses'] >= 1
+    assert caches['services']['genre_movie_ranks']['misses'] == 1
+
+
+def test_ready_without_warmup(client):
+    assert client.get('/ready').status_code == 200
+
+
+def test_warmup_fills_caches_before_serving():
+    app = create_app({'TESTING': True, 'TEST_DATA_PATH': TEST_DATA_PATH, 'WARMUP': True, 'WARMUP_THREADS': 2})
+    status = json.loads(app.test_client().get('/ready').data)
+    assert status['ready'] is True
+    assert status['warmed'] > 20 and status['skipped'] == 0 and status['errors'] == 0
+    assert fragment_cache.cache_instance.get(('page', 'movies_by_genre', 'Musical', 0, 0)) is not None
+    # Warm-up requests are not visits.
+    assert view_counters.counters_instance.unique_viewers_for_genre('Musical') == 0
+
+
+def test_warmup_in_background_reports_readiness():
+    app = create_app({'TESTING': True, 'TEST_DATA_PATH': TEST_DATA_PATH, 'WARMUP': True,
+                      'WARMUP_IN_BACKGROUND': True, 'WARMUP_BUDGET': 0})
+    assert warmup.readiness_instance.wait(10)
+    response = app.test_client().get('/ready')
+    assert response.status_code == 200
+    assert json.loads(response.data)['warmed'] == 0
+
+
+def test_login_is_turned_away_while_password_hasher_is_busy(client, monkeypatch):
+    def busy(password_hash, password):
+        raise PasswordHashingBusyException
+
+    monkeypatch.setattr(password_hashing.hasher_instance, 'check', busy)
+    response = client.post('/authentication/login', data={'username': 'nton939', 'password': 'nton939Password'})
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
+
+
+def test_admin_import_reviews(client, tmp_path):
+    client.application.config['ADMIN_TOKEN'] = 'secret'
+    review = '{"movie_rank": 2, "username": "nton939", "review_text": "Bulk review.", "rating": 8}\n'
+    response = client.post('/admin/reviews', headers={'Authorization': 'Bearer secret'}, data=review * 3)
+    assert response.status_code == 201
+    assert json.loads(response.data)['added'] == 3
+    assert len(json.loads(client.get('/api/movies/2/reviews').data)) == 3
+
+    ndjson_file = tmp_path / 'reviews.ndjson'
+    ndjson_file.write_text(review + '{"movie_rank": 2}\n')
+    result = client.application.test_cli_runner().invoke(args=['admin', 'import-reviews', str(ndjson_file)])
+    assert result.exit_code != 0
+
+    app = create_app({'TESTING': True, 'TEST_DATA_PATH': TEST_DATA_PATH, 'REPOSITORY': 'sqlite',
+                      'SQLITE_DATABASE': str(tmp_path / 'cs235flix.db')})
+    result = app.test_cli_runner().invoke(args=['admin', 'import-reviews', str(ndjson_file)])
+    assert result.exit_code == 0
+    assert 'Added 1 reviews, rejected 1' in result.output
+    assert "Line 2: Missing 'username'" in result.output
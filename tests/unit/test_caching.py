@@ -0,0 +1,203 @@
+from movie_app.adapters import repository
+from movie_app.caching import service_cache
+from movie_app.caching.lru_cache import LRUCache
+from movie_app.caching.fragment_cache import FragmentCache
+from movie_app.caching.service_cache import ServiceCaches, cached
+from movie_app.caching.single_flight import SingleFlight
+from movie_app.caching.sqlite_cache import SqliteCache
+from movie_app.domain.model import Review
+from movie_app.movies import services as movies_services
+from movie_app.utilities import services as utility_services
+import pytest
+import threading
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(max_entries=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1          # 'a' becomes the most recently used entry.
+    cache.put('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+    assert cache.stats()['evictions'] == 1
+
+
+def test_lru_cache_expires_entries_after_ttl():
+    clock = FakeClock()
+    cache = LRUCache(max_entries=10, ttl=5, clock=clock)
+    cache.put('a', 1)
+    clock.now = 4.9
+    assert cache.get('a') == 1
+    clock.now = 5.0
+    assert cache.get('a') is None
+    assert cache.stats()['expirations'] == 1
+
+
+def test_lru_cache_measures_hit_rate():
+    cache = LRUCache(max_entries=10)
+    cache.put('a', 1)
+    cache.get('a')
+    cache.get('a')
+    cache.get('a')
+    cache.get('b')
+    assert cache.hit_rate == 0.75
+
+
+def test_lru_cache_requires_positive_size():
+    with pytest.raises(ValueError):
+        LRUCache(max_entries=0)
+
+
+def test_fragment_cache_invalidates_only_entries_showing_movie():
+    cache = FragmentCache()
+    cache.put(('page', 'movies_by_rank', None, 0, 0), '<page 1-3>', [1, 2, 3])
+    cache.put(('page', 'movies_by_rank', None, 3, 0), '<page 4-6>', [4, 5, 6])
+    cache.put(('article', 'movies_by_rank', None, 0, 2, False), '<movie 2>', [2])
+    cache.invalidate_movie(2)
+    assert cache.get(('page', 'movies_by_rank', None, 0, 0)) is None
+    assert cache.get(('article', 'movies_by_rank', None, 0, 2, False)) is None
+    assert cache.get(('page', 'movies_by_rank', None, 3, 0)) == '<page 4-6>'
+
+
+def test_fragment_cache_rejects_fragment_rendered_before_invalidation():
+    cache = FragmentCache()
+    generation = cache.generation
+    cache.invalidate_movie(1)
+    cache.put(('article', 'movies_by_rank', None, 0, 1, False), '<stale movie 1>', [1], generation)
+    assert cache.get(('article', 'movies_by_rank', None, 0, 1, False)) is None
+
+
+def test_sqlite_cache_is_shared_by_instances_of_one_name(tmp_path):
+    clock = FakeClock()
+    first = SqliteCache(str(tmp_path / 'cache.db'), 'genres', max_entries=2, ttl=5, clock=clock)
+    second = SqliteCache(str(tmp_path / 'cache.db'), 'genres', max_entries=2, ttl=5, clock=clock)
+    other = SqliteCache(str(tmp_path / 'cache.db'), 'reviews', max_entries=2, clock=clock)
+    first.put('a', ['Action', 'Drama'])
+    assert second.get('a') == ['Action', 'Drama']
+    assert other.get('a') is None
+
+    clock.now = 1
+    second.put('b', 2)
+    clock.now = 2
+    assert first.get('a') == ['Action', 'Drama']      # 'a' becomes the most recently used entry.
+    clock.now = 3
+    first.put('c', 3)
+    assert second.get('b') is None
+    assert first.stats()['evictions'] == 1
+    assert second.stats()['misses'] == 1
+    assert first.stats()['size'] == 2
+
+    clock.now = 8
+    assert second.get('c') is None
+    assert second.stats()['expirations'] == 1
+    for cache in (first, second, other):
+        cache.close()
+
+
+def test_cached_service_functions_are_keyed_on_repository_version(in_memory_repo):
+    service_cache.caches_instance = ServiceCaches(lambda name: LRUCache(16))
+    try:
+        genre_names = utility_services.get_genre_names(in_memory_repo)
+        assert utility_services.get_genre_names(in_memory_repo) is genre_names
+        assert movies_services.get_reviews_for_movie(3, in_memory_repo) == []
+        assert movies_services.get_reviews_for_movie(3, in_memory_repo) == []
+
+        # A review changes the movie's version, so the next call recomputes the reviews.
+        in_memory_repo.add_review(Review(in_memory_repo.get_movie(3), 'Good.', 8))
+        assert len(movies_services.get_reviews_for_movie(3, in_memory_repo)) == 1
+        stats = service_cache.caches_instance.stats()
+        assert stats['genre_names']['hits'] == 1
+        assert stats['movie_reviews']['hits'] == 1 and stats['movie_reviews']['misses'] == 2
+    finally:
+        service_cache.caches_instance = None
+
+
+def test_cached_does_not_cache_exceptions(in_memory_repo):
+    calls = []
+
+    @cached('failing')
+    def failing(value, repo):
+        calls.append(value)
+        raise ValueError(value)
+
+    service_cache.caches_instance = ServiceCaches(lambda name: LRUCache(16))
+    try:
+        for _ in range(2):
+            with pytest.raises(ValueError):
+                failing(1, in_memory_repo)
+        assert calls == [1, 1]
+    finally:
+        service_cache.caches_instance = None
+
+
+def test_reseeded_versions_keep_increasing():
+    version = repository.next_version()
+    repository.reseed_versions()
+    assert repository.next_version() > version
+
+
+def test_single_flight_coalesces_concurrent_computations():
+    flights = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        started.set()
+        release.wait()
+        return 'page'
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flights.do('key', compute)))
+    leader.start()
+    started.wait()
+    followers = [threading.Thread(target=lambda: results.append(flights.do('key', compute))) for _ in range(4)]
+    for follower in followers:
+        follower.start()
+    while flights.stats()['coalesced'] < 4:
+        pass
+    release.set()
+    for thread in [leader] + followers:
+        thread.join()
+    assert results == ['page'] * 5
+    assert len(calls) == 1
+    assert flights.stats() == {'in_flight': 0, 'computations': 1, 'coalesced': 4}
+
+
+def test_single_flight_raises_exception_and_forgets_key():
+    flights = SingleFlight()
+    with pytest.raises(ValueError):
+        flights.do('key', lambda: int('x'))
+    assert flights.do('key', lambda: 1) == 1
+
+
+def test_cached_returns_stale_result_while_recomputing(in_memory_repo):
+    clock = FakeClock()
+    calls = []
+
+    @cached('stale')
+    def count_calls(repo):
+        calls.append(1)
+        return len(calls)
+
+    service_cache.caches_instance = ServiceCaches(lambda name: LRUCache(16), fresh_for=10, clock=clock)
+    try:
+        assert count_calls(in_memory_repo) == 1
+        clock.now = 11
+        assert count_calls(in_memory_repo) == 1         # Stale, so recomputed in the background.
+        while service_cache.caches_instance.flights.stats()['in_flight'] > 0 or len(calls) < 2:
+            pass
+        assert count_calls(in_memory_repo) == 2
+    finally:
+        service_cache.caches_instance = None
@@ -1,7 +1,9 @@
+import os
 from movie_app.domain.model \
-    import Director, Genre, Actor, Movie, Review, User, WatchList, MovieWatchingSimulation
+    import Director, Genre, Actor, Movie, MovieFileCSVReader, Review, User, WatchList, MovieWatchingSimulation
 
 import pytest
+from tests.conftest import TEST_DATA_PATH
 
 
 # Director Unit Tests
@@ -327,3 +329,24 @@ def test_update_user_information(simulation):
     assert len(simulation.administrator.watched_movies) == 1
     assert u1.watched_movies[0] == m1
     assert u2.time_spent_watching_movies_minutes == 100
+
+
+# MovieFileCSVReader Unit Tests
+def test_movie_file_csv_reader_iterates_movies_without_datasets():
+    reader = MovieFileCSVReader(os.path.join(TEST_DATA_PATH, 'Data1000Movies.csv'))
+    movies = reader.iter_movies()
+    movie = next(movies)
+    assert movie.title == 'Guardians of the Galaxy'
+    assert movie.rank == 1
+    assert movie.director == Director('James Gunn')
+    assert len(reader.dataset_of_movies) == 0
+    assert len(list(movies)) == 999
+
+
+def test_movie_file_csv_reader_shares_entities_between_movies():
+    reader = MovieFileCSVReader(os.path.join(TEST_DATA_PATH, 'Data1000Movies.csv'))
+    reader.read_csv_file()
+    assert len(reader.dataset_of_movies) == 1000
+    assert len(reader.dataset_of_genres) == 20
+    action_genres = [genre for movie in reader.dataset_of_movies for genre in movie.genres if genre == Genre('Action')]
+    assert all(genre is action_genres[0] for genre in action_genres)
@@ -0,0 +1,122 @@
+import os
+import threading
+from datetime import datetime
+from movie_app.adapters.journal import Journal
+from movie_app.adapters.memory_repository import MemoryRepository, populate
+from movie_app.domain.model import Movie, Review, User, WatchList
+from tests.conftest import TEST_DATA_PATH
+
+
+def journaled_repo(directory, snapshot_every=1000):
+    repo = MemoryRepository()
+    journal = Journal(str(directory), snapshot_every=snapshot_every)
+    populate(TEST_DATA_PATH, repo, journal=journal)
+    return repo, journal
+
+
+def test_user_data_is_replayed_after_restart(tmp_path):
+    repo, journal = journaled_repo(tmp_path)
+    repo.add_user(User('dave', '123456789'))
+    timestamp = datetime(2020, 10, 1, 12, 30)
+    repo.add_review(Review(repo.get_movie(3), 'Good.', 8, timestamp))
+    watchlist = WatchList(repo.get_user('dave'), 'Later')
+    watchlist.add_movie(repo.get_movie(9))
+    repo.add_watchlist(watchlist)
+    journal.close()
+
+    restarted_repo, restarted_journal = journaled_repo(tmp_path)
+    assert restarted_repo.get_user('dave').password == '123456789'
+    assert restarted_repo.get_reviews_for_movie(3) == [Review(Movie('Split', 2016), 'Good.', 8, timestamp)]
+    assert len(restarted_repo.get_reviews()) == 2
+    assert restarted_repo.get_watchlist(User('dave', 'x'))[0].watchlist == [restarted_repo.get_movie(9)]
+    # The default user is loaded once, not again on every restart.
+    assert len(restarted_repo.get_watchlist(User('nton939', 'x'))) == 1
+    restarted_journal.close()
+
+
+def test_snapshot_replaces_old_journals(tmp_path):
+    repo, journal = journaled_repo(tmp_path, snapshot_every=5)
+    movie = Movie('New Movie', 2020)
+    movie.rank = 1001
+    movie.runtime_minutes = 100
+    repo.add_movie(movie)
+    for i in range(10):
+        repo.add_review(Review(repo.get_movie(i + 1), f'Review {i}', 5))
+    journal.close()
+    assert os.path.exists(tmp_path / 'snapshot.ndjson')
+    assert len([name for name in os.listdir(tmp_path) if name.startswith('journal-')]) == 1
+    with open(tmp_path / 'snapshot.ndjson', 'rb') as snapshot:
+        # Catalog movies are loaded from the data file, so only the added movie is in the snapshot.
+        assert sum(b'"add_movie"' in line for line in snapshot) == 1
+
+    restarted_repo, restarted_journal = journaled_repo(tmp_path, snapshot_every=5)
+    assert restarted_repo.get_number_of_movies() == 1001
+    assert restarted_repo.get_movie(1001).runtime_minutes == 100
+    assert len(restarted_repo.get_reviews()) == 11
+    restarted_journal.close()
+
+
+def test_record_cut_short_by_crash_is_dropped(tmp_path):
+    repo, journal = journaled_repo(tmp_path)
+    repo.add_user(User('dave', '123456789'))
+    journal.close()
+    with open(tmp_path / 'journal-0.ndjson', 'ab') as journal_file:
+        journal_file.write(b'{"op":"add_user","username":"er')
+
+    restarted_repo, restarted_journal = journaled_repo(tmp_path)
+    restarted_repo.add_user(User('erin', '987654321'))
+    restarted_journal.close()
+    restarted_repo, restarted_journal = journaled_repo(tmp_path)
+    assert restarted_repo.get_user('dave') is not None
+    assert restarted_repo.get_user('erin') is not None
+    restarted_journal.close()
+
+
+def test_concurrent_writes_are_all_recorded(tmp_path):
+    repo, journal = journaled_repo(tmp_path, snapshot_every=50)
+
+    def add_reviews(offset):
+        for rank in range(offset, 200, 4):
+            repo.add_review(Review(repo.get_movie(rank + 1), 'Threaded.', 5))
+
+    threads = [threading.Thread(target=add_reviews, args=(offset,)) for offset in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    journal.close()
+
+    restarted_repo, restarted_journal = journaled_repo(tmp_path, snapshot_every=50)
+    assert len(restarted_repo.get_reviews()) == 201
+    restarted_journal.close()
+
+
+def test_batch_of_reviews_is_journaled_and_replayed(tmp_path):
+    repo, journal = journaled_repo(tmp_path)
+    repo.add_reviews([Review(repo.get_movie(rank), 'Good.', 8) for rank in (3, 9)])
+    journal.close()
+
+    restarted_repo, restarted_journal = journaled_repo(tmp_path)
+    assert len(restarted_repo.get_reviews_for_movie(3)) == len(restarted_repo.get_reviews_for_movie(9)) == 1
+    restarted_journal.close()
+
+
+def test_mutation_during_snapshot_is_recorded_once(tmp_path):
+    repo, journal = journaled_repo(tmp_path)
+
+    def capture_state():
+        records = repo._snapshot_records()
+
+        def write_records():
+            # The journal lock is released before the snapshot is written, so this review goes to the next journal.
+            repo.add_review(Review(repo.get_movie(3), 'Written meanwhile.', 8))
+            yield from records
+        return write_records()
+
+    journal.snapshot(capture_state)
+    journal.close()
+
+    restarted_repo, restarted_journal = journaled_repo(tmp_path)
+    assert [review.review_text for review in restarted_repo.get_reviews_for_movie(3)] == ['Written meanwhile.']
+    assert len(restarted_repo.get_reviews()) == 2
+    restarted_journal.close()
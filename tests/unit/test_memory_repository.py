@@ -1,6 +1,13 @@
+import os
+import threading
+from datetime import datetime
 from typing import List
 from movie_app.domain.model import Director, Genre, Actor, Movie, Review, User, WatchList
+from movie_app.adapters import parallel_loader
+from movie_app.adapters.lazy_catalog import LazyCatalog
+from movie_app.adapters.memory_repository import MemoryRepository, load_data
 from movie_app.adapters.repository import RepositoryException
+from tests.conftest import TEST_DATA_PATH
 import pytest
 
 
@@ -170,3 +177,264 @@ def test_repo_does_not_retrieve_non_existent_watchlist(in_memory_repo):
     user = in_memory_repo.get_user('abc')
     watchlist = in_memory_repo.get_watchlist(user)
     assert len(watchlist) == 0
+
+
+def test_repo_versions_increase_when_movie_is_reviewed(in_memory_repo):
+    version = in_memory_repo.get_version()
+    movie_version = in_memory_repo.get_movie_version(10)
+    other_movie_version = in_memory_repo.get_movie_version(11)
+    in_memory_repo.add_review(Review(movie=in_memory_repo.get_movie(10), txt='It was average.', rating=5))
+    assert in_memory_repo.get_version() > version
+    assert in_memory_repo.get_movie_version(10) > movie_version
+    assert in_memory_repo.get_movie_version(11) == other_movie_version
+
+
+def test_repo_versions_increase_when_movie_is_added(in_memory_repo):
+    version = in_memory_repo.get_version()
+    movie = Movie('New Movie', 2020)
+    movie.rank = 1001
+    assert in_memory_repo.get_movie_version(1001) == 0
+    in_memory_repo.add_movie(movie)
+    assert in_memory_repo.get_version() > version
+    assert in_memory_repo.get_movie_version(1001) > 0
+    assert in_memory_repo.get_last_modified() is not None
+
+
+def test_parallel_loader_chunks_split_on_record_boundaries(tmp_path):
+    file_name = tmp_path / 'movies.csv'
+    file_name.write_text(
+        'Rank,Title,Genre,Description,Director,Actors,Year,Runtime (Minutes),Rating,Votes,Revenue (Millions),'
+        'Metascore\n'
+        '1,A,Drama,"One\nline, and a ""quoted\nword""",D1,"X,Y",2000,90,7.0,10,N/A,50\n'
+        '2,B,Drama,Plain,D2,X,2001,91,N/A,11,1.5,N/A\n'
+        '3,C,"Drama,Comedy","Two\n\nlines",D1,Z,2002,92,8.0,12,2.5,60\n'
+    )
+    for chunks in range(1, 8):
+        columns, ranges = parallel_loader.find_chunks(str(file_name), chunks)
+        rows = [row for start, end in ranges for row in parallel_loader.parse_chunk(str(file_name), start, end, columns)]
+        assert [row[0] for row in rows] == [1, 2, 3]
+    assert rows[0][3] == 'One\nline, and a "quoted\nword"'
+    assert rows[1][8:] == (None, 11, 1.5, None)
+
+
+def test_parallel_load_matches_sequential_load():
+    sequential_repo = MemoryRepository()
+    load_data(TEST_DATA_PATH, sequential_repo)
+    parallel_repo = MemoryRepository()
+    load_data(TEST_DATA_PATH, parallel_repo, workers=3)
+    assert parallel_repo.get_number_of_movies() == 1000
+    assert list(parallel_repo.iter_movies()) == list(sequential_repo.iter_movies())
+    assert parallel_repo.get_genres() == sequential_repo.get_genres()
+    movie = parallel_repo.get_movie(1)
+    assert movie.actors == sequential_repo.get_movie(1).actors
+    assert movie.director is parallel_repo.get_director('James Gunn')
+
+
+def test_lazy_load_matches_eager_load():
+    eager_repo = MemoryRepository()
+    load_data(TEST_DATA_PATH, eager_repo)
+    lazy_repo = MemoryRepository()
+    load_data(TEST_DATA_PATH, lazy_repo, catalog_mode='lazy', details_cache_size=10)
+    assert lazy_repo.get_number_of_movies() == 1000
+    assert sorted(lazy_repo.get_genres()) == sorted(eager_repo.get_genres())
+    assert lazy_repo.get_movie_ranks_for_genre('Sci-Fi') == eager_repo.get_movie_ranks_for_genre('Sci-Fi')
+    for lazy_movie, eager_movie in zip(lazy_repo.iter_movies(), eager_repo.iter_movies()):
+        assert lazy_movie == eager_movie
+        assert lazy_movie.rank == eager_movie.rank
+        assert lazy_movie.description == eager_movie.description
+        assert lazy_movie.actors == eager_movie.actors
+        assert lazy_movie.revenue == eager_movie.revenue
+    movie = lazy_repo.get_movie(1)
+    assert movie.actors[0] is lazy_repo.get_actor(movie.actors[0].actor_full_name)
+
+
+def test_lazy_catalog_parses_details_on_first_use_and_bounds_them():
+    catalog = LazyCatalog(os.path.join(TEST_DATA_PATH, 'Data1000Movies.csv'), cache_size=2)
+    assert catalog.stats()['size'] == 0
+    movies = catalog.movies
+    assert movies[0].description.startswith('A group of intergalactic criminals')
+    assert movies[0].actors[0] == Actor('Chris Pratt')
+    for movie in movies[1:5]:
+        assert movie.description != ''
+    assert catalog.stats()['size'] == 2
+    catalog.close()
+
+
+def test_lazy_catalog_is_not_changed_by_rewriting_the_data_file(tmp_path):
+    file_name = tmp_path / 'movies.csv'
+    with open(os.path.join(TEST_DATA_PATH, 'Data1000Movies.csv'), 'rb') as data_file:
+        contents = data_file.read()
+    file_name.write_bytes(contents)
+    catalog = LazyCatalog(str(file_name))
+    # The data file is rewritten in place, shorter, as an update before a reload may do.
+    with open(file_name, 'r+b') as data_file:
+        data_file.write(b''.join(contents.splitlines(keepends=True)[:501]))
+        data_file.truncate()
+    assert catalog.movies[-1].description.startswith('A stuffy businessman')
+    new_catalog = LazyCatalog(str(file_name))
+    assert len(new_catalog.movies) == 500
+    assert len([name for name in os.listdir(tmp_path) if name.endswith('.copy')]) == 1
+    new_catalog.close()
+    catalog.close()
+
+
+def test_lazy_movie_keeps_its_own_copy_of_changed_details():
+    catalog = LazyCatalog(os.path.join(TEST_DATA_PATH, 'Data1000Movies.csv'))
+    movie, other_movie = catalog.movies[0], catalog.movies[1]
+    movie.description = 'Changed'
+    movie.add_actor(Actor('Bob'))
+    movie.remove_actor(Actor('Chris Pratt'))
+    assert movie.description == 'Changed'
+    assert Actor('Bob') in movie.actors and Actor('Chris Pratt') not in movie.actors
+    other_movie.actors = [Actor('Alice')]
+    assert other_movie.actors == [Actor('Alice')]
+    # The catalog's own details are unchanged.
+    assert catalog.details(0)[0].startswith('A group of intergalactic criminals')
+    assert catalog.details(0)[1][0] == Actor('Chris Pratt')
+    catalog.close()
+
+
+def test_shared_catalog_matches_eager_load(tmp_path):
+    eager_repo = MemoryRepository()
+    load_data(TEST_DATA_PATH, eager_repo)
+    shared_repo = MemoryRepository()
+    image = str(tmp_path / 'movies.catalog')
+    load_data(TEST_DATA_PATH, shared_repo, catalog_mode='shared', details_cache_size=10, catalog_image=image)
+    assert shared_repo.get_number_of_movies() == 1000
+    assert shared_repo.get_genres() == eager_repo.get_genres()
+    assert shared_repo.get_movie_ranks_for_genre('Sci-Fi') == eager_repo.get_movie_ranks_for_genre('Sci-Fi')
+    for shared_movie, eager_movie in zip(shared_repo.iter_movies(), eager_repo.iter_movies()):
+        assert shared_movie == eager_movie
+        assert shared_movie.rank == eager_movie.rank
+        assert shared_movie.description == eager_movie.description
+        assert shared_movie.actors == eager_movie.actors
+        assert shared_movie.revenue == eager_movie.revenue
+    assert shared_repo.get_movie(1001) is None
+    assert shared_repo.get_director('James Gunn') == Director('James Gunn')
+    assert shared_repo.get_actor('Nobody In Particular') is None
+
+
+def test_shared_catalog_takes_new_movies_and_rebuilds_stale_images(tmp_path):
+    image = str(tmp_path / 'movies.catalog')
+    repo = MemoryRepository()
+    load_data(TEST_DATA_PATH, repo, catalog_mode='shared', catalog_image=image)
+    movie = Movie('New Movie', 2020)
+    movie.rank = 1001
+    movie.genres = [Genre('Sci-Fi')]
+    repo.add_movie(movie)
+    assert repo.get_number_of_movies() == 1001
+    assert repo.get_movie(1001) is movie
+    assert repo.get_last_movie() is movie
+    assert repo.get_movie_ranks_for_genre('Sci-Fi')[-1] == 1001
+
+    # A second process maps the image already built; a changed data file gets a new one.
+    built = os.path.getmtime(image)
+    load_data(TEST_DATA_PATH, MemoryRepository(), catalog_mode='shared', catalog_image=image)
+    assert os.path.getmtime(image) == built
+    data_path = tmp_path / 'data'
+    data_path.mkdir()
+    with open(os.path.join(TEST_DATA_PATH, 'Data1000Movies.csv'), encoding='utf-8-sig') as source:
+        lines = source.readlines()
+    (data_path / 'Data1000Movies.csv').write_text(''.join(lines[:3]), encoding='utf-8')
+    small_repo = MemoryRepository()
+    load_data(str(data_path), small_repo, catalog_mode='shared', catalog_image=image)
+    assert small_repo.get_number_of_movies() == 2
+
+
+def test_unknown_catalog_mode_is_rejected():
+    with pytest.raises(RepositoryException):
+        load_data(TEST_DATA_PATH, MemoryRepository(), catalog_mode='sometimes')
+
+
+def test_repo_rejects_duplicate_users(in_memory_repo):
+    in_memory_repo.add_user(User('Dave', '123456789'))
+    with pytest.raises(RepositoryException):
+        in_memory_repo.add_user(User('dave', 'other'))
+    assert in_memory_repo.get_user('dave').password == '123456789'
+
+
+def test_repo_reads_stay_consistent_under_concurrent_writes(in_memory_repo):
+    stop = threading.Event()
+    errors = []
+
+    def read():
+        try:
+            seen = 0
+            while not stop.is_set():
+                reviews = in_memory_repo.get_reviews()
+                assert len(reviews) >= seen
+                seen = len(reviews)
+                for review in reviews[-5:]:
+                    assert review in in_memory_repo.get_reviews_for_movie(review.movie.rank)
+                for movie in in_memory_repo.iter_movies():
+                    assert in_memory_repo.get_movie(movie.rank) is movie
+        except Exception as exception:
+            errors.append(exception)
+
+    def write(offset):
+        try:
+            for i in range(200):
+                in_memory_repo.add_review(Review(in_memory_repo.get_movie((i * 4 + offset) % 1000 + 1), 'Busy.', 5))
+            for i in range(20):
+                movie = Movie(f'Movie {offset}-{i}', 2020)
+                movie.rank = 2000 + offset * 100 + i
+                in_memory_repo.add_movie(movie)
+            for i in range(20):
+                # Every writer registers the same names, and only one registration of each may succeed.
+                try:
+                    in_memory_repo.add_user(User(f'user{i}', 'password'))
+                except RepositoryException:
+                    pass
+        except Exception as exception:
+            errors.append(exception)
+
+    readers = [threading.Thread(target=read) for _ in range(4)]
+    writers = [threading.Thread(target=write, args=(offset,)) for offset in range(4)]
+    for thread in readers + writers:
+        thread.start()
+    for thread in writers:
+        thread.join()
+    stop.set()
+    for thread in readers:
+        thread.join()
+
+    assert errors == []
+    assert len(in_memory_repo.get_reviews()) == 801
+    assert in_memory_repo.get_number_of_movies() == 1080
+    assert len({movie.rank for movie in in_memory_repo.iter_movies()}) == 1080
+    assert all(in_memory_repo.get_user(f'user{i}') is not None for i in range(20))
+
+
+def test_repo_adds_reviews_in_one_write(in_memory_repo):
+    version = in_memory_repo.get_version()
+    reviews = [Review(in_memory_repo.get_movie(rank), f'Review of {rank}', 7) for rank in (3, 3, 9)]
+    in_memory_repo.add_reviews(reviews)
+    assert [review.review_text for review in in_memory_repo.get_reviews_for_movie(3)] == ['Review of 3'] * 2
+    assert in_memory_repo.get_reviews()[-3:] == reviews
+    assert in_memory_repo.get_movie_version(9) > version
+
+    with pytest.raises(RepositoryException):
+        in_memory_repo.add_reviews([Review(in_memory_repo.get_movie(2), 'Fine', 5), Review(None, 'Lost', 5)])
+    assert in_memory_repo.get_reviews_for_movie(2) == []
+
+
+def test_repo_pages_through_review_timelines(in_memory_repo):
+    movie = in_memory_repo.get_movie(2)
+    in_memory_repo.add_review(Review(movie, 'a', 5, datetime(2020, 1, 3)))
+    in_memory_repo.add_review(Review(movie, 'b', 9, datetime(2020, 1, 1)))
+    in_memory_repo.add_review(Review(movie, 'c', 5, datetime(2020, 1, 5)))
+    in_memory_repo.add_reviews([Review(movie, 'd', 7, datetime(2020, 1, 2)), Review(movie, 'e', 9, datetime(2020, 1, 4))])
+    assert in_memory_repo.get_number_of_reviews_for_movie(2) == 5
+
+    for order, expected in (('newest', 'ceadb'), ('top_rated', 'ebdca')):
+        texts = ''
+        page = in_memory_repo.get_review_timeline(2, order, limit=2)
+        while len(page) > 0:
+            texts += ''.join(review.review_text for _, review in page)
+            page = in_memory_repo.get_review_timeline(2, order, after=page[-1][0], limit=2)
+        assert texts == expected
+
+    assert in_memory_repo.get_review_timeline(2, 'newest', after=99) == []
+    assert in_memory_repo.get_review_timeline(3) == []
+    with pytest.raises(RepositoryException):
+        in_memory_repo.get_review_timeline(2, 'oldest')
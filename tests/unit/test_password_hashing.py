@@ -0,0 +1,50 @@
+import threading
+import pytest
+from werkzeug.security import check_password_hash
+from movie_app.authentication.password_hashing import PasswordHasher, PasswordHashingBusyException
+
+
+@pytest.mark.parametrize('workers', [0, 1])
+def test_hashes_are_werkzeug_pbkdf2_hashes(workers):
+    hasher = PasswordHasher(workers=workers, iterations=1000)
+    try:
+        password_hash = hasher.hash('nton939Password')
+        assert password_hash.startswith('pbkdf2:sha256:1000$')
+        assert check_password_hash(password_hash, 'nton939Password')
+        assert hasher.check(password_hash, 'nton939Password')
+        assert not hasher.check(password_hash, 'wrong')
+        assert hasher.stats()['hashed'] == 1 and hasher.stats()['checked'] == 2
+    finally:
+        hasher.close()
+
+
+def test_existing_hashes_keep_their_work_factor():
+    old_hash = PasswordHasher(iterations=1000).hash('Password123')
+    assert PasswordHasher(iterations=2000).check(old_hash, 'Password123')
+
+
+def test_hashes_beyond_queue_depth_are_rejected_at_once():
+    hasher = PasswordHasher(workers=1, queue_depth=0, iterations=400000)
+    try:
+        slow = threading.Thread(target=hasher.hash, args=('Password123',))
+        slow.start()
+        while hasher.stats()['pending'] == 0:
+            pass
+        with pytest.raises(PasswordHashingBusyException):
+            hasher.hash('Password456')
+        slow.join()
+        assert hasher.stats()['rejected'] == 1
+        assert hasher.hash('Password456').startswith('pbkdf2:sha256:400000$')
+    finally:
+        hasher.close()
+
+
+def test_counters_stay_exact_under_concurrent_requests():
+    hasher = PasswordHasher(queue_depth=64, iterations=1)
+    threads = [threading.Thread(target=lambda: [hasher.hash('Password123') for _ in range(200)]) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    stats = hasher.stats()
+    assert stats['hashed'] == 1600 and stats['pending'] == 0
@@ -0,0 +1,24 @@
+import pytest
+from movie_app.movies.profanity_filter import ProfanityFilter, filter_instance
+
+
+@pytest.mark.parametrize('text', [
+    'This movie is shit', 'SHIT', 'sh1t', '$h*t!', 'what a b1tch', 'hand job', 'hand,   job', 'motherfucker'
+])
+def test_finds_listed_words_and_their_disguises(text):
+    assert filter_instance.contains_profanity(text)
+
+
+@pytest.mark.parametrize('text', [
+    '', 'A classic', 'The assassin', 'Scunthorpe', 'Dickens', 'batch', 'handy jobs', 'Sh!t'
+])
+def test_ignores_words_that_only_contain_listed_words(text):
+    assert not filter_instance.contains_profanity(text)
+
+
+def test_matches_whole_words_and_phrases_only():
+    profanity_filter = ProfanityFilter(['bad', 'very bad'])
+    assert profanity_filter.contains_profanity('Not b@d.')
+    assert profanity_filter.contains_profanity('very\nbad')
+    assert not profanity_filter.contains_profanity('badly, verybad')
+    assert not profanity_filter.contains_profanity('x' * 10000)
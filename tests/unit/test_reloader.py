@@ -0,0 +1,74 @@
+import os
+import shutil
+import time
+import pytest
+import movie_app.adapters.repository as repo
+from movie_app.adapters.memory_repository import MemoryRepository, populate
+from movie_app.adapters.reloader import Reloader
+from movie_app.domain.model import Review, User
+from tests.conftest import TEST_DATA_PATH
+
+
+@pytest.fixture
+def data_path(tmp_path):
+    shutil.copy(os.path.join(TEST_DATA_PATH, 'Data1000Movies.csv'), tmp_path)
+    previous_repository = repo.repo_instance
+    repo.repo_instance = MemoryRepository()
+    populate(str(tmp_path), repo.repo_instance)
+    yield tmp_path
+    repo.repo_instance = previous_repository
+
+
+def keep_first_movies(data_path, count):
+    file_name = os.path.join(data_path, 'Data1000Movies.csv')
+    with open(file_name, encoding='utf-8-sig') as data_file:
+        lines = data_file.readlines()
+    with open(file_name, 'w', encoding='utf-8') as data_file:
+        data_file.writelines(lines[:count + 1])
+
+
+def test_reload_swaps_in_new_catalog_and_keeps_user_data(data_path):
+    old_repository = repo.repo_instance
+    old_repository.add_user(User('dave', '123456789'))
+    old_repository.add_review(Review(old_repository.get_movie(2), 'Good.', 8))
+    old_repository.add_review(Review(old_repository.get_movie(500), 'Gone soon.', 3))
+    keep_first_movies(data_path, 10)
+    reloads = []
+
+    status = Reloader(str(data_path), on_reload=lambda: reloads.append(True)).reload()
+    new_repository = repo.repo_instance
+    assert new_repository is not old_repository
+    assert new_repository.get_number_of_movies() == 10
+    assert new_repository.get_user('dave').password == '123456789'
+    assert [review.review_text for review in new_repository.get_reviews_for_movie(2)] == ['Good.']
+    # The review of a movie the new catalog no longer has cannot be kept.
+    assert status['last_dropped'] == 1
+    assert status['reloads'] == 1 and reloads == [True]
+
+    # Requests that still use the old repository make their changes on the new one too.
+    old_repository.add_user(User('erin', '987654321'))
+    assert new_repository.get_user('erin').password == '987654321'
+    assert old_repository.get_user('erin').password == '987654321'
+
+
+def test_watcher_reloads_changed_data_file(data_path):
+    reloader = Reloader(str(data_path), poll_interval=0.02)
+    reloader.start_watching()
+    try:
+        keep_first_movies(data_path, 20)
+        deadline = time.monotonic() + 10
+        while reloader.status()['reloads'] == 0 and time.monotonic() < deadline:
+            time.sleep(0.02)
+    finally:
+        reloader.stop_watching()
+    assert repo.repo_instance.get_number_of_movies() == 20
+
+
+def test_failed_reload_keeps_current_repository(data_path):
+    current_repository = repo.repo_instance
+    os.remove(os.path.join(data_path, 'Data1000Movies.csv'))
+    reloader = Reloader(str(data_path))
+    with pytest.raises(OSError):
+        reloader.reload()
+    assert repo.repo_instance is current_repository
+    assert reloader.status()['last_error'].startswith('FileNotFoundError')
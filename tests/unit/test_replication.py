@@ -0,0 +1,129 @@
+import threading
+from datetime import datetime
+import pytest
+from movie_app.adapters.memory_repository import MemoryRepository, populate
+from movie_app.adapters.replication import Replicator
+from movie_app.adapters.repository import RepositoryException
+from movie_app.domain.model import Review, User, WatchList
+from tests.conftest import TEST_DATA_PATH
+
+
+def replicated_repo(database):
+    repo = MemoryRepository()
+    populate(TEST_DATA_PATH, repo)
+    replicator = Replicator(str(database))
+    repo.attach_replicator(replicator)
+    return repo, replicator
+
+
+def test_mutations_are_pulled_by_other_workers(tmp_path):
+    database = tmp_path / 'changes.db'
+    first, first_replicator = replicated_repo(database)
+    second, second_replicator = replicated_repo(database)
+
+    first.add_user(User('dave', '123456789'))
+    timestamp = datetime(2020, 10, 1, 12, 30)
+    first.add_review(Review(first.get_movie(3), 'Good.', 8, timestamp))
+    watchlist = WatchList(first.get_user('dave'), 'Later')
+    watchlist.add_movie(first.get_movie(9))
+    first.add_watchlist(watchlist)
+
+    assert second.get_user('dave') is None
+    assert second_replicator.pull(second) == [3]
+    assert second.get_user('dave').password == '123456789'
+    assert [review.review_text for review in second.get_reviews_for_movie(3)] == ['Good.']
+    assert second.get_watchlist(User('dave', 'x'))[0].watchlist == [second.get_movie(9)]
+
+    # Changes are applied once, however often a worker pulls or writes.
+    assert second_replicator.pull(second) == []
+    second.add_review(Review(second.get_movie(3), 'Bad.', 2, timestamp))
+    first_replicator.pull(first)
+    assert len(first.get_reviews_for_movie(3)) == len(second.get_reviews_for_movie(3)) == 2
+    first_replicator.close()
+    second_replicator.close()
+
+
+def test_conflicting_mutations_resolve_the_same_on_every_worker(tmp_path):
+    database = tmp_path / 'changes.db'
+    first, first_replicator = replicated_repo(database)
+    second, second_replicator = replicated_repo(database)
+
+    first.add_user(User('dave', 'first-password'))
+    # second has not pulled yet, but catches up before its own write, which is rejected.
+    with pytest.raises(RepositoryException):
+        second.add_user(User('dave', 'second-password'))
+    first_replicator.pull(first)
+    assert first.get_user('dave').password == second.get_user('dave').password == 'first-password'
+    first_replicator.close()
+    second_replicator.close()
+
+
+def test_concurrent_writers_share_one_order(tmp_path):
+    database = tmp_path / 'changes.db'
+    repos = [replicated_repo(database) for _ in range(3)]
+
+    def add_reviews(repo):
+        for i in range(20):
+            repo.add_review(Review(repo.get_movie(1), f'Review {i}', 5))
+
+    threads = [threading.Thread(target=add_reviews, args=(repo,)) for repo, _ in repos]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for repo, replicator in repos:
+        replicator.pull(repo)
+    orders = [[review.review_text for review in repo.get_reviews_for_movie(1)] for repo, _ in repos]
+    assert len(orders[0]) == 61
+    assert orders[0] == orders[1] == orders[2]
+    for _, replicator in repos:
+        replicator.close()
+
+
+def test_restarted_worker_replays_changes(tmp_path):
+    database = tmp_path / 'changes.db'
+    repo, replicator = replicated_repo(database)
+    repo.add_user(User('dave', '123456789'))
+    replicator.close()
+
+    restarted, restarted_replicator = replicated_repo(database)
+    assert restarted.get_user('dave').password == '123456789'
+    restarted_replicator.close()
+
+
+def test_forked_worker_opens_its_own_connection(tmp_path):
+    database = tmp_path / 'changes.db'
+    first, first_replicator = replicated_repo(database)
+    second, second_replicator = replicated_repo(database)
+    second_replicator.after_fork()
+    second.add_user(User('dave', '123456789'))
+    first_replicator.pull(first)
+    assert first.get_user('dave').password == '123456789'
+    first_replicator.close()
+    second_replicator.close()
+
+
+def test_batch_of_reviews_is_replicated(tmp_path):
+    database = tmp_path / 'changes.db'
+    first, first_replicator = replicated_repo(database)
+    second, second_replicator = replicated_repo(database)
+    first.add_reviews([Review(first.get_movie(rank), 'Good.', 8) for rank in (3, 9, 3)])
+    assert second_replicator.pull(second) == [3, 9, 3]
+    assert len(second.get_reviews_for_movie(3)) == 2
+    first_replicator.close()
+    second_replicator.close()
+
+
+def test_reload_requests_reach_the_other_workers_once(tmp_path):
+    database = tmp_path / 'changes.db'
+    first, first_replicator = replicated_repo(database)
+    second, second_replicator = replicated_repo(database)
+    first_replicator.request_reload()
+    first_replicator.pull(first)
+    second_replicator.pull(second)
+    assert first_replicator.take_reload_request() is False
+    assert second_replicator.take_reload_request() is True
+    second_replicator.pull(second)
+    assert second_replicator.take_reload_request() is False
+    first_replicator.close()
+    second_replicator.close()
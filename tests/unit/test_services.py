@@ -1,8 +1,16 @@
+import csv
+import io
+from movie_app.admin import services as admin_services
+from movie_app.admin.services import InvalidMovieDataException
+from movie_app.api import services as api_services
 from movie_app.authentication import services as auth_services
 from movie_app.authentication.services import AuthenticationException
+from movie_app.export import services as export_services
 from movie_app.movies import services as movies_services
 from movie_app.movies.services import NonExistentMovieException
 from movie_app.utilities import services as utility_services
+from movie_app.caching.lru_cache import LRUCache
+from movie_app.caching.view_models import overlay
 import pytest
 
 
@@ -152,7 +160,129 @@ def test_get_reviews_for_movie_without_reviews(in_memory_repo):
     assert len(reviews_as_dict) == 0
 
 
+def test_get_review_timeline_pages_through_reviews(in_memory_repo):
+    for rating in range(1, 6):
+        movies_services.add_review(2, f'Review {rating}', rating, 'nton939', in_memory_repo)
+
+    first_page = movies_services.get_review_timeline(2, 'top_rated', None, 3, in_memory_repo)
+    assert [review['rating'] for review in first_page['reviews']] == [5, 4, 3]
+    assert first_page['review_count'] == 5
+    last_page = movies_services.get_review_timeline(2, 'top_rated', first_page['next_cursor'], 3, in_memory_repo)
+    assert [review['rating'] for review in last_page['reviews']] == [2, 1]
+    assert last_page['next_cursor'] is None
+
+    with pytest.raises(movies_services.UnknownReviewOrderException):
+        movies_services.get_review_timeline(2, 'oldest', None, 3, in_memory_repo)
+    with pytest.raises(NonExistentMovieException):
+        movies_services.get_review_timeline(0, 'newest', None, 3, in_memory_repo)
+
+
 def test_get_genres_from_utilities(in_memory_repo):
     genre_names = utility_services.get_genre_names(in_memory_repo)
     assert len(genre_names) == 20
     assert 'Action' in genre_names
+
+
+def test_api_caches_serialized_movie_until_it_changes(in_memory_repo):
+    cache = LRUCache(max_entries=10)
+    fields = api_services.parse_fields('rank,title')
+    assert api_services.get_movies_json([1, 2], fields, in_memory_repo, cache) == \
+        b'[{"rank":1,"title":"Guardians of the Galaxy"},{"rank":2,"title":"Prometheus"}]'
+    api_services.get_movies_json([1, 2], fields, in_memory_repo, cache)
+    assert cache.stats()['hits'] == 2
+
+    movies_services.add_review(1, 'Loved it', 9, 'nton939', in_memory_repo)
+    api_services.get_movies_json([1, 2], fields, in_memory_repo, cache)
+    assert cache.stats()['hits'] == 3
+
+
+def test_api_rejects_unknown_fields():
+    with pytest.raises(api_services.UnknownFieldException):
+        api_services.parse_fields('title,budget')
+
+
+def test_movie_view_model_is_shared_until_movie_changes(in_memory_repo):
+    movie_as_dict = movies_services.get_movie(1, in_memory_repo)
+    assert movies_services.get_movies_by_rank([1], in_memory_repo)[0] is movie_as_dict
+
+    # Check that the shared view model cannot be modified by a view.
+    with pytest.raises(TypeError):
+        movie_as_dict['title'] = 'Changed'
+
+    movies_services.add_review(1, 'Loved it', 9, 'nton939', in_memory_repo)
+    assert movies_services.get_movie(1, in_memory_repo) is not movie_as_dict
+
+
+def test_overlay_adds_fields_without_modifying_view_model(in_memory_repo):
+    movie_as_dict = movies_services.get_movie(1, in_memory_repo)
+    movie = overlay(movie_as_dict, view_review_url='/reviews')
+    assert movie['view_review_url'] == '/reviews'
+    assert movie['title'] == 'Guardians of the Galaxy'
+    assert 'view_review_url' not in movie_as_dict
+
+
+def test_export_movies_as_csv_uses_data_file_columns(in_memory_repo):
+    export = b''.join(export_services.export_movies('csv', in_memory_repo)).decode('utf-8')
+    rows = list(csv.DictReader(io.StringIO(export)))
+    assert len(rows) == 1000
+    assert rows[0]['Title'] == 'Guardians of the Galaxy'
+    assert rows[0]['Genre'] == 'Action,Adventure,Sci-Fi'
+    assert rows[0]['Revenue (Millions)'] == '333.13'
+
+
+def test_export_is_generated_in_chunks(in_memory_repo):
+    chunks = export_services.export_movies('ndjson', in_memory_repo)
+    first_chunk = next(chunks)
+    assert export_services.CHUNK_SIZE <= len(first_chunk) < 2 * export_services.CHUNK_SIZE
+
+
+def test_export_rejects_unknown_format(in_memory_repo):
+    with pytest.raises(export_services.UnknownFormatException):
+        export_services.export_reviews('xml', in_memory_repo)
+
+
+NEW_MOVIES_CSV = (
+    'Rank,Title,Genre,Description,Director,Actors,Year,Runtime (Minutes),Rating,Votes,Revenue (Millions),Metascore\n'
+    '1,Guardians of the Galaxy,"Action,Adventure,Sci-Fi",Again.,James Gunn,Chris Pratt,2014,121,8.1,757074,333.13,76\n'
+    '1001,Moana 2,"Animation,Musical",A voyage.,David Derrick Jr.,"Auli\'i Cravalho, Dwayne Johnson",2024,100,6.8,N/A,N/A,N/A\n'
+)
+
+
+def test_import_movies_adds_new_ranks_only(in_memory_repo):
+    result = admin_services.import_movies(io.StringIO(NEW_MOVIES_CSV), in_memory_repo)
+    assert result['added'] == [1001]
+    assert result['skipped'] == [1]
+    assert result['genres'] == ['Animation', 'Musical']
+    assert in_memory_repo.get_number_of_movies() == 1001
+    assert in_memory_repo.get_movie(1001).title == 'Moana 2'
+    assert in_memory_repo.get_movie_ranks_for_genre('Musical')[-1] == 1001
+    assert in_memory_repo.get_movie(1).description != 'Again.'
+
+
+def test_import_movies_checks_every_row_first(in_memory_repo):
+    lines = io.StringIO(NEW_MOVIES_CSV + '1002,Broken,Drama,No year.,Someone,Someone Else,soon,90,N/A,N/A,N/A,N/A\n')
+    with pytest.raises(InvalidMovieDataException):
+        admin_services.import_movies(lines, in_memory_repo)
+    assert in_memory_repo.get_movie(1001) is None
+
+
+def test_import_reviews_adds_valid_reviews_and_reports_the_rest(in_memory_repo):
+    lines = [
+        '{"movie_rank": 3, "username": "nton939", "review_text": "Great film.", "rating": 9}',
+        '{"movie_rank": 9, "username": "nton939", "review_text": "Dull.", "rating": 3, '
+        '"timestamp": "2020-10-01T12:30:00"}',
+        '',
+        '{"movie_rank": 3, "username": "nton939", "review_text": "Sh1t film.", "rating": 1}',
+        '{"movie_rank": 3, "username": "nton939", "review_text": "Great film.", "rating": 11}',
+        '{"movie_rank": 5000, "username": "nton939", "review_text": "Great film.", "rating": 9}',
+        '{"movie_rank": 3, "username": "nobody", "review_text": "Great film.", "rating": 9}',
+        '{"movie_rank": 3, "username": "nton939", "rating": 9}',
+        'not json'
+    ]
+    result = admin_services.import_reviews(lines, in_memory_repo)
+    assert result['added'] == 2
+    assert result['movie_ranks'] == [3, 9]
+    assert [rejection['line'] for rejection in result['rejected']] == [4, 5, 6, 7, 8, 9]
+    assert result['rejected'][2]['error'] == 'Unknown movie 5000'
+    assert result['rejected'][4]['error'] == "Missing 'review_text'"
+    assert in_memory_repo.get_reviews_for_movie(9)[0].timestamp.year == 2020
@@ -0,0 +1,179 @@
+import threading
+from datetime import datetime
+from movie_app.domain.model import Director, Genre, Actor, Movie, Review, User, WatchList
+from movie_app.adapters import sqlite_repository
+from movie_app.adapters.repository import RepositoryException
+from movie_app.adapters.sqlite_repository import SqliteRepository
+from tests.conftest import TEST_DATA_PATH
+import pytest
+
+
+def test_repo_loads_movies_with_their_entities(sqlite_repo):
+    assert sqlite_repo.get_number_of_movies() == 1000
+    movie = sqlite_repo.get_movie(1)
+    assert movie == Movie('Guardians of the Galaxy', 2014)
+    assert movie.director == Director('James Gunn')
+    assert movie.genres == [Genre('Action'), Genre('Adventure'), Genre('Sci-Fi')]
+    assert movie.actors[0] == Actor('Chris Pratt')
+    assert movie.revenue == 333.13
+    assert sqlite_repo.get_director('James Gunn') == Director('James Gunn')
+    assert sqlite_repo.get_actor('Bob') is None
+
+
+def test_repo_retrieves_movies_by_rank_in_requested_order(sqlite_repo):
+    movies = sqlite_repo.get_movies_by_rank([3, 1, 2000, 2])
+    assert [movie.rank for movie in movies] == [3, 1, 2]
+    assert sqlite_repo.get_first_movie().rank == 1
+    assert sqlite_repo.get_last_movie().rank == 1000
+
+
+def test_repo_matches_memory_repository(sqlite_repo, in_memory_repo):
+    assert sqlite_repo.get_genres() == in_memory_repo.get_genres()
+    assert sqlite_repo.get_movie_ranks_for_genre('Sci-Fi') == in_memory_repo.get_movie_ranks_for_genre('Sci-Fi')
+    assert sqlite_repo.get_movie_ranks_for_genre('Bob') == []
+    for sqlite_movie, memory_movie in zip(sqlite_repo.iter_movies(), in_memory_repo.iter_movies()):
+        assert sqlite_movie.rank == memory_movie.rank
+        assert sqlite_movie.description == memory_movie.description
+        assert sqlite_movie.actors == memory_movie.actors
+
+
+def test_repo_adds_and_retrieves_reviews(sqlite_repo):
+    timestamp = datetime(2020, 10, 1, 12, 30)
+    sqlite_repo.add_review(Review(sqlite_repo.get_movie(2), 'Scary.', 7, timestamp))
+    reviews = sqlite_repo.get_reviews_for_movie(2)
+    assert reviews == [Review(Movie('Prometheus', 2012), 'Scary.', 7, timestamp)]
+    assert len(sqlite_repo.get_reviews()) == 2
+    with pytest.raises(RepositoryException):
+        sqlite_repo.add_review(Review(None, 'Nothing', 5))
+
+
+def test_repo_adds_users_once(sqlite_repo):
+    sqlite_repo.add_user(User('Dave', '123456789'))
+    assert sqlite_repo.get_user('dave') == User('Dave', '123456789')
+    assert sqlite_repo.get_user('dave').password == '123456789'
+    with pytest.raises(RepositoryException):
+        sqlite_repo.add_user(User('dave', 'other'))
+
+
+def test_repo_adds_and_retrieves_watchlists(sqlite_repo):
+    user = sqlite_repo.get_user('nton939')
+    watchlist = WatchList(user, 'Sci-Fi')
+    watchlist.add_movie(sqlite_repo.get_movie(7))
+    sqlite_repo.add_watchlist(watchlist)
+    watchlists = sqlite_repo.get_watchlist(user)
+    assert [w.watchlist_name for w in watchlists] == ['Watch Later', 'Sci-Fi']
+    assert watchlists[0].size() == 5
+    assert watchlists[1].watchlist == [sqlite_repo.get_movie(7)]
+
+
+def test_repo_versions_increase_when_movie_is_reviewed(sqlite_repo):
+    version = sqlite_repo.get_version()
+    movie_version = sqlite_repo.get_movie_version(10)
+    other_movie_version = sqlite_repo.get_movie_version(11)
+    sqlite_repo.add_review(Review(sqlite_repo.get_movie(10), 'It was average.', 5))
+    assert sqlite_repo.get_version() > version
+    assert sqlite_repo.get_movie_version(10) > movie_version
+    assert sqlite_repo.get_movie_version(11) == other_movie_version
+    assert sqlite_repo.get_movie_version(2000) == 0
+
+
+def test_repo_keeps_user_data_when_reopened(tmp_path):
+    database = str(tmp_path / 'cs235flix.db')
+    repo = SqliteRepository(database)
+    sqlite_repository.populate(TEST_DATA_PATH, repo)
+    repo.add_user(User('dave', '123456789'))
+    repo.add_review(Review(repo.get_movie(3), 'Good.', 8))
+    old_version = repo.get_movie_version(3)
+    repo.close()
+
+    reopened_repo = SqliteRepository(database)
+    sqlite_repository.populate(TEST_DATA_PATH, reopened_repo)
+    assert reopened_repo.get_number_of_movies() == 1000
+    assert reopened_repo.get_user('dave') is not None
+    assert [review.review_text for review in reopened_repo.get_reviews_for_movie(3)] == ['Good.']
+    assert len(reopened_repo.get_reviews()) == 2
+    # Versions are kept in the database, so unchanged movies keep theirs, and new versions are never reused.
+    assert reopened_repo.get_movie_version(3) == old_version
+    reopened_repo.add_review(Review(reopened_repo.get_movie(3), 'Better.', 9))
+    assert reopened_repo.get_movie_version(3) > old_version
+    reopened_repo.close()
+
+
+def test_repos_sharing_a_database_see_each_others_changes(tmp_path):
+    database = str(tmp_path / 'cs235flix.db')
+    first_repo = SqliteRepository(database)
+    sqlite_repository.populate(TEST_DATA_PATH, first_repo)
+    second_repo = SqliteRepository(database)
+    version, movie_version = second_repo.get_version(), second_repo.get_movie_version(1)
+    assert first_repo.get_version() == version
+
+    first_repo.add_review(Review(first_repo.get_movie(1), 'Seen elsewhere.', 8))
+    assert len(second_repo.get_reviews_for_movie(1)) == 2
+    assert second_repo.get_version() == first_repo.get_version() > version
+    assert second_repo.get_movie_version(1) == first_repo.get_movie_version(1) > movie_version
+
+    movie = Movie('New Movie', 2020)
+    movie.rank = 1001
+    movie.director = Director('Someone')
+    first_repo.add_movie(movie)
+    assert second_repo.get_number_of_movies() == 1001
+    assert second_repo.get_movie(1001) == movie
+    first_repo.close()
+    second_repo.close()
+
+
+def test_repo_can_be_used_from_several_threads(tmp_path):
+    repo = SqliteRepository(str(tmp_path / 'cs235flix.db'), pool_size=2)
+    sqlite_repository.populate(TEST_DATA_PATH, repo)
+    errors = []
+
+    def review_movies(offset):
+        try:
+            for rank in range(offset, 100, 4):
+                repo.add_review(Review(repo.get_movie(rank + 1), 'Threaded.', 5))
+        except Exception as exception:
+            errors.append(exception)
+
+    threads = [threading.Thread(target=review_movies, args=(offset,)) for offset in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert len(repo.get_reviews()) == 101
+    repo.close()
+
+
+def test_repo_opens_new_connections_after_fork(sqlite_repo):
+    sqlite_repo.after_fork()
+    sqlite_repo.add_user(User('dave', '123456789'))
+    assert sqlite_repo.get_user('dave').password == '123456789'
+    assert sqlite_repo.get_number_of_movies() == 1000
+
+
+def test_repo_adds_reviews_in_one_transaction(sqlite_repo):
+    reviews = [Review(sqlite_repo.get_movie(rank), f'Review of {rank}', 7) for rank in (3, 3, 9)]
+    sqlite_repo.add_reviews(reviews)
+    assert [review.review_text for review in sqlite_repo.get_reviews_for_movie(3)] == ['Review of 3'] * 2
+    assert len(sqlite_repo.get_reviews_for_movie(9)) == 1
+
+
+def test_repo_pages_through_review_timelines(sqlite_repo):
+    movie = sqlite_repo.get_movie(2)
+    sqlite_repo.add_review(Review(movie, 'a', 5, datetime(2020, 1, 3)))
+    sqlite_repo.add_review(Review(movie, 'b', 9, datetime(2020, 1, 1)))
+    sqlite_repo.add_review(Review(movie, 'c', 5, datetime(2020, 1, 5)))
+    sqlite_repo.add_reviews([Review(movie, 'd', 7, datetime(2020, 1, 2)), Review(movie, 'e', 9, datetime(2020, 1, 4))])
+    assert sqlite_repo.get_number_of_reviews_for_movie(2) == 5
+
+    for order, expected in (('newest', 'ceadb'), ('top_rated', 'ebdca')):
+        texts = ''
+        page = sqlite_repo.get_review_timeline(2, order, limit=2)
+        while len(page) > 0:
+            texts += ''.join(review.review_text for _, review in page)
+            page = sqlite_repo.get_review_timeline(2, order, after=page[-1][0], limit=2)
+        assert texts == expected
+
+    assert sqlite_repo.get_review_timeline(2, 'newest', after=1) == []
+    with pytest.raises(RepositoryException):
+        sqlite_repo.get_review_timeline(2, 'oldest')
@@ -0,0 +1,102 @@
+import os
+import time
+from movie_app.statistics.hyperloglog import HyperLogLog
+from movie_app.statistics.view_counters import ViewCounters
+import pytest
+
+
+def test_hyperloglog_estimates_distinct_values():
+    hll = HyperLogLog(12)
+    for i in range(20000):
+        hll.add(f'viewer-{i}')
+        hll.add(f'viewer-{i}')    # Repeat views must not be counted twice.
+    assert abs(hll.count() - 20000) < 20000 * 0.05
+
+
+def test_hyperloglog_is_exact_for_small_counts():
+    hll = HyperLogLog(12)
+    for i in range(10):
+        hll.add(i)
+    assert hll.count() == 10
+
+
+def test_hyperloglog_merge_is_idempotent():
+    first = HyperLogLog(10)
+    second = HyperLogLog(10)
+    for i in range(1000):
+        first.add(i)
+    for i in range(500, 1500):
+        second.add(i)
+    first.merge(second)
+    estimate = first.count()
+    first.merge(second)
+    assert first.count() == estimate
+    assert abs(estimate - 1500) < 1500 * 0.1
+
+
+def test_hyperloglog_cannot_merge_different_precisions():
+    with pytest.raises(ValueError):
+        HyperLogLog(10).merge(HyperLogLog(12))
+
+
+def test_view_counters_count_movies_and_genres():
+    counters = ViewCounters()
+    counters.record_views('alice', [1, 2, 3], 'Action')
+    counters.record_views('bob', [1], 'Action')
+    counters.record_views('alice', [1], 'Comedy')
+    assert counters.unique_viewers_for_movie(1) == 2
+    assert counters.unique_viewers_for_movie(2) == 1
+    assert counters.unique_viewers_for_movie(4) == 0
+    assert counters.unique_viewers_for_genre('Action') == 2
+    assert counters.unique_viewers_for_genre('Comedy') == 1
+
+
+def test_view_counters_snapshots_merge_across_workers(tmp_path):
+    first_worker = ViewCounters(snapshot_dir=str(tmp_path))
+    first_worker.record_views('alice', [1], 'Action')
+    first_worker.save_snapshot(str(tmp_path / 'view_counters-1.json'))
+
+    second_worker = ViewCounters(snapshot_dir=str(tmp_path))
+    second_worker.record_views('bob', [1], 'Action')
+    second_worker.save_snapshot(str(tmp_path / 'view_counters-2.json'))
+
+    # A restarted worker recovers the union of both workers' viewers.
+    restarted_worker = ViewCounters(snapshot_dir=str(tmp_path))
+    restarted_worker.merge_snapshots()
+    restarted_worker.merge_snapshots()
+    assert restarted_worker.unique_viewers_for_movie(1) == 2
+    assert restarted_worker.unique_viewers_for_genre('Action') == 2
+
+
+def test_view_counters_fold_in_and_delete_snapshots_of_stopped_workers(tmp_path):
+    stopped_worker = ViewCounters(snapshot_dir=str(tmp_path))
+    stopped_worker.record_views('alice', [1])
+    stale_path = tmp_path / 'view_counters-1.json'
+    stopped_worker.save_snapshot(str(stale_path))
+    live_path = tmp_path / 'view_counters-2.json'
+    stopped_worker.save_snapshot(str(live_path))
+    os.utime(stale_path, (0, 0))
+
+    worker = ViewCounters(snapshot_dir=str(tmp_path), snapshot_interval=60)
+    worker.record_views('bob', [1])
+    # Recording views writes nothing; snapshots are taken off the request path.
+    assert len(os.listdir(tmp_path)) == 2
+    worker.snapshot()
+    assert sorted(os.listdir(tmp_path)) == sorted(['view_counters-2.json', os.path.basename(worker.snapshot_path)])
+
+    restarted_worker = ViewCounters(snapshot_dir=str(tmp_path))
+    restarted_worker.merge_snapshots()
+    assert restarted_worker.unique_viewers_for_movie(1) == 2
+
+
+def test_view_counters_snapshot_on_a_background_thread(tmp_path):
+    worker = ViewCounters(snapshot_dir=str(tmp_path), snapshot_interval=0.01)
+    worker.record_views('alice', [1])
+    worker.start_snapshotting()
+    try:
+        deadline = time.monotonic() + 5
+        while not os.path.exists(worker.snapshot_path) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert os.path.exists(worker.snapshot_path)
+    finally:
+        worker.stop_snapshotting()
@@ -1,6 +1,8 @@
 from movie_app import create_app
+from movie_app.web import prefork
 
 app = create_app()
+prefork.prepare_for_fork(app)
 
 if __name__ == "__main__":
     app.run(host='localhost', port=5000, threaded=False)